@@ -0,0 +1,29 @@
+from smashcima.assets.AssetRepository import AssetRepository
+from smashcima.orchestration.BaseHandwrittenModel import BaseHandwrittenModel
+from smashcima.synthesis import PaperSynthesizer, SolidColorPaperSynthesizer
+
+
+class BenchmarkModel(BaseHandwrittenModel):
+    """The base handwritten model that uses the given asset repository
+    (with stand-in bundles) instead of the default one"""
+    def __init__(
+        self,
+        assets: AssetRepository,
+        solid_color_paper: bool = False
+    ):
+        self.assets = assets
+        self.solid_color_paper = solid_color_paper
+        super().__init__()
+
+    def register_services(self):
+        super().register_services()
+
+        # override the default asset repository
+        self.container.instance(AssetRepository, self.assets)
+
+        # the paper quilting is slow and irrelevant when benchmarking
+        # notation synthesis
+        if self.solid_color_paper:
+            self.container.interface(
+                PaperSynthesizer, SolidColorPaperSynthesizer
+            )
@@ -0,0 +1,145 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from smashcima import __version__ as smashcima_version
+from smashcima.assets.AssetRepository import AssetRepository
+
+from .harness import find_regressions, run_benchmark
+from .standin_assets import build_standin_assets
+from .suite import REPOSITORY_ROOT, build_benchmarks
+
+# Execute with:
+# .venv/bin/python3 -m benchmarks --output results.json
+# .venv/bin/python3 -m benchmarks --compare results.json
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPOSITORY_ROOT,
+            stderr=subprocess.DEVNULL
+        ).decode("utf-8").strip()
+    except Exception:
+        return None
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "smashcima_version": smashcima_version,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks",
+        description="Measures throughput and peak memory of the key " +
+            "Smashcima stages on stand-in assets with fixed seeds."
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path,
+        help="Write the results as JSON into this file"
+    )
+    parser.add_argument(
+        "-k", "--filter", default="",
+        help="Run only benchmarks whose name contains this string"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5,
+        help="Number of measured iterations per benchmark (default: 5)"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=1,
+        help="Number of warmup iterations per benchmark (default: 1)"
+    )
+    parser.add_argument(
+        "--assets", type=Path,
+        help="Directory for the stand-in asset bundles, they are " +
+            "generated into a temporary directory by default"
+    )
+    parser.add_argument(
+        "--compare", type=Path,
+        help="Baseline results JSON file to compare against"
+    )
+    parser.add_argument(
+        "--time-threshold", type=float, default=0.2,
+        help="Relative median time increase considered a regression " +
+            "(default: 0.2)"
+    )
+    parser.add_argument(
+        "--memory-threshold", type=float, default=0.2,
+        help="Relative peak memory increase considered a regression " +
+            "(default: 0.2)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets_path = args.assets or Path(tmp) / "assets"
+        if args.assets is None or not args.assets.exists():
+            print("Generating stand-in asset bundles...", file=sys.stderr)
+            assets = build_standin_assets(assets_path)
+        else:
+            assets = AssetRepository(assets_path)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for benchmark in build_benchmarks(assets):
+            if args.filter not in benchmark.name:
+                continue
+            result = run_benchmark(benchmark, args.repeat, args.warmup)
+            results[result.name] = result.to_json()
+            if result.error is None:
+                print(
+                    f"{result.name:<60} {result.median * 1000:>10.2f} ms " +
+                    f"{result.throughput:>9.2f} {result.unit}/s " +
+                    f"{result.peak_memory / 2**20:>9.1f} MB"
+                )
+            else:
+                print(f"{result.name:<60} FAILED {result.error}")
+
+    report = {
+        "environment": _environment(),
+        "settings": {
+            "repeat": args.repeat,
+            "warmup": args.warmup
+        },
+        "results": results
+    }
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(
+            results,
+            baseline["results"],
+            args.time_threshold,
+            args.memory_threshold
+        )
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if len(regressions) > 0:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
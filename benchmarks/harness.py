@@ -0,0 +1,162 @@
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+BENCHMARK_SEED = 42
+"""All random number generators are re-seeded with this seed before each
+measured iteration, so that every iteration does the same amount of work"""
+
+
+@dataclass
+class Benchmark:
+    """One benchmarked operation"""
+
+    name: str
+    """Unique name, e.g. 'compositing.DefaultCompositor.run[dpi=300]'"""
+
+    run: Callable[[Any], Any]
+    """The measured operation, receives the value returned by the setup"""
+
+    setup: Callable[[], Any] = lambda: None
+    """Prepares the input for one iteration (not measured)"""
+
+    unit: str = "op"
+    """What one invocation of the operation represents (e.g. 'page')"""
+
+    rngs: List[random.Random] = field(default_factory=list)
+    """Additional RNG instances to be re-seeded before each iteration
+    (e.g. the model RNG)"""
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one benchmark, times are in seconds,
+    memory in bytes, throughput in units per second"""
+    name: str
+    unit: str
+    iterations: int
+    median: float
+    mean: float
+    min: float
+    max: float
+    stdev: float
+    throughput: float
+    peak_memory: int
+    error: Optional[str] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _seed_everything(benchmark: Benchmark):
+    random.seed(BENCHMARK_SEED)
+    np.random.seed(BENCHMARK_SEED)
+    for rng in benchmark.rngs:
+        rng.seed(BENCHMARK_SEED)
+
+
+def _run_once(benchmark: Benchmark) -> float:
+    _seed_everything(benchmark)
+    argument = benchmark.setup()
+    _seed_everything(benchmark)
+    gc.collect()
+    start = time.perf_counter()
+    benchmark.run(argument)
+    return time.perf_counter() - start
+
+
+def _measure_peak_memory(benchmark: Benchmark) -> int:
+    """Peak memory allocated during one run of the operation
+    (NumPy reports its allocations to tracemalloc as well)"""
+    _seed_everything(benchmark)
+    argument = benchmark.setup()
+    _seed_everything(benchmark)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmark(
+    benchmark: Benchmark,
+    repeat: int = 5,
+    warmup: int = 1
+) -> BenchmarkResult:
+    """Runs the benchmark and aggregates the measurements"""
+    try:
+        for _ in range(warmup):
+            _run_once(benchmark)
+        times = [_run_once(benchmark) for _ in range(repeat)]
+        peak_memory = _measure_peak_memory(benchmark)
+    except Exception as e:
+        return BenchmarkResult(
+            name=benchmark.name,
+            unit=benchmark.unit,
+            iterations=0,
+            median=0.0,
+            mean=0.0,
+            min=0.0,
+            max=0.0,
+            stdev=0.0,
+            throughput=0.0,
+            peak_memory=0,
+            error=f"{type(e).__name__}: {e}"
+        )
+
+    median = statistics.median(times)
+    return BenchmarkResult(
+        name=benchmark.name,
+        unit=benchmark.unit,
+        iterations=len(times),
+        median=median,
+        mean=statistics.mean(times),
+        min=min(times),
+        max=max(times),
+        stdev=statistics.stdev(times) if len(times) > 1 else 0.0,
+        throughput=1.0 / median if median > 0 else float("inf"),
+        peak_memory=peak_memory
+    )
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    time_threshold: float,
+    memory_threshold: float
+) -> List[str]:
+    """Compares results against a baseline (both in the JSON format)
+    and returns descriptions of regressions that exceed the thresholds
+    (relative, e.g. 0.2 means 20 % slower or larger)"""
+    regressions: List[str] = []
+    for name, result in results.items():
+        if name not in baseline or result.get("error") is not None:
+            continue
+        base = baseline[name]
+        if base.get("error") is not None:
+            continue
+
+        if base["median"] > 0 and \
+                result["median"] > base["median"] * (1 + time_threshold):
+            regressions.append(
+                f"{name}: median time {base['median'] * 1000:.2f} ms -> " +
+                f"{result['median'] * 1000:.2f} ms"
+            )
+
+        if base["peak_memory"] > 0 and result["peak_memory"] \
+                > base["peak_memory"] * (1 + memory_threshold):
+            regressions.append(
+                f"{name}: peak memory {base['peak_memory'] / 2**20:.1f} MB " +
+                f"-> {result['peak_memory'] / 2**20:.1f} MB"
+            )
+    return regressions
@@ -0,0 +1,208 @@
+import pickle
+import random
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from smashcima.assets.AssetRepository import AssetRepository
+from smashcima.assets.datasets.MuscimaPP import MuscimaPP
+from smashcima.assets.glyphs.muscima_pp.MppGlyphMetadata import \
+    MppGlyphMetadata
+from smashcima.assets.glyphs.muscima_pp.MuscimaPPGlyphs import \
+    MuscimaPPGlyphs
+from smashcima.assets.glyphs.mung.repository.MungSymbolRepository import \
+    MungSymbolRepository
+from smashcima.assets.textures.MzkPaperPatches import MzkPaperPatches
+from smashcima.geometry import Point
+from smashcima.scene import AffineSpace, Glyph, LineGlyph, ScenePoint, Sprite
+from smashcima.scene.SmashcimaLabels import SmashcimaLabels
+from smashcima.scene.SmuflLabels import SmuflLabels
+from smashcima.synthesis.glyph.MuscimaPPGlyphSynthesizer import LABEL_MAP
+
+
+# NOTE: The real asset bundles are downloaded from the internet and they
+# are large. Benchmarks must run offline and must not depend on the contents
+# of the user's asset cache, therefore we generate small stand-in bundles
+# with the same structure (synthetic ink blobs instead of real glyphs,
+# noise instead of real paper scans). The sizes of glyphs and textures
+# are similar to the real ones, so the amount of work done by the
+# synthesizers and the compositor is comparable.
+
+
+STANDIN_DPI = 300
+"""DPI of the stand-in glyph bitmaps (the same as MUSCIMA++)"""
+
+WRITERS = [1, 2, 3]
+"""Stand-in MUSCIMA++ writers"""
+
+GLYPHS_PER_LABEL = 3
+"""Number of glyph variants per label and writer"""
+
+
+class _StandinPage:
+    """Duck-types the MUSCIMA++ page for glyph metadata stamping"""
+    def __init__(self, writer: int):
+        self.mpp_writer = writer
+        self.mpp_piece = 1
+
+
+def _blob_bitmap(
+    width: int,
+    height: int,
+    ellipse: bool,
+    rng: random.Random
+) -> np.ndarray:
+    """Black ink BGRA bitmap of an ellipse or a rectangle"""
+    mask = np.zeros((height, width), dtype=np.uint8)
+    if ellipse:
+        cv2.ellipse(
+            mask,
+            (width // 2, height // 2),
+            (max(width // 2 - 1, 1), max(height // 2 - 1, 1)),
+            rng.uniform(-20, 20), 0, 360, 255, -1
+        )
+    else:
+        mask[:, :] = 255
+    zeros = np.zeros_like(mask)
+    return np.stack([zeros, zeros, zeros, mask], axis=2)
+
+
+def _build_glyph(
+    label: str,
+    bitmap: np.ndarray,
+    page: _StandinPage,
+    object_id: int
+) -> Glyph:
+    space = AffineSpace()
+    sprite = Sprite(
+        space=space,
+        bitmap=bitmap,
+        bitmap_origin=Point(0.5, 0.5),
+        dpi=STANDIN_DPI
+    )
+    glyph = Glyph(
+        space=space,
+        region=Glyph.build_region_from_sprites_alpha_channel(label, [sprite]),
+        sprites=[sprite]
+    )
+    MppGlyphMetadata.stamp_glyph(glyph, page, object_id)
+    return glyph
+
+
+def _build_line_glyph(
+    label: str,
+    length: int,
+    thickness: int,
+    horizontal: bool,
+    page: _StandinPage,
+    object_id: int,
+    rng: random.Random
+) -> LineGlyph:
+    width, height = (length, thickness) if horizontal else (thickness, length)
+    space = AffineSpace()
+    sprite = Sprite(
+        space=space,
+        bitmap=_blob_bitmap(width, height, False, rng),
+        bitmap_origin=Point(0.5, 0.5),
+        dpi=STANDIN_DPI
+    )
+    t = sprite.get_pixels_to_origin_space_transform()
+    if horizontal:
+        start, end = Point(0, height / 2), Point(width, height / 2)
+    else:
+        start, end = Point(width / 2, height), Point(width / 2, 0)
+    glyph = LineGlyph(
+        space=space,
+        region=Glyph.build_region_from_sprites_alpha_channel(label, [sprite]),
+        sprites=[sprite],
+        start_point=ScenePoint(point=t.apply_to(start), space=space),
+        end_point=ScenePoint(point=t.apply_to(end), space=space)
+    )
+    MppGlyphMetadata.stamp_glyph(glyph, page, object_id)
+    return glyph
+
+
+def _build_muscima_pp_glyphs(repository: AssetRepository, rng: random.Random):
+    items = []
+    object_id = 0
+    for writer in WRITERS:
+        page = _StandinPage(writer)
+
+        # glyphs
+        for label in sorted(set(LABEL_MAP.values())):
+            for _ in range(GLYPHS_PER_LABEL):
+                ellipse = "notehead" in label or "Dot" in label
+                width = rng.randint(20, 40)
+                height = rng.randint(16, 30) if ellipse \
+                    else rng.randint(30, 120)
+                object_id += 1
+                items.append(_build_glyph(
+                    label,
+                    _blob_bitmap(width, height, ellipse, rng),
+                    page,
+                    object_id
+                ))
+
+        # line glyphs
+        for label, horizontal in [
+            (SmuflLabels.stem.value, False),
+            (SmashcimaLabels.beam.value, True),
+            (SmashcimaLabels.beamHook.value, True),
+            (SmashcimaLabels.legerLine.value, True)
+        ]:
+            for length in range(10, 400, 15):
+                object_id += 1
+                items.append(_build_line_glyph(
+                    label,
+                    length,
+                    rng.randint(3, 8),
+                    horizontal,
+                    page,
+                    object_id,
+                    rng
+                ))
+
+    # the MUSCIMA++ dataset itself is a dependency of the glyphs bundle,
+    # only its metadata file must exist
+    dataset = MuscimaPP(repository.path / MuscimaPP.__name__, repository)
+    dataset.bundle_directory.mkdir(parents=True, exist_ok=True)
+    dataset.write_metadata()
+
+    # write the symbol repository without running the bundle constructor
+    # (it would resolve the dependencies and try to install them)
+    glyphs = MuscimaPPGlyphs.__new__(MuscimaPPGlyphs)
+    glyphs.bundle_directory = repository.path / MuscimaPPGlyphs.__name__
+    glyphs.bundle_directory.mkdir(parents=True, exist_ok=True)
+    with open(glyphs.symbol_repository_path, "wb") as f:
+        pickle.dump(MungSymbolRepository.build_from_items(items), f)
+    glyphs.write_metadata()
+
+
+def _build_mzk_paper_patches(repository: AssetRepository, seed: int):
+    patches = MzkPaperPatches(
+        repository.path / MzkPaperPatches.__name__,
+        repository
+    )
+    rng = np.random.default_rng(seed)
+    for patch in patches.load_patch_index():
+        path = patches.get_patch_path(patch)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shape = (
+            int(patch.rectangle.height),
+            int(patch.rectangle.width),
+            3
+        )
+        texture = (200 + rng.normal(0, 10, size=shape)).clip(0, 255)
+        cv2.imwrite(str(path), texture.astype(np.uint8))
+    patches.write_metadata()
+
+
+def build_standin_assets(path: Path, seed: int = 0) -> AssetRepository:
+    """Generates the stand-in asset bundles needed by the
+    `BaseHandwrittenModel` into the given directory and returns
+    the asset repository over that directory."""
+    repository = AssetRepository(path)
+    _build_muscima_pp_glyphs(repository, random.Random(seed))
+    _build_mzk_paper_patches(repository, seed)
+    return repository
@@ -0,0 +1,297 @@
+import pickle
+import random
+import subprocess
+import sys
+from functools import cached_property
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from smashcima.assets.AssetRepository import AssetRepository
+from smashcima.exporting.compositing.DefaultCompositor import \
+    DefaultCompositor
+from smashcima.exporting.image.ImageLayer import ImageLayer
+from smashcima.exporting.image.ImageLayerBuilder import ImageLayerBuilder
+from smashcima.exporting.image.LayerSet import LayerSet
+from smashcima.exporting.postprocessing.BaseHandwrittenPostprocessor import \
+    BaseHandwrittenPostprocessor
+from smashcima.exporting.postprocessing.FilterStack import FilterStack
+from smashcima.exporting.postprocessing.NullPostprocessor import \
+    NullPostprocessor
+from smashcima.exporting.SvgExporter import SvgExporter
+from smashcima.geometry import Contours, Vector2
+from smashcima.loading import MusicXmlLoader, load_score
+from smashcima.orchestration.BaseHandwrittenModel import BaseHandwrittenScene
+from smashcima.scene import AffineSpace, Glyph, Page, Score, Sprite
+from smashcima.scene.scene_serialization import dumps_scene, loads_scene
+
+from .BenchmarkModel import BenchmarkModel
+from .harness import BENCHMARK_SEED, Benchmark
+
+
+REPOSITORY_ROOT = Path(__file__).parent.parent
+
+INPUT_FIXTURE = REPOSITORY_ROOT / "testing" / "input.musicxml"
+"""The main MusicXML fixture (a multi-page piano score)"""
+
+LOADER_FIXTURES = [
+    INPUT_FIXTURE,
+    *sorted((REPOSITORY_ROOT / "jupyter" / "notation_synthesis")
+        .glob("*.musicxml"))
+]
+"""MusicXML files used to benchmark the loader"""
+
+COMPOSITOR_DPIS = [150, 300, 600]
+"""Resolutions at which the compositor is benchmarked"""
+
+IMPORT_STATEMENTS = [
+    "import smashcima",
+    "import smashcima.geometry",
+    "import smashcima.loading",
+    "from smashcima.orchestration import BaseHandwrittenModel",
+]
+"""Import statements whose duration is benchmarked
+(in a fresh interpreter, so that nothing is imported yet)"""
+
+FILTER_LAYERS = {
+    # postprocessor field -> layer the filter is applied to
+    "f_stafflines": "stafflines",
+    "f_inkstyle": "ink",
+    "f_bleed_through": "ink",
+    "f_ink_color": "ink",
+    "f_scribbles": "final",
+    "f_folding": "final",
+    "f_camera": "final",
+}
+"""Postprocessing filters of the BaseHandwrittenPostprocessor
+and the layers they are applied to during compositing"""
+
+
+def _copy_layer(layer: ImageLayer) -> ImageLayer:
+    """Copies the bitmap, since some filters modify it in-place"""
+    return ImageLayer(
+        bitmap=layer.bitmap.copy(),
+        dpi=layer.dpi,
+        space=layer.space,
+        regions=layer.regions
+    )
+
+
+class Fixtures:
+    """Lazily constructed inputs shared by the benchmarks, so that
+    running a subset of benchmarks does not build all of them"""
+
+    def __init__(self, assets: AssetRepository):
+        self.assets = assets
+
+    @cached_property
+    def notation_model(self) -> BenchmarkModel:
+        return BenchmarkModel(self.assets, solid_color_paper=True)
+
+    @cached_property
+    def scene(self) -> BaseHandwrittenScene:
+        model = BenchmarkModel(self.assets)
+        return model(file=INPUT_FIXTURE, seed=BENCHMARK_SEED)
+
+    @cached_property
+    def page(self) -> Page:
+        return self.scene.pages[0]
+
+    @cached_property
+    def sprite_contours(self) -> List[Sequence[np.ndarray]]:
+        """Pixel-precise contours of the alpha channel of all the sprites
+        in the scene (the most detailed glyph regions one can get)"""
+        contours = []
+        for sprite in self.scene.find(Sprite):
+            mask = (sprite.bitmap[:, :, 3] >= 128).astype(np.uint8) * 255
+            cv_contours, _ = cv2.findContours(
+                mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE
+            )
+            contours.append(cv_contours)
+        return contours
+
+    @cached_property
+    def layers(self) -> LayerSet:
+        extracted = DefaultCompositor(NullPostprocessor()) \
+            .extract_layers(self.page.view_box, dpi=300)
+        return LayerSet({
+            "paper": extracted["paper"],
+            "stafflines": extracted["stafflines"],
+            "ink": extracted["ink"],
+            "final": ImageLayerBuilder.merge_layers([
+                extracted["paper"],
+                extracted["stafflines"],
+                extracted["ink"]
+            ])
+        })
+
+
+def _import_benchmarks() -> List[Benchmark]:
+    def run_in_fresh_interpreter(statement: str):
+        subprocess.run(
+            [sys.executable, "-c", statement],
+            cwd=REPOSITORY_ROOT,
+            check=True
+        )
+
+    return [
+        Benchmark(
+            name=f"import[{statement}]",
+            run=lambda _, statement=statement: \
+                run_in_fresh_interpreter(statement),
+            unit="import"
+        )
+        for statement in IMPORT_STATEMENTS
+    ]
+
+
+def _loader_benchmarks() -> List[Benchmark]:
+    return [
+        Benchmark(
+            name=f"loading.MusicXmlLoader[{path.name}]",
+            run=lambda _, path=path: MusicXmlLoader().load_file(path),
+            unit="score"
+        )
+        for path in LOADER_FIXTURES
+    ]
+
+
+def _notation_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    def setup() -> Tuple[Page, Score]:
+        # the score gets linked to the synthesized scene,
+        # so each iteration needs a fresh one
+        model = fixtures.notation_model
+        model.styler.pick_style()
+        page = model.page_synthesizer.synthesize_page(Vector2(0, 0))
+        page.space.parent_space = AffineSpace()
+        return page, load_score(INPUT_FIXTURE)
+
+    def run(page_and_score: Tuple[Page, Score]):
+        page, score = page_and_score
+        fixtures.notation_model.notation_synthesizer.fill_page(
+            page, score, start_on_measure=0
+        )
+
+    return [
+        Benchmark(
+            name="synthesis.ColumnMusicNotationSynthesizer.fill_page",
+            setup=setup,
+            run=run,
+            unit="page",
+            rngs=[fixtures.notation_model.rng]
+        )
+    ]
+
+
+def _compositor_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    return [
+        Benchmark(
+            name=f"compositing.DefaultCompositor.run[dpi={dpi}]",
+            run=lambda _, dpi=dpi: DefaultCompositor(NullPostprocessor()).run(
+                fixtures.page.view_box, dpi=dpi
+            ),
+            unit="page"
+        )
+        for dpi in COMPOSITOR_DPIS
+    ]
+
+
+def _filter_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    rng = random.Random(BENCHMARK_SEED)
+    postprocessor = BaseHandwrittenPostprocessor(rng)
+
+    benchmarks: List[Benchmark] = []
+    for field_name, layer_name in FILTER_LAYERS.items():
+        stack = getattr(postprocessor, field_name)
+        filters = stack.filters if isinstance(stack, FilterStack) else [stack]
+        for f in filters:
+            benchmarks.append(Benchmark(
+                name=f"postprocessing.{field_name}.{type(f).__name__}",
+                setup=lambda layer_name=layer_name: _copy_layer(
+                    fixtures.layers[layer_name]
+                ),
+                run=f.apply_to,
+                unit="layer",
+                rngs=[rng]
+            ))
+    return benchmarks
+
+
+def _geometry_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    def build_contours(_) -> List[Contours]:
+        # (all are kept alive, so that the peak memory is their total size)
+        return [
+            Contours.from_cv2_contours(cv_contours)
+            for cv_contours in fixtures.sprite_contours
+        ]
+
+    def build_regions(_):
+        for sprite in fixtures.scene.find(Sprite):
+            Glyph.build_region_from_sprites_alpha_channel("glyph", [sprite])
+
+    return [
+        Benchmark(
+            name="geometry.Contours.from_cv2_contours[scene sprites]",
+            run=build_contours,
+            unit="scene"
+        ),
+        Benchmark(
+            name="geometry.Glyph.build_region_from_sprites_alpha_channel",
+            run=build_regions,
+            unit="scene"
+        )
+    ]
+
+
+def _exporter_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    return [
+        Benchmark(
+            name="exporting.SvgExporter.export_string",
+            run=lambda _: SvgExporter().export_string(fixtures.page.view_box),
+            unit="page"
+        )
+    ]
+
+
+def _serialization_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    return [
+        Benchmark(
+            name="serialization.pickle.dumps",
+            run=lambda _: pickle.dumps(fixtures.scene),
+            unit="scene"
+        ),
+        Benchmark(
+            name="serialization.pickle.loads",
+            setup=lambda: pickle.dumps(fixtures.scene),
+            run=pickle.loads,
+            unit="scene"
+        ),
+        Benchmark(
+            name="serialization.dumps_scene",
+            run=lambda _: dumps_scene(fixtures.scene),
+            unit="scene"
+        ),
+        Benchmark(
+            name="serialization.loads_scene",
+            setup=lambda: dumps_scene(fixtures.scene),
+            run=loads_scene,
+            unit="scene"
+        )
+    ]
+
+
+def build_benchmarks(assets: AssetRepository) -> List[Benchmark]:
+    """Lists all the benchmarks in the suite"""
+    fixtures = Fixtures(assets)
+    return [
+        *_import_benchmarks(),
+        *_loader_benchmarks(),
+        *_notation_benchmarks(fixtures),
+        *_compositor_benchmarks(fixtures),
+        *_filter_benchmarks(fixtures),
+        *_geometry_benchmarks(fixtures),
+        *_exporter_benchmarks(fixtures),
+        *_serialization_benchmarks(fixtures)
+    ]
@@ -10,6 +10,8 @@ from smashcima.exporting.compositing.DefaultCompositor import DefaultCompositor
 from smashcima.exporting.postprocessing.BaseHandwrittenPostprocessor import \
     BaseHandwrittenPostprocessor
 from smashcima.exporting.postprocessing.Filter import Filter
+from smashcima.orchestration.AsyncModelRunner import (AsyncModelRunner,
+                                                      RunnerOverloadedError)
 from smashcima.orchestration.BaseHandwrittenModel import BaseHandwrittenScene
 from smashcima.scene.Glyph import Glyph
 from smashcima.scene.Sprite import Sprite
@@ -35,13 +37,14 @@ POSTPROCESSING_FILTERS = [
 ]
 
 
+RUNNER = AsyncModelRunner(DemoModel, concurrency=2, max_queued=16)
+"""Runs synthesis and rendering off the event loop, shared by all users"""
+
+
 with gr.Blocks() as demo:
     
     # === state ===
 
-    model_state = gr.State(None)
-    """Holds the model instance for the user session"""
-
     background_state = gr.State(0)
     """The index of the selected background sample"""
 
@@ -154,31 +157,32 @@ with gr.Blocks() as demo:
             gr.Gallery(selected_index=new_background)
         )
 
-    def synthesize_scene(
-        model: Optional[DemoModel],
+    async def synthesize_scene(
         mxl_file_name: str,
         glyph_style_index: int,
         background: int
-    ) -> Tuple[np.ndarray, DemoModel, str]:
-        # create the model with the first user request
-        if model is None:
-            model = DemoModel()
-
+    ) -> Tuple[BaseHandwrittenScene, np.ndarray, str]:
         # full path to the input MusicXML file
         mxl_path = str(next(f for f in MXL_FILES if f.name == mxl_file_name))
 
-        # set the glyph style
-        model.demo_style_domain.apply_glyph_style(
-            GLYPH_STYLES[glyph_style_index]
-        )
+        def _configure(model: DemoModel):
+            # set the glyph style
+            model.demo_style_domain.apply_glyph_style(
+                GLYPH_STYLES[glyph_style_index]
+            )
 
-        # set the background paper style
-        model.demo_style_domain.apply_paper_style(
-            BACKGROUND_SAMPLES[background]
-        )
-        
-        # run the synthesizer
-        scene = model(mxl_path)
+            # set the background paper style
+            model.demo_style_domain.apply_paper_style(
+                BACKGROUND_SAMPLES[background]
+            )
+
+        # the model is shared by all users, so it is configured and invoked
+        # while being held exclusively (in a worker thread), the runner
+        # then remembers the model, so that it also renders the scene
+        try:
+            scene = await RUNNER.synthesize(mxl_path, configure=_configure)
+        except RunnerOverloadedError:
+            raise gr.Error("The demo is busy, try again in a moment.")
 
         # create the preview image
         # scene_copy = copy.deepcopy(scene)
@@ -190,14 +194,16 @@ with gr.Blocks() as demo:
         #         border_color=(0, 0, 255, 128),
         #         border_width=0.4
         #    )
-        scene_preview_img = BitmapRenderer.default_viewbox_render(
-            view_box=scene.pages[0].view_box,
-            dpi=300
+        scene_preview_img = await RUNNER.run(
+            lambda model: BitmapRenderer.default_viewbox_render(
+                view_box=scene.pages[0].view_box,
+                dpi=300
+            ),
+            scene=scene
         )
 
         return (
             scene,
-            model,
             img_smashcima2gradio(scene_preview_img),
             f"""
             Scene Objects: {len(scene.objects)},
@@ -209,7 +215,7 @@ with gr.Blocks() as demo:
             """
         )
     
-    def render_final_image(
+    async def render_final_image(
         scene: Optional[BaseHandwrittenScene],
         radio: str,
         checkboxes: List[int]
@@ -217,6 +223,19 @@ with gr.Blocks() as demo:
         if scene is None:
             raise gr.Error("You must synthesize a scene first.")
 
+        try:
+            return await RUNNER.run(
+                lambda model: _render_final_image(scene, radio, checkboxes),
+                scene=scene
+            )
+        except RunnerOverloadedError:
+            raise gr.Error("The demo is busy, try again in a moment.")
+
+    def _render_final_image(
+        scene: BaseHandwrittenScene,
+        radio: str,
+        checkboxes: List[int]
+    ) -> np.ndarray:
         rng = random.Random()
         pp = BaseHandwrittenPostprocessor(rng)
         compositor = DefaultCompositor(pp)
@@ -242,8 +261,8 @@ with gr.Blocks() as demo:
 
     synth_evt_args = (
         synthesize_scene,
-        [model_state, mxl_file_radio, glyph_style_radio, background_state],
-        [scene_state, model_state, scene_preview_image, scene_info_md]
+        [mxl_file_radio, glyph_style_radio, background_state],
+        [scene_state, scene_preview_image, scene_info_md]
     )
 
     render_evt_args = (
@@ -1,27 +1,59 @@
 from ._version import __version__
 
-# -----------------------------------------------------------------------------
-# import important types that should also be accessible at the top level
-from .exporting import *
-from .geometry import *
-from .scene import *
-from .orchestration.Model import Model
-from .synthesis.GlyphSynthesizer import GlyphSynthesizer
-from .synthesis.LineSynthesizer import LineSynthesizer
-from .synthesis.MusicNotationSynthesizer import MusicNotationSynthesizer
-from .synthesis.PageSynthesizer import PageSynthesizer
-from .synthesis.PaperSynthesizer import PaperSynthesizer
-from .synthesis.StafflinesSynthesizer import StafflinesSynthesizer
+from typing import TYPE_CHECKING
 
-# -----------------------------------------------------------------------------
-# import sub-modules to make them accessible from this module
-# TODO: assets
-from smashcima import exporting
-from smashcima import geometry
-# smashcima.jupyter must always be imported explicitly, since it depends
-# on jupyter, which is an optional dependency
-from smashcima import loading
-from smashcima import orchestration
-from smashcima import scene
-from smashcima import synthesis
-from smashcima import config
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    # -------------------------------------------------------------------------
+    # import important types that should also be accessible at the top level
+    from .exporting import *
+    from .geometry import *
+    from .scene import *
+    from .orchestration.Model import Model
+    from .synthesis.GlyphSynthesizer import GlyphSynthesizer
+    from .synthesis.LineSynthesizer import LineSynthesizer
+    from .synthesis.MusicNotationSynthesizer import MusicNotationSynthesizer
+    from .synthesis.PageSynthesizer import PageSynthesizer
+    from .synthesis.PaperSynthesizer import PaperSynthesizer
+    from .synthesis.StafflinesSynthesizer import StafflinesSynthesizer
+
+    # -------------------------------------------------------------------------
+    # import sub-modules to make them accessible from this module
+    # TODO: assets
+    from smashcima import exporting
+    from smashcima import geometry
+    # smashcima.jupyter must always be imported explicitly, since it depends
+    # on jupyter, which is an optional dependency
+    from smashcima import loading
+    from smashcima import orchestration
+    from smashcima import scene
+    from smashcima import synthesis
+    from smashcima import config
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "Model": ".orchestration.Model",
+    "GlyphSynthesizer": ".synthesis.GlyphSynthesizer",
+    "LineSynthesizer": ".synthesis.LineSynthesizer",
+    "MusicNotationSynthesizer": ".synthesis.MusicNotationSynthesizer",
+    "PageSynthesizer": ".synthesis.PageSynthesizer",
+    "PaperSynthesizer": ".synthesis.PaperSynthesizer",
+    "StafflinesSynthesizer": ".synthesis.StafflinesSynthesizer"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(
+    __name__, _EXPORTS,
+    nested=[".exporting", ".geometry", ".scene"],
+    submodules=[
+        "exporting",
+        "geometry",
+        "loading",
+        "orchestration",
+        "scene",
+        "synthesis",
+        "config"
+    ]
+)
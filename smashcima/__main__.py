@@ -0,0 +1,113 @@
+import argparse
+import importlib
+import sys
+from pathlib import Path
+from typing import List, Optional, Type
+
+import tqdm
+
+from smashcima.orchestration.Model import Model
+
+
+# Execute with:
+# python3 -m smashcima generate ./corpus ./dataset --samples 1000
+
+
+def resolve_model_class(name: str) -> Type[Model]:
+    """Resolves the model class from its name. Either a model from the
+    `smashcima.orchestration` package (e.g. 'BaseHandwrittenModel')
+    or a fully qualified name (e.g. 'my_package.my_module.MyModel')."""
+    if "." in name:
+        module_name, class_name = name.rsplit(".", 1)
+    else:
+        module_name, class_name = "smashcima.orchestration", name
+
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(model_class, type) and issubclass(model_class, Model)):
+        raise Exception(f"{name} is not a Smashcima model class")
+    return model_class
+
+
+def generate(args: argparse.Namespace):
+    from smashcima.orchestration.generate_dataset import generate_dataset
+
+    progress_bar = tqdm.tqdm(total=args.samples, unit="sample")
+    for index in generate_dataset(
+        corpus_directory=args.corpus,
+        output_directory=args.output,
+        model_factory=resolve_model_class(args.model),
+        samples=args.samples,
+        dpi=args.dpi,
+        workers=args.workers,
+        seed=args.seed,
+        max_shard_size=int(args.shard_size * 1024 * 1024),
+        raster_workers=args.raster_workers
+    ):
+        if progress_bar.n == 0:
+            progress_bar.update(index) # skip samples of a resumed run
+        progress_bar.update(1)
+    progress_bar.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m smashcima",
+        description="Smashcima - training data synthesizer for OMR"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser(
+        "generate",
+        help="Synthesize a dataset of page images with annotations",
+        description="Synthesizes page images with JSON annotations from " +
+            "a MusicXML corpus and streams them into tar shards " +
+            "(WebDataset-style). An interrupted run is resumed when " +
+            "started again with the same arguments."
+    )
+    generate_parser.add_argument(
+        "corpus", type=Path,
+        help="Directory with MusicXML files (searched recursively)"
+    )
+    generate_parser.add_argument(
+        "output", type=Path,
+        help="Directory where the shards and the manifest are written"
+    )
+    generate_parser.add_argument(
+        "--model", default="BaseHandwrittenModel",
+        help="Model class name, either from smashcima.orchestration " +
+            "or fully qualified (default: BaseHandwrittenModel)"
+    )
+    generate_parser.add_argument(
+        "--samples", type=int, required=True,
+        help="Number of samples (model invocations) to synthesize"
+    )
+    generate_parser.add_argument(
+        "--dpi", type=float, default=300,
+        help="Resolution of the rendered images (default: 300)"
+    )
+    generate_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Number of worker processes (default: number of CPUs)"
+    )
+    generate_parser.add_argument(
+        "--raster-workers", type=int, default=None,
+        help="Render pages in a separate pool of this many processes, " +
+            "while --workers processes only synthesize scenes " +
+            "(default: each worker does both)"
+    )
+    generate_parser.add_argument(
+        "--seed", type=int, default=0,
+        help="Base seed of the dataset (default: 0)"
+    )
+    generate_parser.add_argument(
+        "--shard-size", type=float, default=1024,
+        help="Maximum size of one shard in megabytes (default: 1024)"
+    )
+    generate_parser.set_defaults(handler=generate)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
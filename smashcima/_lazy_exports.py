@@ -0,0 +1,88 @@
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+# NOTE: Importing everything eagerly in the package __init__ files makes
+# `import smashcima` pull in OpenCV, augraphy, albumentations, etc. even when
+# only a tiny part of the library is used. Instead, the package __init__ files
+# list their exports in a static `_EXPORTS` dictionary (name -> module) and
+# define the module-level `__getattr__` and `__dir__` (PEP 562) via
+# `lazy_exports`, which import each module only once the exported name
+# is accessed for the first time. The same imports are repeated inside
+# an `if TYPE_CHECKING:` block, only for type checkers and IDEs.
+
+
+class _LazyPackage(ModuleType):
+    """Module type of a package whose exported names are imported lazily"""
+
+    def __setattr__(self, name: str, value: Any):
+        # The import system binds each loaded sub-module as an attribute
+        # of its package (there is no PEP 562 hook for that). Modules in
+        # Smashcima are named after the class they contain, so this would
+        # replace the exported class with the module. (Eager imports in
+        # __init__ files used to overwrite the attribute back with the class,
+        # here we keep the class instead.)
+        if isinstance(value, ModuleType) \
+                and value.__name__ == f"{self.__name__}.{name}" \
+                and name in self.__dict__.get("_EXPORTS", {}):
+            return
+        super().__setattr__(name, value)
+
+
+def lazy_exports(
+    package_name: str,
+    exports: Dict[str, str],
+    nested: Sequence[str] = (),
+    submodules: Sequence[str] = ()
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]], List[str]]:
+    """Builds the module-level `__getattr__`, `__dir__` and `__all__`
+    of a package whose names are imported lazily. Used at the end
+    of the package __init__ file as:
+    `__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)`
+
+    :param package_name: The `__name__` of the package.
+    :param exports: Maps exported names to the (relative) names
+        of the modules that define them.
+    :param nested: Relative names of (also lazy) packages whose `__all__`
+        names are re-exported, like with a star import.
+    :param submodules: Names of sub-modules that are exported themselves.
+    """
+    package = sys.modules[package_name]
+
+    def __getattr__(name: str) -> Any:
+        if name in exports:
+            module = importlib.import_module(exports[name], package_name)
+            value = getattr(module, name)
+        elif name in submodules:
+            value = importlib.import_module("." + name, package_name)
+        else:
+            for nested_name in nested:
+                nested_package = importlib.import_module(
+                    nested_name, package_name
+                )
+                if name in nested_package.__all__:
+                    value = getattr(nested_package, name)
+                    break
+            else:
+                raise AttributeError(
+                    f"module '{package_name}' has no attribute '{name}'"
+                )
+
+        # cache the value, so that this function is called only once per name
+        vars(package)[name] = value
+        return value
+
+    exported_names = [*exports.keys(), *submodules]
+    for nested_name in nested:
+        exported_names += importlib.import_module(
+            nested_name, package_name
+        ).__all__
+    all_names = list(dict.fromkeys(exported_names))
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(package)) | set(all_names))
+
+    package.__class__ = _LazyPackage
+    return __getattr__, __dir__, all_names
@@ -28,13 +28,22 @@ class AssetRepository(BundleResolver):
         self._bundle_cache: Dict[Type[T], T] = dict()
         "Caches bundle instance to speed up their resolution"
 
+    _default_instances: Dict[Path, "AssetRepository"] = dict()
+    "Default repository instances of this process, keyed by their path"
+
     @staticmethod
     def default() -> "AssetRepository":
-        """Builds a new instance of the default asset repository
-        to use for this process"""
-        return AssetRepository(
-            Path(MC_ASSETS_CACHE).resolve()
-        )
+        """Returns the default asset repository to use for this process.
+
+        The instance is shared by all the models in the process, so that
+        bundles (and the data they load, e.g. symbol repositories) are loaded
+        only once. Worker processes forked from a process with an already
+        constructed model inherit the loaded bundles (see `BatchSynthesizer`).
+        """
+        path = Path(MC_ASSETS_CACHE).resolve()
+        if path not in AssetRepository._default_instances:
+            AssetRepository._default_instances[path] = AssetRepository(path)
+        return AssetRepository._default_instances[path]
     
     def resolve_bundle(self, bundle_type: Type[T], force_install=False) -> T:
         """Ensures that a bundle is installed and returns its instance"""
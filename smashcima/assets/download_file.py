@@ -1,10 +1,12 @@
-import requests
 import tqdm
 from pathlib import Path
 
 
 def download_file(url: str, path: Path, with_progress_bar=True):
     """Downloads a file with a progress bar and saves it to a path"""
+    # lazy import, requests is slow to import and rarely needed
+    import requests
+
     if with_progress_bar:
         print("Downloading " + str(url))
         print("and saving it to " + str(path))
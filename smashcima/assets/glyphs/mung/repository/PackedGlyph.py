@@ -1,5 +1,6 @@
 import pickle
 
+from smashcima.instrumentation import measure
 from smashcima.scene import Glyph
 
 from ..MungGlyphMetadata import MungGlyphMetadata
@@ -41,4 +42,5 @@ class PackedGlyph:
         )
     
     def unpack(self) -> Glyph:
-        return pickle.loads(self.data)
+        with measure("PackedGlyph.unpack"):
+            return pickle.loads(self.data)
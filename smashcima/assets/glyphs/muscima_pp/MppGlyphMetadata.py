@@ -1,10 +1,12 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from ..mung.MungGlyphMetadata import MungGlyphMetadata
 from smashcima.scene import Glyph
 
-from .MppPage import MppPage
+if TYPE_CHECKING:
+    # (the muscima package is slow to import)
+    from .MppPage import MppPage
 
 
 @dataclass
@@ -38,7 +40,7 @@ class MppGlyphMetadata(MungGlyphMetadata):
         return f"MUSCIMA-pp_1.0___{self.mung_document}___{i}"
 
     @staticmethod
-    def stamp_glyph(glyph: Glyph, mpp_page: MppPage, numeric_objid: int):
+    def stamp_glyph(glyph: Glyph, mpp_page: "MppPage", numeric_objid: int):
         w = str(mpp_page.mpp_writer).zfill(2)
         n = str(mpp_page.mpp_piece).zfill(2)
 
@@ -3,31 +3,8 @@ from smashcima.scene import Glyph, LineGlyph
 from ...AssetBundle import AssetBundle
 from ...datasets.MuscimaPP import MuscimaPP
 from smashcima.exporting.DebugGlyphRenderer import DebugGlyphRenderer
-from .MppPage import MppPage
 from smashcima.scene.SmuflLabels import SmuflLabels
 from smashcima.scene.SmashcimaLabels import SmashcimaLabels
-from .get_symbols import \
-    get_full_noteheads, \
-    get_empty_noteheads, \
-    get_normal_barlines, \
-    get_whole_rests, \
-    get_half_rests, \
-    get_quarter_rests, \
-    get_eighth_rests, \
-    get_sixteenth_rests, \
-    get_g_clefs, \
-    get_f_clefs, \
-    get_c_clefs, \
-    get_stems, \
-    get_beams, \
-    get_beam_hooks, \
-    get_leger_lines, \
-    get_flags, \
-    get_duration_dots, \
-    get_staccato_dots, \
-    get_accidentals, \
-    get_brackets_and_braces, \
-    get_time_marks
 from .MppGlyphMetadata import MppGlyphMetadata
 from pathlib import Path
 import pickle
@@ -53,6 +30,32 @@ class MuscimaPPGlyphs(AssetBundle):
     def install(self) -> None:
         """Extracts data from the MUSCIMA++ dataset and bundles it up
         in the symbol repository in a pickle file."""
+        # lazy import, the muscima package (and scipy) is slow to import
+        # and only needed for the installation
+        from .MppPage import MppPage
+        from .get_symbols import \
+            get_full_noteheads, \
+            get_empty_noteheads, \
+            get_normal_barlines, \
+            get_whole_rests, \
+            get_half_rests, \
+            get_quarter_rests, \
+            get_eighth_rests, \
+            get_sixteenth_rests, \
+            get_g_clefs, \
+            get_f_clefs, \
+            get_c_clefs, \
+            get_stems, \
+            get_beams, \
+            get_beam_hooks, \
+            get_leger_lines, \
+            get_flags, \
+            get_duration_dots, \
+            get_staccato_dots, \
+            get_accidentals, \
+            get_brackets_and_braces, \
+            get_time_marks
+
         document_paths = list(
             self.muscima_pp.cropobjects_directory.glob("CVC-MUSCIMA_*-ideal.xml")
         )
@@ -4,6 +4,7 @@ import numpy as np
 
 from smashcima.exporting.compositing.DefaultCompositor import DefaultCompositor
 from smashcima.exporting.postprocessing.NullPostprocessor import NullPostprocessor
+from smashcima.instrumentation import measure
 from smashcima.scene.ViewBox import ViewBox
 
 from .image.Canvas import Canvas
@@ -21,16 +22,15 @@ class BitmapRenderer:
 
     def render(self, final_layer: ImageLayer) -> np.ndarray:
         """Exports the final layer from a compositor into a bitmap image"""
+        with measure("BitmapRenderer.render"):
+            return self._render(final_layer)
 
+    def _render(self, final_layer: ImageLayer) -> np.ndarray:
         # merge the background color with the final layer from the compositor
-        canvas = Canvas(
-            width=final_layer.width,
-            height=final_layer.height,
+        return Canvas.merge_layers(
+            [final_layer.bitmap],
             background_color=self.background_color
         )
-        canvas.place_layer(final_layer.bitmap)
-
-        return canvas.read()
 
     @staticmethod
     def default_viewbox_render(view_box: ViewBox, dpi: float) -> np.ndarray:
@@ -0,0 +1,215 @@
+import io
+import json
+import os
+import tarfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+class ShardWriter:
+    """Streams dataset samples into size-bounded tar shards.
+
+    The shards follow the WebDataset convention: each sample is a group
+    of files in the tar archive sharing the same key (the file name
+    before the first period), e.g. `000000042.png` and `000000042.json`.
+
+    Shards are written into a temporary file first and renamed only
+    once complete. Completed shards are recorded in a manifest file,
+    so that an interrupted run can be resumed from the last complete
+    shard. Samples must be written in order, a resumed run continues
+    with the sample `next_sample_index`.
+
+    Usage:
+    ```
+    with ShardWriter("dataset/") as writer:
+        for i in range(writer.next_sample_index, 1000):
+            writer.write({f"{i:09d}": {"png": png_bytes, "json": json_bytes}})
+    ```
+    """
+
+    MANIFEST_FILE_NAME = "manifest.json"
+    """Name of the manifest file in the output directory"""
+
+    def __init__(
+        self,
+        output_directory: Union[Path, str],
+        max_shard_size: int = 1024 * 1024 * 1024,
+        shard_name_pattern: str = "shard-{:06d}.tar",
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        :param output_directory: Directory where shards and the manifest
+            are written, it's created if it does not exist.
+        :param max_shard_size: Size in bytes after which a shard is closed
+            and a new one is started (a shard may exceed it by one sample).
+        :param shard_name_pattern: Format string for shard file names,
+            receives the shard index.
+        :param metadata: Arbitrary JSON data describing the run (e.g. the
+            generation arguments), stored in the manifest. When resuming,
+            it must match the metadata of the existing manifest.
+        """
+        self.output_directory = Path(output_directory)
+        """Directory where shards and the manifest are written"""
+
+        self.max_shard_size = max_shard_size
+        """Size in bytes after which a shard is closed"""
+
+        self.shard_name_pattern = shard_name_pattern
+        """Format string for shard file names"""
+
+        self.metadata: Dict[str, Any] = metadata or {}
+        """JSON data describing the run, stored in the manifest"""
+
+        self.shards: List[Dict[str, Any]] = []
+        """Manifest records of completed shards"""
+
+        self._tar: Optional[tarfile.TarFile] = None
+        self._tar_file: Optional[io.BufferedWriter] = None
+        self._shard_first_sample = 0
+        self._shard_sample_count = 0
+
+        self.output_directory.mkdir(parents=True, exist_ok=True)
+        self._load_manifest()
+        self._remove_incomplete_shards()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.output_directory / ShardWriter.MANIFEST_FILE_NAME
+
+    @property
+    def next_sample_index(self) -> int:
+        """Index of the next sample to be written"""
+        return self._shard_first_sample + self._shard_sample_count
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # keep the incomplete shard out of the manifest,
+            # it will be re-generated when the run is resumed
+            self.abort()
+
+    def write(self, records: Dict[str, Dict[str, bytes]]):
+        """Writes one sample into the current shard.
+
+        A sample usually consists of a single record, but it may contain
+        more (e.g. one record per synthesized page). Records of one sample
+        always end up in the same shard.
+
+        :param records: Maps record keys (must not contain periods)
+            to records. A record maps file extensions (e.g. 'png', 'json')
+            to file contents.
+        """
+        if self._tar is None:
+            self._open_shard()
+        assert self._tar is not None
+        assert self._tar_file is not None
+
+        mtime = time.time()
+        for key, files in records.items():
+            assert "." not in key, "Record key must not contain periods"
+            for extension, data in files.items():
+                info = tarfile.TarInfo(name=f"{key}.{extension}")
+                info.size = len(data)
+                info.mtime = mtime
+                self._tar.addfile(info, io.BytesIO(data))
+        self._shard_sample_count += 1
+
+        if self._tar_file.tell() >= self.max_shard_size:
+            self._close_shard()
+
+    def close(self):
+        """Completes the current shard and records it in the manifest"""
+        if self._tar is not None:
+            self._close_shard()
+
+    def abort(self):
+        """Discards the current incomplete shard"""
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+        if self._tar_file is not None:
+            self._tar_file.close()
+            self._tar_file = None
+        self._remove_incomplete_shards()
+        self._shard_sample_count = 0
+
+    def _shard_path(self, shard_index: int) -> Path:
+        return self.output_directory / \
+            self.shard_name_pattern.format(shard_index)
+
+    def _open_shard(self):
+        path = self._shard_path(len(self.shards))
+        self._tar_file = open(str(path) + ".tmp", "wb")
+        self._tar = tarfile.open(fileobj=self._tar_file, mode="w")
+
+    def _close_shard(self):
+        assert self._tar is not None
+        assert self._tar_file is not None
+
+        # finish the tar file and make sure it's on the disk
+        self._tar.close()
+        self._tar_file.flush()
+        os.fsync(self._tar_file.fileno())
+        size = self._tar_file.tell()
+        self._tar_file.close()
+        self._tar = None
+        self._tar_file = None
+
+        # publish the shard
+        path = self._shard_path(len(self.shards))
+        os.replace(str(path) + ".tmp", path)
+
+        # record it in the manifest
+        self.shards.append({
+            "name": path.name,
+            "first_sample": self._shard_first_sample,
+            "sample_count": self._shard_sample_count,
+            "size": size
+        })
+        self._shard_first_sample += self._shard_sample_count
+        self._shard_sample_count = 0
+        self._write_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path.exists():
+            return
+
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        if manifest["metadata"] != self.metadata:
+            raise Exception(
+                f"The output directory {self.output_directory} contains " +
+                "a manifest with different metadata, resuming would mix " +
+                "two different datasets."
+            )
+
+        self.shards = manifest["shards"]
+        self._shard_first_sample = sum(
+            s["sample_count"] for s in self.shards
+        )
+
+    def _write_manifest(self):
+        tmp_path = str(self.manifest_path) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "metadata": self.metadata,
+                "sample_count": self._shard_first_sample,
+                "shards": self.shards
+            }, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _remove_incomplete_shards(self):
+        """Removes the unfinished shard left behind by an interrupted run
+        (a shard file that was published but did not make it into the
+        manifest is simply overwritten when the shard is re-generated)"""
+        tmp_path = Path(str(self._shard_path(len(self.shards))) + ".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
@@ -178,10 +178,7 @@ class RegionVisitor(AffineSpaceVisitor):
 
 def svg_matrix_from_transform(t: Transform) -> str:
     """Formats a smashcima transform into the SVG transform attribute value"""
-    a, b = t.matrix[:, 0]
-    c, d = t.matrix[:, 1]
-    e, f = t.matrix[:, 2]
-    return f"matrix({a} {b} {c} {d} {e} {f})"
+    return f"matrix({t.a} {t.b} {t.c} {t.d} {t.e} {t.f})"
 
 
 def sprite_to_image_element(sprite: Sprite) -> ET.Element:
@@ -1,18 +1,41 @@
-# -----------------------------------------------------------------------------
-# import local types
-from .BitmapRenderer import BitmapRenderer
-from .DebugGlyphRenderer import DebugGlyphRenderer
-from .MungExporter import MungExporter
-from .SvgExporter import SvgExporter
+from typing import TYPE_CHECKING
 
-# -----------------------------------------------------------------------------
-# import nested types
-from .compositing import *
-from .image import *
-from .postprocessing import *
+from smashcima._lazy_exports import lazy_exports
 
-# -----------------------------------------------------------------------------
-# import sub-modules to make them accessible from this module
-from smashcima.exporting import compositing
-from smashcima.exporting import image
-from smashcima.exporting import postprocessing
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    # -------------------------------------------------------------------------
+    # import local types
+    from .BitmapRenderer import BitmapRenderer
+    from .DebugGlyphRenderer import DebugGlyphRenderer
+    from .MungExporter import MungExporter
+    from .ShardWriter import ShardWriter
+    from .SvgExporter import SvgExporter
+
+    # -------------------------------------------------------------------------
+    # import nested types
+    from .compositing import *
+    from .image import *
+    from .postprocessing import *
+
+    # -------------------------------------------------------------------------
+    # import sub-modules to make them accessible from this module
+    from smashcima.exporting import compositing
+    from smashcima.exporting import image
+    from smashcima.exporting import postprocessing
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "BitmapRenderer": ".BitmapRenderer",
+    "DebugGlyphRenderer": ".DebugGlyphRenderer",
+    "MungExporter": ".MungExporter",
+    "ShardWriter": ".ShardWriter",
+    "SvgExporter": ".SvgExporter"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(
+    __name__, _EXPORTS,
+    nested=[".compositing", ".image", ".postprocessing"],
+    submodules=["compositing", "image", "postprocessing"]
+)
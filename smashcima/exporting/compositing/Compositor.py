@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List, Sequence
 
 from smashcima.scene.ViewBox import ViewBox
 
@@ -15,3 +16,16 @@ class Compositor(ABC):
         """Composits the entire scene into an image layer from the perspective
         of the provided view box at the requested DPI"""
         raise NotImplementedError
+
+    def run_variants(
+        self,
+        view_box: ViewBox,
+        dpi: float,
+        seeds: Sequence[int]
+    ) -> List[ImageLayer]:
+        """Composits the scene once for each seed, so that the variants
+        differ only in the randomized postprocessing. Compositors that can
+        reuse the work shared by the variants should override this method,
+        by default the compositor is simply run repeatedly (and the seeds are
+        not used)."""
+        return [self.run(view_box, dpi) for _ in seeds]
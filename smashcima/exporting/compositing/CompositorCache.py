@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from ..image.ImageLayer import ImageLayer
+
+
+class CompositorCache:
+    """Caches image layers produced by a compositor, so that they can be
+    used by multiple exporters without compositing them again.
+
+    Layers are stored under an owner (e.g. a scene) and a key within the
+    owner (e.g. the page and the DPI), so that one cache can be shared by
+    many scenes and the layers of one owner can be invalidated together.
+    Least recently used layers are dropped when the cache exceeds its memory
+    limit. The cache can be shared between threads.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        """
+        :param max_bytes: Memory limit for the bitmaps of the cached layers.
+            Layers larger than the limit are never cached.
+        """
+        self.max_bytes = max_bytes
+        """Memory limit for the bitmaps of the cached layers"""
+
+        self.nbytes = 0
+        """Memory taken by the bitmaps of the cached layers"""
+
+        self.hits = 0
+        """Number of requests served from the cache"""
+
+        self.misses = 0
+        """Number of requests for layers that were not cached"""
+
+        self._layers: OrderedDict[tuple, ImageLayer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # (pickled empty, e.g. together with a scene)
+        return (self.max_bytes,)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def get(self, owner: Hashable, key: Hashable) -> Optional[ImageLayer]:
+        """Returns the cached layer, or None if it is not cached"""
+        with self._lock:
+            layer = self._layers.get((owner, key))
+            if layer is None:
+                self.misses += 1
+                return None
+            self._layers.move_to_end((owner, key))
+            self.hits += 1
+            return layer
+
+    def put(self, owner: Hashable, key: Hashable, layer: ImageLayer):
+        """Caches the layer, possibly evicting least recently used layers"""
+        nbytes = layer.bitmap.nbytes
+        with self._lock:
+            self._pop((owner, key))
+            if nbytes > self.max_bytes:
+                return
+            self._layers[(owner, key)] = layer
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._layers.popitem(last=False)
+                self.nbytes -= evicted.bitmap.nbytes
+
+    def invalidate(self, owner: Hashable, key: Optional[Hashable] = None):
+        """Drops the cached layers of the owner, or only the one layer
+        under the given key"""
+        with self._lock:
+            if key is not None:
+                self._pop((owner, key))
+                return
+            for owner_and_key in [k for k in self._layers if k[0] == owner]:
+                self._pop(owner_and_key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        """Drops the cached layers of all the owners matching the predicate
+        (e.g. of all the pages of a scene)"""
+        with self._lock:
+            for owner_and_key in [
+                k for k in self._layers if predicate(k[0])
+            ]:
+                self._pop(owner_and_key)
+
+    def clear(self):
+        """Drops all the cached layers"""
+        with self._lock:
+            self._layers.clear()
+            self.nbytes = 0
+
+    def _pop(self, owner_and_key: tuple):
+        layer = self._layers.pop(owner_and_key, None)
+        if layer is not None:
+            self.nbytes -= layer.bitmap.nbytes
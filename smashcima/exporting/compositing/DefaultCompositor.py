@@ -1,12 +1,17 @@
+from concurrent.futures import Executor
 from math import ceil
-from typing import Optional
+from typing import List, Optional, Sequence
+
+import numpy as np
 
 from smashcima.geometry.Transform import Transform
 from smashcima.geometry.units import mm_to_px
+from smashcima.instrumentation import measure, submit_in_context
 from smashcima.scene.AffineSpace import AffineSpace
 from smashcima.scene.AffineSpaceVisitor import AffineSpaceVisitor
 from smashcima.scene.ComposedGlyph import ComposedGlyph
 from smashcima.scene.Glyph import Glyph
+from smashcima.scene.GlyphStore import GlyphStore
 from smashcima.scene.LabeledRegion import LabeledRegion
 from smashcima.scene.SceneObject import SceneObject
 from smashcima.scene.SmashcimaLabels import SmashcimaLabels
@@ -18,6 +23,7 @@ from .Compositor import Compositor
 from ..image.ImageLayer import ImageLayer
 from ..image.ImageLayerBuilder import ImageLayerBuilder
 from ..image.LayerSet import LayerSet
+from ..image.SpriteRasterCache import SpriteRasterCache
 from ..postprocessing.Postprocessor import Postprocessor
 
 
@@ -30,15 +36,89 @@ class DefaultCompositor(Compositor):
     This compositing setup is the default setup for Smashcima. If you want
     something different, you need to implement your own compositor."""
 
-    def __init__(self, postprocessor: Postprocessor):
+    def __init__(
+        self,
+        postprocessor: Postprocessor,
+        surface_dtype: np.dtype = np.dtype(np.float32),
+        raster_cache: Optional[SpriteRasterCache] = None,
+        executor: Optional[Executor] = None
+    ):
         self.postprocessor = postprocessor
 
-    def run(self, view_box: ViewBox, dpi: float) -> ImageLayer:
-        extracted_layers = self.extract_layers(view_box, dpi)
-        
-        processed_layers = self.postprocessor.process_extracted_layers(
-            extracted_layers
+        self.surface_dtype = np.dtype(surface_dtype)
+        """Data type of the surfaces that layers are painted over, float32
+        by default, float16 or uint8 save memory at high DPIs
+        (see `Canvas`)"""
+
+        self.raster_cache = (
+            raster_cache if raster_cache is not None else SpriteRasterCache()
         )
+        """Cache of warped sprite bitmaps, kept between the composited pages
+        (pass a cache with zero `max_bytes` to warp every sprite exactly)"""
+
+        self.executor = executor
+        """Thread pool on which the paper, stafflines and ink layers are
+        painted and postprocessed concurrently. Layers are processed one after
+        the other if None. The result is the same, but the surfaces of all
+        three layers are held in memory at once. Painting is fully parallel,
+        but postprocessing filters that use the global random generators
+        (augraphy) run one at a time."""
+
+    def __getstate__(self):
+        # the thread pool cannot be pickled (e.g. into worker processes)
+        state = self.__dict__.copy()
+        state["executor"] = None
+        return state
+
+    def run(self, view_box: ViewBox, dpi: float) -> ImageLayer:
+        with measure("DefaultCompositor.extract_layers"):
+            extracted_layers = self.extract_layers(view_box, dpi)
+        return self.process_layers(extracted_layers)
+
+    def run_glyph_store(self, store: GlyphStore, dpi: float) -> ImageLayer:
+        """Composits the contents of a glyph store into an image layer,
+        viewing the store view rectangle at the requested DPI"""
+        with measure("DefaultCompositor.extract_glyph_store_layers"):
+            extracted_layers = self.extract_glyph_store_layers(store, dpi)
+        return self.process_layers(extracted_layers)
+
+    def run_variants(
+        self,
+        view_box: ViewBox,
+        dpi: float,
+        seeds: Sequence[int]
+    ) -> List[ImageLayer]:
+        # the layers are extracted once and postprocessed for each seed
+        with measure("DefaultCompositor.extract_layers"):
+            extracted_layers = self.extract_layers(view_box, dpi)
+        return [
+            self.process_layers(
+                extracted_layers, self.postprocessor.reseeded(seed)
+            )
+            for seed in seeds
+        ]
+
+    def process_layers(
+        self,
+        extracted_layers: LayerSet,
+        postprocessor: Optional[Postprocessor] = None
+    ) -> ImageLayer:
+        """Postprocesses and merges the extracted layers. The extracted
+        layers are left intact, so they can be processed repeatedly.
+
+        :param extracted_layers: The layers extracted from the scene.
+        :param postprocessor: Overrides the postprocessor of the compositor.
+        """
+        postprocessor = postprocessor or self.postprocessor
+        if self.executor is None:
+            processed_layers = postprocessor.process_extracted_layers(
+                extracted_layers
+            )
+        else:
+            processed_layers = postprocessor \
+                .process_extracted_layers_concurrently(
+                    extracted_layers, self.executor
+                )
         
         final_layer = ImageLayerBuilder.merge_layers([
             processed_layers["paper"],
@@ -46,7 +126,7 @@ class DefaultCompositor(Compositor):
             processed_layers["ink"]
         ])
     
-        processed_final_layer = self.postprocessor.process_final_layer(
+        processed_final_layer = postprocessor.process_final_layer(
             final_layer
         )
 
@@ -56,7 +136,10 @@ class DefaultCompositor(Compositor):
         accumulator = VisitorAccumulator(
             width=ceil(mm_to_px(view_box.rectangle.width, dpi=dpi)),
             height=ceil(mm_to_px(view_box.rectangle.height, dpi=dpi)),
-            dpi=dpi
+            dpi=dpi,
+            surface_dtype=self.surface_dtype,
+            raster_cache=self.raster_cache,
+            deferred=self.executor is not None
         )
 
         # TODO: this code assumes the view box is in the root affine space
@@ -81,23 +164,105 @@ class DefaultCompositor(Compositor):
         )
         visitor.run()
 
-        return accumulator.build_layer_set()
+        return accumulator.build_layer_set(self.executor)
+
+    def extract_glyph_store_layers(
+        self,
+        store: GlyphStore,
+        dpi: float
+    ) -> LayerSet:
+        """Extracts the same layers as `extract_layers`, but from the arrays
+        of a glyph store instead of the scene objects"""
+        view = store.view_rectangle
+        accumulator = VisitorAccumulator(
+            width=ceil(mm_to_px(view.width, dpi=dpi)),
+            height=ceil(mm_to_px(view.height, dpi=dpi)),
+            dpi=dpi,
+            surface_dtype=self.surface_dtype,
+            raster_cache=self.raster_cache,
+            deferred=self.executor is not None
+        )
+        store_to_canvas_transform = (
+            Transform.translate(-view.top_left_corner.vector)
+                .then(Transform.scale(mm_to_px(1, dpi=dpi)))
+        )
+
+        # layer of each glyph, -1 (no glyph) is the paper
+        staffline = SmashcimaLabels.staffLine.value
+        glyph_layers = [
+            accumulator.stafflines
+            if store.labels[label] == staffline else accumulator.ink
+            for label in store.glyph_labels.tolist()
+        ] + [accumulator.paper]
+
+        for bitmap, glyph, values in zip(
+            store.sprite_bitmaps.tolist(),
+            store.sprite_glyphs.tolist(),
+            store.sprite_transforms.tolist()
+        ):
+            glyph_layers[glyph].add_bitmap(
+                bitmap=store.bitmaps[bitmap],
+                pixels_to_canvas_transform=Transform.from_values(*values)
+                    .then(store_to_canvas_transform)
+            )
+
+        for i, glyph in enumerate(store.region_glyphs.tolist()):
+            glyph_layers[glyph].add_contours(
+                contours=store_to_canvas_transform.apply_to(
+                    store.region_contours(i)
+                ),
+                label=store.labels[store.region_labels[i]]
+            )
+
+        return accumulator.build_layer_set(self.executor)
 
 
 class VisitorAccumulator:
     """Accumulates data extracted by the visitor"""
-    def __init__(self, width: int, height: int, dpi: float):
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        dpi: float,
+        surface_dtype: np.dtype = np.dtype(np.float32),
+        raster_cache: Optional[SpriteRasterCache] = None,
+        deferred: bool = False
+    ):
         # the three extracted layers
-        self.paper = ImageLayerBuilder(width=width, height=height, dpi=dpi)
-        self.stafflines = ImageLayerBuilder(width=width, height=height, dpi=dpi)
-        self.ink = ImageLayerBuilder(width=width, height=height, dpi=dpi)
+        self.paper, self.stafflines, self.ink = [
+            ImageLayerBuilder(
+                width=width, height=height, dpi=dpi,
+                surface_dtype=surface_dtype,
+                raster_cache=raster_cache,
+                deferred=deferred
+            )
+            for _ in range(3)
+        ]
     
-    def build_layer_set(self) -> LayerSet:
-        return LayerSet({
-            "paper": self.paper.build_layer(),
-            "stafflines": self.stafflines.build_layer(),
-            "ink": self.ink.build_layer()
-        })
+    def build_layer_set(self, executor: Optional[Executor] = None) -> LayerSet:
+        """Paints and builds the layers, concurrently if given an executor
+        (the layers should be deferred then, to be painted by the executor)"""
+        builders = [
+            ("paper", self.paper),
+            ("stafflines", self.stafflines),
+            ("ink", self.ink)
+        ]
+        if executor is None:
+            layers = {}
+            for name, builder in builders:
+                layers[name] = builder.build_layer()
+                builder.canvas.clear() # release the surface before the next
+            return LayerSet(layers)
+
+        futures = [
+            (name, builder, submit_in_context(executor, builder.build_layer))
+            for name, builder in builders
+        ]
+        layers = {}
+        for name, builder, future in futures:
+            layers[name] = future.result()
+            builder.canvas.clear()
+        return LayerSet(layers)
 
 
 class SceneVisitor(AffineSpaceVisitor):
@@ -1,2 +1,19 @@
-from .Compositor import Compositor
-from .DefaultCompositor import DefaultCompositor
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .Compositor import Compositor
+    from .CompositorCache import CompositorCache
+    from .DefaultCompositor import DefaultCompositor
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "Compositor": ".Compositor",
+    "CompositorCache": ".CompositorCache",
+    "DefaultCompositor": ".DefaultCompositor"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
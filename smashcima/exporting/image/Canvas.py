@@ -1,5 +1,5 @@
 from math import ceil
-from typing import Union
+from typing import Dict, Iterator, List, Tuple, Union
 
 import numpy as np
 import cv2
@@ -20,28 +20,6 @@ def _premultiplied_float32_alpha_overlay(
     surface += layer
 
 
-def _premultiplied_float32_alpha_overlay_in_window(
-    surface: np.ndarray,
-    window: Rectangle,
-    layer: np.ndarray
-):
-    """Implements the 'alpha overlay' blending method for the surface and
-    a top layer that is being blended over. The top layer is smaller and
-    constrained to a window within the underlying surface. The surface array
-    will be modified in-place. Both are expected to be in the float32 alpha
-    premultiplied color format."""
-    assert int(window.height) == layer.shape[0]
-    assert int(window.width) == layer.shape[1]
-    top = int(window.top)
-    bottom = int(window.bottom)
-    left = int(window.left)
-    right = int(window.right)
-    _premultiplied_float32_alpha_overlay(
-        surface[top:bottom, left:right],
-        layer
-    )
-
-
 def _uint8_to_float32(img: np.ndarray) -> np.ndarray:
     """Converts image from uint8 (0-255) format to float32 (0.0-1.0) format"""
     img = img.astype(np.float32)
@@ -56,13 +34,93 @@ def _float32_to_uint8(img: np.ndarray) -> np.ndarray:
     return img
 
 
+SURFACE_DTYPES = (np.dtype(np.float32), np.dtype(np.float16),
+                  np.dtype(np.uint8))
+"""Data types in which canvas surfaces can be stored"""
+
+
+def _surface_to_float32(surface: np.ndarray) -> np.ndarray:
+    """Converts a part of a premultiplied surface to float32 for blending
+    (float32 surfaces are returned as they are, not copied)"""
+    if surface.dtype == np.float32:
+        return surface
+    if surface.dtype == np.uint8:
+        return _uint8_to_float32(surface)
+    return surface.astype(np.float32)
+
+
+def _float32_to_surface(img: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Converts blended float32 values to the surface data type"""
+    if dtype == np.uint8:
+        img *= 255
+        np.rint(img, out=img)
+        return img.astype(np.uint8)
+    return img.astype(dtype, copy=False)
+
+
+def _surface_to_bgra(surface: np.ndarray) -> np.ndarray:
+    """Converts a part of a premultiplied surface to uint8 BGRA (without
+    modifying the surface). Float32 surfaces are truncated, float16 surfaces
+    are rounded, since truncating them would turn e.g. 254.99 into 254."""
+    if surface.dtype == np.float32:
+        img = _float32_to_uint8(surface.copy())
+    elif surface.dtype == np.float16:
+        img = surface.astype(np.float32)
+        img *= 255
+        np.rint(img, out=img)
+        img = img.astype(np.uint8)
+    else:
+        img = surface
+    return cv2.cvtColor(img, cv2.COLOR_mRGBA2RGBA)
+
+
+TILE_SIZE = 256
+"""Size of the square tiles of canvas surfaces, in pixels"""
+
+
+def _tiles_in_window(
+    left: int,
+    top: int,
+    right: int,
+    bottom: int,
+    tile_size: int
+) -> Iterator[Tuple[Tuple[int, int], slice, slice, slice, slice]]:
+    """Yields tiles overlapping the window (in canvas pixels) as:
+    (tile key, tile rows, tile columns, window rows, window columns)"""
+    for tile_row in range(top // tile_size, -(-bottom // tile_size)):
+        tile_top = tile_row * tile_size
+        y0 = max(top, tile_top)
+        y1 = min(bottom, tile_top + tile_size)
+        for tile_col in range(left // tile_size, -(-right // tile_size)):
+            tile_left = tile_col * tile_size
+            x0 = max(left, tile_left)
+            x1 = min(right, tile_left + tile_size)
+            yield (
+                (tile_row, tile_col),
+                slice(y0 - tile_top, y1 - tile_top),
+                slice(x0 - tile_left, x1 - tile_left),
+                slice(y0 - top, y1 - top),
+                slice(x0 - left, x1 - left)
+            )
+
+
 class Canvas:
-    """A tool for composing transparent uint8 BGRA imges over each other"""
+    """A tool for composing transparent uint8 BGRA imges over each other.
+
+    The surface is split into square tiles that are allocated only once
+    something is painted over them, untouched tiles are just the background
+    color. Bitmaps are converted to float and blended one tile at a time,
+    so temporary buffers have the size of a tile, not of the whole bitmap.
+    Tiles are stored in float32 by default. Float16 halves their memory
+    at the cost of a slight imprecision (below one uint8 step), uint8 quarters
+    it, but the surface is rounded to uint8 after each blending.
+    """
     def __init__(
         self,
         width: Union[int, float],
         height: Union[int, float],
-        background_color = (0, 0, 0, 0)
+        background_color = (0, 0, 0, 0),
+        dtype: np.dtype = np.dtype(np.float32)
     ):
         self.bbox = Rectangle(
             x=0,
@@ -72,19 +130,23 @@ class Canvas:
         )
         """Bounding box of the canvas in the pixel coordinate space"""
 
-        self.surface = np.zeros(
-            shape=(self.height, self.width, 4),
-            dtype=np.float32
-        )
-        """The pixel buffer that we paint over in alpha premultiplied float32
-        format (BGRA channels)"""
+        self.dtype = np.dtype(dtype)
+        """Data type of the surface tiles (see `SURFACE_DTYPES`)"""
+        assert self.dtype in SURFACE_DTYPES, \
+            f"The surface cannot be stored in {self.dtype}"
+
+        self.tiles: Dict[Tuple[int, int], np.ndarray] = {}
+        """Painted-over tiles of the surface (keyed by tile row and column)
+        in alpha premultiplied format (BGRA channels)"""
 
-        # fill the surface with background color
-        background_color_premultiplied = _uint8_to_float32(cv2.cvtColor(
+        # background color in the surface format
+        background = cv2.cvtColor(
             np.array([[background_color]], dtype=np.uint8),
             cv2.COLOR_RGBA2mRGBA
-        ))
-        self.surface[:, :] = background_color_premultiplied
+        )
+        if self.dtype != np.uint8:
+            background = _uint8_to_float32(background).astype(self.dtype)
+        self._background: np.ndarray = background[0, 0]
     
     @property
     def width(self) -> int:
@@ -93,6 +155,37 @@ class Canvas:
     @property
     def height(self) -> int:
         return int(self.bbox.height)
+
+    @property
+    def surface(self) -> np.ndarray:
+        """The whole surface in alpha premultiplied format (BGRA),
+        assembled from the tiles into a new array"""
+        surface = np.empty((self.height, self.width, 4), dtype=self.dtype)
+        surface[:, :] = self._background
+        for (row, col), tile in self.tiles.items():
+            top = row * TILE_SIZE
+            left = col * TILE_SIZE
+            surface[
+                top:top + tile.shape[0], left:left + tile.shape[1]
+            ] = tile
+        return surface
+
+    def _get_tile(self, key: Tuple[int, int]) -> np.ndarray:
+        tile = self.tiles.get(key)
+        if tile is None:
+            top = key[0] * TILE_SIZE
+            left = key[1] * TILE_SIZE
+            tile = np.empty(
+                shape=(
+                    min(TILE_SIZE, self.height - top),
+                    min(TILE_SIZE, self.width - left),
+                    4
+                ),
+                dtype=self.dtype
+            )
+            tile[:, :] = self._background
+            self.tiles[key] = tile
+        return tile
     
     def place_bitmap(self, bitmap: np.ndarray, window: Rectangle):
         """Overlays a bitmap over the canvas and merges it
@@ -105,15 +198,56 @@ class Canvas:
         assert intersected_window.width == window.width \
             and intersected_window.height == window.height, \
             "Window must be fully inside the canvas bbox"
-        
-        # prepare the bitmap into mBGRA float
-        bitmap = cv2.cvtColor(bitmap, cv2.COLOR_RGBA2mRGBA)
-        bitmap = _uint8_to_float32(bitmap)
-        
-        # composit the layer over the surface in the window
-        _premultiplied_float32_alpha_overlay_in_window(
-            self.surface, window, bitmap
-        )
+        assert int(window.height) == bitmap.shape[0]
+        assert int(window.width) == bitmap.shape[1]
+
+        self._place(bitmap, window, premultiplied=False)
+
+    def place_premultiplied(self, layer: np.ndarray, window: Rectangle):
+        """Overlays a bitmap that is already in the premultiplied float32
+        format (e.g. a cached sprite raster) over the canvas and merges it
+
+        :param layer: An mBGRA float32 bitmap of the same size as the window.
+        :param window: The positioning of the bitmap over the canvas.
+            It must be fully inside the canvas bbox.
+        """
+        intersected_window = window.intersect_with(self.bbox)
+        assert intersected_window.width == window.width \
+            and intersected_window.height == window.height, \
+            "Window must be fully inside the canvas bbox"
+        assert int(window.height) == layer.shape[0]
+        assert int(window.width) == layer.shape[1]
+        assert layer.dtype == np.float32
+
+        self._place(layer, window, premultiplied=True)
+
+    def _place(self, bitmap: np.ndarray, window: Rectangle, premultiplied):
+        for key, tile_rows, tile_cols, rows, cols in _tiles_in_window(
+            int(window.left), int(window.top),
+            int(window.right), int(window.bottom),
+            TILE_SIZE
+        ):
+            # fully transparent parts would not change the surface
+            part = bitmap[rows, cols]
+            if not part[:, :, 3].any():
+                continue
+
+            # prepare the bitmap part into mBGRA float
+            if premultiplied:
+                layer = part
+            else:
+                layer = _uint8_to_float32(cv2.cvtColor(
+                    np.ascontiguousarray(part),
+                    cv2.COLOR_RGBA2mRGBA
+                ))
+
+            # composit the part over the surface tile
+            tile = self._get_tile(key)
+            surface = _surface_to_float32(tile[tile_rows, tile_cols])
+            _premultiplied_float32_alpha_overlay(surface, layer)
+            if self.dtype != np.float32: # (float32 is blended in-place)
+                tile[tile_rows, tile_cols] = \
+                    _float32_to_surface(surface, self.dtype)
     
     def place_layer(self, layer: np.ndarray):
         """Overlays a layer (bitmap of the same size as the canvas)
@@ -127,7 +261,46 @@ class Canvas:
     
     def read(self) -> np.ndarray:
         """Returns the current canvas state as uint8 BGRA bitmap"""
-        return cv2.cvtColor(
-            _float32_to_uint8(self.surface),
-            cv2.COLOR_mRGBA2RGBA
-        )
+        bitmap = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        bitmap[:, :] = _surface_to_bgra(self._background.reshape(1, 1, 4))
+        for (row, col), tile in self.tiles.items():
+            top = row * TILE_SIZE
+            left = col * TILE_SIZE
+            bitmap[
+                top:top + tile.shape[0], left:left + tile.shape[1]
+            ] = _surface_to_bgra(tile)
+        return bitmap
+
+    def clear(self):
+        """Releases all the tiles, the canvas becomes the background color"""
+        self.tiles = {}
+
+    @staticmethod
+    def merge_layers(
+        layers: List[np.ndarray],
+        background_color = (0, 0, 0, 0)
+    ) -> np.ndarray:
+        """Overlays uint8 BGRA layers of the same size over each other
+        (over the background color) and returns the merged uint8 bitmap.
+
+        The same as placing the layers into a canvas and reading it,
+        but only one tile is kept in float at a time.
+        """
+        assert len(layers) > 0, "There must be at least one layer"
+        height, width = layers[0].shape[:2]
+        assert all(l.shape[:2] == (height, width) for l in layers), \
+            "All layers must have the same size"
+
+        bitmap = np.empty((height, width, 4), dtype=np.uint8)
+        for _, _, _, rows, cols in _tiles_in_window(
+            0, 0, width, height, TILE_SIZE
+        ):
+            tile = Canvas(
+                width=cols.stop - cols.start,
+                height=rows.stop - rows.start,
+                background_color=background_color
+            )
+            for layer in layers:
+                tile.place_layer(layer[rows, cols])
+            bitmap[rows, cols] = tile.read()
+        return bitmap
@@ -1,8 +1,8 @@
-from typing import List
+from typing import List, Optional, Tuple
 
-import cv2
+import numpy as np
 
-from smashcima.geometry.Quad import Quad
+from smashcima.geometry.Contours import Contours
 from smashcima.geometry.Rectangle import Rectangle
 from smashcima.geometry.Transform import Transform
 from smashcima.scene.AffineSpace import AffineSpace
@@ -11,15 +11,29 @@ from smashcima.scene.Sprite import Sprite
 
 from .Canvas import Canvas
 from .ImageLayer import ImageLayer
+from .SpriteRasterCache import (SpriteRasterCache, get_bitmap_window,
+                                warp_bitmap)
 
 
 class ImageLayerBuilder:
     """Gradually builds an ImageLayer by accepting sprites and regions"""
     
-    def __init__(self, width: int, height: int, dpi: float):
-        self.canvas = Canvas(width, height)
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        dpi: float,
+        surface_dtype: np.dtype = np.dtype(np.float32),
+        raster_cache: Optional[SpriteRasterCache] = None,
+        deferred: bool = False
+    ):
+        self.canvas = Canvas(width, height, dtype=surface_dtype)
         """Builds up the bitmap"""
 
+        self.raster_cache = raster_cache
+        """Cache of warped sprite bitmaps (sprites are warped on each
+        placement if None)"""
+
         self.dpi = dpi
         """DPI of the build up image layer"""
 
@@ -29,8 +43,15 @@ class ImageLayerBuilder:
         self.regions: List[LabeledRegion] = []
         """Builds up regions"""
 
+        self.deferred = deferred
+        """Bitmaps are only recorded when added and painted when the layer
+        is built, so that the painting can be moved to another thread"""
+
+        self._deferred_bitmaps: List[Tuple[np.ndarray, Transform]] = []
+
     def build_layer(self) -> ImageLayer:
         """Builds up a layer instance from the so-far received objects"""
+        self.paint_deferred_bitmaps()
         return ImageLayer(
             bitmap=self.canvas.read(),
             dpi=self.dpi,
@@ -45,26 +66,68 @@ class ImageLayerBuilder:
         :param space_to_canvas_transform: Transforms from the sprite's parent
             affine space to the pixel space of the layer bitmap (the canvas).
         """
-        pixels_to_canvas_transform = (
-            sprite.get_pixels_to_parent_space_transform()
-            .then(space_to_canvas_transform)
+        self.add_bitmap(
+            bitmap=sprite.bitmap,
+            pixels_to_canvas_transform=(
+                sprite.get_pixels_to_parent_space_transform()
+                .then(space_to_canvas_transform)
+            )
         )
 
-        # get the window in the canvas that we're going to paint over
-        canvas_window: Rectangle = (
-            pixels_to_canvas_transform.apply_to(
-                Quad.from_rectangle(
-                    sprite.pixels_bbox.dilate(1.0) # grow by 1 pixel
-                    # dilation is done to accommodate the aliasing blur
+    def add_bitmap(
+        self,
+        bitmap: np.ndarray,
+        pixels_to_canvas_transform: Transform
+    ):
+        """Adds a BGRA bitmap into the layer
+
+        :param bitmap: The bitmap to add (e.g. of a sprite).
+        :param pixels_to_canvas_transform: Transforms from the pixel space
+            of the bitmap to the pixel space of the layer bitmap (the canvas).
+        """
+        if self.deferred:
+            self._deferred_bitmaps.append(
+                (bitmap, pixels_to_canvas_transform)
+            )
+        else:
+            self._paint_bitmap(bitmap, pixels_to_canvas_transform)
+
+    def paint_deferred_bitmaps(self):
+        """Paints the bitmaps recorded in the deferred mode, in the order
+        in which they were added"""
+        for bitmap, pixels_to_canvas_transform in self._deferred_bitmaps:
+            self._paint_bitmap(bitmap, pixels_to_canvas_transform)
+        self._deferred_bitmaps.clear()
+
+    def _paint_bitmap(
+        self,
+        bitmap: np.ndarray,
+        pixels_to_canvas_transform: Transform
+    ):
+        # pre-warped raster from the cache
+        if self.raster_cache is not None:
+            cached = self.raster_cache.get(bitmap, pixels_to_canvas_transform)
+            if cached is not None:
+                window, layer = cached
+                canvas_window = window.intersect_with(self.canvas.bbox)
+                if canvas_window.has_no_area:
+                    return
+                top = int(canvas_window.top - window.top)
+                left = int(canvas_window.left - window.left)
+                self.canvas.place_premultiplied(
+                    layer=layer[
+                        top:top + int(canvas_window.height),
+                        left:left + int(canvas_window.width)
+                    ],
+                    window=canvas_window
                 )
-            ) # get the quad of the dilated sprite quad in canvas coordinates
-            .bbox() # get the bounding box rectangle
-            .snap_grow() # round to integer by growing
+                return
+
+        # get the window in the canvas that we're going to paint over
+        canvas_window = (
+            get_bitmap_window(bitmap, pixels_to_canvas_transform)
             .intersect_with(self.canvas.bbox) # clamp inside of canvas
         )
-        pixels_to_window_transform = pixels_to_canvas_transform.then(
-            Transform.translate(-canvas_window.top_left_corner.vector)
-        )
 
         # viewport culling:
         # do not render sprites that have no overlap with the canvas
@@ -72,21 +135,11 @@ class ImageLayerBuilder:
             return
         
         # transform the sprite bitmap into the canvas pixel space
-        new_layer = cv2.warpAffine(
-            src=sprite.bitmap,
-            M=pixels_to_window_transform.matrix,
-            dsize=(int(canvas_window.width), int(canvas_window.height)),
-            flags=(
-                cv2.INTER_AREA # used for downscaling
-                if pixels_to_window_transform.determinant < 1.0
-                else cv2.INTER_LINEAR # used for upscaling
-            ),
-            borderMode=cv2.BORDER_CONSTANT
-        )
-        
-        # place the transformed bitmap into the canvas
+        # and place the transformed bitmap into the canvas
         self.canvas.place_bitmap(
-            bitmap=new_layer,
+            bitmap=warp_bitmap(
+                bitmap, pixels_to_canvas_transform, canvas_window
+            ),
             window=canvas_window
         )
     
@@ -101,12 +154,20 @@ class ImageLayerBuilder:
         :param space_to_canvas_transform: Transforms from the region's parent
             affine space to the pixel space of the layer bitmap (the canvas).
         """
-        transformed_contours = space_to_canvas_transform.apply_to(
-            region.contours
+        self.add_contours(
+            contours=space_to_canvas_transform.apply_to(region.contours),
+            label=region.label
         )
-        
+
+    def add_contours(self, contours: Contours, label: str):
+        """Adds a labeled region into the layer, given by its contours
+
+        :param contours: Contours of the region in the pixel space
+            of the layer bitmap (the canvas).
+        :param label: Label of the region.
+        """
         canvas_window: Rectangle = (
-            transformed_contours
+            contours
                 .bbox()
                 .intersect_with(self.canvas.bbox)
         )
@@ -118,8 +179,8 @@ class ImageLayerBuilder:
 
         self.regions.append(LabeledRegion(
             space=self.space,
-            contours=transformed_contours,
-            label=region.label
+            contours=contours,
+            label=label
         ))
     
     @staticmethod
@@ -139,12 +200,16 @@ class ImageLayerBuilder:
         
         for layer in layers:
             assert builder.dpi == layer.dpi, "All layers must have the same DPI"
-            builder.canvas.place_layer(layer.bitmap)
-            
             for region in layer.regions:
                 builder.add_region(
                     region=region,
                     space_to_canvas_transform=identity
                 )
-        
-        return builder.build_layer()
+
+        # merged tile by tile, instead of painting layers over the canvas
+        return ImageLayer(
+            bitmap=Canvas.merge_layers([l.bitmap for l in layers]),
+            dpi=dpi,
+            space=builder.space,
+            regions=builder.regions
+        )
@@ -0,0 +1,220 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from smashcima.geometry.Quad import Quad
+from smashcima.geometry.Rectangle import Rectangle
+from smashcima.geometry.Transform import Transform
+
+
+def get_bitmap_window(
+    bitmap: np.ndarray,
+    pixels_to_canvas_transform: Transform
+) -> Rectangle:
+    """Returns the integer window in the canvas that a bitmap placed
+    with the given transform paints over (before clamping to the canvas)"""
+    pixels_bbox = Rectangle(0, 0, bitmap.shape[1], bitmap.shape[0])
+    return (
+        pixels_to_canvas_transform.apply_to(
+            Quad.from_rectangle(
+                pixels_bbox.dilate(1.0) # grow by 1 pixel
+                # dilation is done to accommodate the aliasing blur
+            )
+        ) # get the quad of the dilated sprite quad in canvas coordinates
+        .bbox() # get the bounding box rectangle
+        .snap_grow() # round to integer by growing
+    )
+
+
+def warp_bitmap(
+    bitmap: np.ndarray,
+    pixels_to_canvas_transform: Transform,
+    window: Rectangle
+) -> np.ndarray:
+    """Transforms the bitmap into the pixel space of the canvas,
+    returns only the given window of the canvas"""
+    pixels_to_window_transform = pixels_to_canvas_transform.then(
+        Transform.translate(-window.top_left_corner.vector)
+    )
+    return cv2.warpAffine(
+        src=bitmap,
+        M=pixels_to_window_transform.matrix,
+        dsize=(int(window.width), int(window.height)),
+        flags=(
+            cv2.INTER_AREA # used for downscaling
+            if pixels_to_window_transform.determinant < 1.0
+            else cv2.INTER_LINEAR # used for upscaling
+        ),
+        borderMode=cv2.BORDER_CONSTANT
+    )
+
+
+class _Raster:
+    """A cached warped bitmap"""
+
+    __slots__ = ("bitmap", "window", "layer", "nbytes")
+
+    def __init__(
+        self,
+        bitmap: np.ndarray,
+        window: Rectangle,
+        layer: np.ndarray
+    ):
+        self.bitmap = bitmap
+        """The source bitmap (kept, so that its ID is not reused)"""
+
+        self.window = window
+        """Window of the raster for the translation within the first pixel"""
+
+        self.layer = layer
+        """The warped bitmap in the premultiplied float32 format"""
+
+        self.nbytes = layer.nbytes + bitmap.nbytes
+        """Memory kept alive by the raster, including the source bitmap
+        (a bitmap shared by several rasters is counted for each of them)"""
+
+
+class SpriteRasterCache:
+    """Caches sprite bitmaps warped into the canvas pixel space and converted
+    to the premultiplied float32 format, in which they are blended.
+
+    Sprites placed repeatedly with the same bitmap and the same scale and
+    rotation (stafflines, noteheads of the same glyph, debug boxes), differ
+    only by translation. Whole pixels of the translation just move the
+    raster, so the raster is keyed by the bitmap identity, the linear part
+    of the transform and the sub-pixel part of the translation, rounded
+    to `1 / phase_buckets` of a pixel. The rounding is done for all the
+    sprites passing through the cache (also on a miss), so the result does
+    not depend on what is cached.
+
+    Bitmaps are identified by the array instance, so they must not be
+    modified in-place once they are drawn. Least recently used rasters are
+    dropped when the cache exceeds its memory limit. The cache can be shared
+    between compositors and threads.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, phase_buckets=8):
+        """
+        :param max_bytes: Memory limit for the cached rasters and the source
+            bitmaps they keep alive. Rasters larger than an eighth of the
+            limit (e.g. the paper) are never cached.
+        :param phase_buckets: Number of sub-pixel translation steps
+            per pixel (in each axis).
+        """
+        assert phase_buckets > 0, "There must be at least one phase bucket"
+
+        self.max_bytes = max_bytes
+        """Memory limit for the cached rasters and their source bitmaps"""
+
+        self.phase_buckets = phase_buckets
+        """Number of sub-pixel translation steps per pixel"""
+
+        self.nbytes = 0
+        """Memory taken by the cached rasters and their source bitmaps"""
+
+        self.hits = 0
+        """Number of requests served from the cache"""
+
+        self.misses = 0
+        """Number of requests that had to warp the bitmap"""
+
+        self._rasters: OrderedDict[tuple, _Raster] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # (pickled empty, e.g. together with a compositor)
+        return (self.max_bytes, self.phase_buckets)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def clear(self):
+        """Drops all the cached rasters"""
+        with self._lock:
+            self._rasters.clear()
+            self.nbytes = 0
+
+    def get(
+        self,
+        bitmap: np.ndarray,
+        pixels_to_canvas_transform: Transform
+    ) -> Optional[Tuple[Rectangle, np.ndarray]]:
+        """Returns the window in the canvas (not clamped to the canvas) and
+        the premultiplied float32 warped bitmap to be painted into it.
+        Returns None if the raster is too large to be cached, then the bitmap
+        should be drawn without the cache.
+
+        :param bitmap: BGRA uint8 bitmap of the sprite.
+        :param pixels_to_canvas_transform: Transforms from the pixel space
+            of the bitmap to the pixel space of the canvas.
+        """
+        t = pixels_to_canvas_transform
+
+        # split the translation into whole pixels and the rounded phase
+        whole_x = math.floor(t.e)
+        whole_y = math.floor(t.f)
+        phase_x = round((t.e - whole_x) * self.phase_buckets)
+        phase_y = round((t.f - whole_y) * self.phase_buckets)
+        if phase_x == self.phase_buckets: # (rounded up to the next pixel)
+            whole_x, phase_x = whole_x + 1, 0
+        if phase_y == self.phase_buckets:
+            whole_y, phase_y = whole_y + 1, 0
+        key = (id(bitmap), t.a, t.b, t.c, t.d, phase_x, phase_y)
+
+        with self._lock:
+            raster = self._rasters.get(key)
+            if raster is not None and raster.bitmap is bitmap:
+                self._rasters.move_to_end(key)
+                self.hits += 1
+                return self._place(raster, whole_x, whole_y)
+
+        phase_transform = Transform.from_values(
+            t.a, t.b, t.c, t.d,
+            phase_x / self.phase_buckets,
+            phase_y / self.phase_buckets
+        )
+        window = get_bitmap_window(bitmap, phase_transform)
+        nbytes = int(window.width) * int(window.height) * 4 * 4 \
+            + bitmap.nbytes
+        if nbytes * 8 > self.max_bytes:
+            return None
+
+        layer = cv2.cvtColor(
+            warp_bitmap(bitmap, phase_transform, window),
+            cv2.COLOR_RGBA2mRGBA
+        ).astype(np.float32)
+        layer /= 255
+        raster = _Raster(bitmap, window, layer)
+
+        with self._lock:
+            self.misses += 1
+            previous = self._rasters.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self._rasters[key] = raster
+            self.nbytes += raster.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._rasters.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+        return self._place(raster, whole_x, whole_y)
+
+    @staticmethod
+    def _place(
+        raster: _Raster,
+        whole_x: int,
+        whole_y: int
+    ) -> Tuple[Rectangle, np.ndarray]:
+        return (
+            Rectangle(
+                raster.window.x + whole_x,
+                raster.window.y + whole_y,
+                raster.window.width,
+                raster.window.height
+            ),
+            raster.layer
+        )
@@ -1,4 +1,23 @@
-from .Canvas import Canvas
-from .ImageLayer import ImageLayer
-from .ImageLayerBuilder import ImageLayerBuilder
-from .LayerSet import LayerSet
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .Canvas import Canvas
+    from .ImageLayer import ImageLayer
+    from .ImageLayerBuilder import ImageLayerBuilder
+    from .LayerSet import LayerSet
+    from .SpriteRasterCache import SpriteRasterCache
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "Canvas": ".Canvas",
+    "ImageLayer": ".ImageLayer",
+    "ImageLayerBuilder": ".ImageLayerBuilder",
+    "LayerSet": ".LayerSet",
+    "SpriteRasterCache": ".SpriteRasterCache"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
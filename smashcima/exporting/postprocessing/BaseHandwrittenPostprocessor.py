@@ -1,6 +1,10 @@
+from concurrent.futures import Executor
+from contextlib import contextmanager
+import copy
 from pathlib import Path
 import random
 import sys
+import threading
 import time
 from typing import Tuple
 
@@ -10,6 +14,7 @@ import numpy as np
 
 from smashcima.geometry.units import mm_to_px
 from smashcima.config import MC_CACHE_HOME
+from smashcima.instrumentation import submit_in_context
 
 from ..image.Canvas import Canvas
 from ..image.ImageLayer import ImageLayer
@@ -19,26 +24,51 @@ from .FilterStack import FilterStack
 from .Postprocessor import Postprocessor
 
 
+_GLOBAL_RANDOM_LOCK = threading.Lock()
+
+
+@contextmanager
+def _seeded_global_random(rng: random.Random):
+    """Seeds the global generators (used by augraphy) from the given generator
+    and keeps them locked for the block, so that filters running in parallel
+    threads remain deterministic"""
+    with _GLOBAL_RANDOM_LOCK:
+        seed = rng.random()
+        random.seed(seed)
+        np.random.seed(int(seed * 2 ** 32))
+        yield
+
+
 class BaseHandwrittenPostprocessor(Postprocessor):
     """Applies no postprocessing filters."""
     def __init__(self, rng: random.Random):
+        self.rng = rng
+        """The random number generator used to control randomness"""
+
+        # The stafflines and ink layers are processed with their own
+        # generators, reseeded from the main one for each page, so that
+        # they can be processed in parallel threads deterministically.
+        self.stafflines_rng = random.Random()
+        self.ink_rng = random.Random()
         
         self.f_stafflines = FilterStack([
-            _DilateStafflines(rng),
-            _Letterpress(rng, p=0.5),
-            _InkColor(rng, reduce_opacity_by=(0.4, 0.9))
-        ], rng)
+            _DilateStafflines(self.stafflines_rng),
+            _Letterpress(self.stafflines_rng, p=0.5),
+            _InkColor(self.stafflines_rng, reduce_opacity_by=(0.4, 0.9))
+        ], self.stafflines_rng)
 
         self.f_inkstyle = FilterStack([
             # add caligraphy here (p=0.3)
-            _Median(rng, p=0.3),
-            _InkBleed(rng, p=0.3),
-            _Letterpress(rng, p=0.5)
-        ], rng)
+            _Median(self.ink_rng, p=0.3),
+            _InkBleed(self.ink_rng, p=0.3),
+            _Letterpress(self.ink_rng, p=0.5)
+        ], self.ink_rng)
 
-        self.f_bleed_through = _BleedThrough(rng, p=0.5)
+        self.f_bleed_through = _BleedThrough(self.ink_rng, p=0.5)
 
-        self.f_ink_color = _InkColor(rng, reduce_opacity_by=(0.0, 0.3))
+        self.f_ink_color = _InkColor(
+            self.ink_rng, reduce_opacity_by=(0.0, 0.3)
+        )
 
         self.f_scribbles = _Scribbles(rng, p=0.5)
 
@@ -56,23 +86,50 @@ class BaseHandwrittenPostprocessor(Postprocessor):
         self,
         layers: LayerSet
     ) -> LayerSet:
-        ink = layers["ink"]
-        stafflines = layers["stafflines"]
-        paper = layers["paper"]
-        
-        # process stafflines
-        stafflines = self.f_stafflines(stafflines)
+        self.reseed_layer_generators()
+        return LayerSet({
+            "ink": self.process_ink(layers["ink"]),
+            "stafflines": self.process_stafflines(layers["stafflines"]),
+            "paper": layers["paper"]
+        })
 
-        # process ink
+    def process_extracted_layers_concurrently(
+        self,
+        layers: LayerSet,
+        executor: Executor
+    ) -> LayerSet:
+        # NOTE: Augraphy filters draw from the global generators, so they
+        # hold a lock (see `_seeded_global_random`) and do not overlap.
+        # Only the remaining work on the two layers runs in parallel.
+        self.reseed_layer_generators()
+        ink = submit_in_context(executor, self.process_ink, layers["ink"])
+        stafflines = submit_in_context(
+            executor, self.process_stafflines, layers["stafflines"]
+        )
+        return LayerSet({
+            "ink": ink.result(),
+            "stafflines": stafflines.result(),
+            "paper": layers["paper"]
+        })
+
+    def reseeded(self, seed: int) -> "BaseHandwrittenPostprocessor":
+        # all the filters are copied, with the main generator replaced
+        return copy.deepcopy(self, memo={id(self.rng): random.Random(seed)})
+
+    def reseed_layer_generators(self):
+        """Seeds the generators of the stafflines and ink filters
+        from the main generator"""
+        self.stafflines_rng.seed(self.rng.random())
+        self.ink_rng.seed(self.rng.random())
+
+    def process_stafflines(self, stafflines: ImageLayer) -> ImageLayer:
+        return self.f_stafflines(stafflines)
+
+    def process_ink(self, ink: ImageLayer) -> ImageLayer:
         ink = self.f_inkstyle(ink)
         ink = self.f_bleed_through(ink)
         ink = self.f_ink_color(ink)
-
-        return LayerSet({
-            "ink": ink,
-            "stafflines": stafflines,
-            "paper": paper
-        })
+        return ink
     
     def process_final_layer(
         self,
@@ -136,13 +193,13 @@ class _InkBleed(Filter):
         ksize = max(int(mm_to_px(self.rng.uniform(0.05, 0.3), dpi=input.dpi)), 1)
 
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.InkBleed(
-            intensity_range=(0.4, 0.7),
-            kernel_size=(ksize*2+1, ksize*2+1),
-            severity=(0.2, 0.4)
-        )
-        gray = augmentation(gray)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.InkBleed(
+                intensity_range=(0.4, 0.7),
+                kernel_size=(ksize*2+1, ksize*2+1),
+                severity=(0.2, 0.4)
+            )
+            gray = augmentation(gray)
 
         # re-intorduce the alpha
         bitmap = augraphy_gray_to_smashcima_bgra(gray)
@@ -163,30 +220,30 @@ class _Scribbles(Filter):
         size_to_px = int(mm_to_px(50.0, dpi=input.dpi)) # 5 cm
         
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.Scribbles(
-            scribbles_type="random",
-            scribbles_ink="random",
-            scribbles_location="random",
-            scribbles_size_range=(size_from_px, size_to_px),
-            scribbles_count_range=(1, 6),
-            scribbles_thickness_range=(1, 3),
-            scribbles_brightness_change=[8, 16],
-            scribbles_skeletonize=0,
-            scribbles_skeletonize_iterations=(2, 3),
-            scribbles_color="random",
-            scribbles_text="random",
-            scribbles_text_font="random",
-            scribbles_text_rotate_range=(0, 360),
-            scribbles_lines_stroke_count_range=(1, 6)
-        )
-        
-        # set the fonts cache dir path into the smashcima cache path
-        augmentation.fonts_directory = str(
-            Path(MC_CACHE_HOME) / "augraphy_fonts"
-        )
-        
-        bitmap = augmentation(input.bitmap)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.Scribbles(
+                scribbles_type="random",
+                scribbles_ink="random",
+                scribbles_location="random",
+                scribbles_size_range=(size_from_px, size_to_px),
+                scribbles_count_range=(1, 6),
+                scribbles_thickness_range=(1, 3),
+                scribbles_brightness_change=[8, 16],
+                scribbles_skeletonize=0,
+                scribbles_skeletonize_iterations=(2, 3),
+                scribbles_color="random",
+                scribbles_text="random",
+                scribbles_text_font="random",
+                scribbles_text_rotate_range=(0, 360),
+                scribbles_lines_stroke_count_range=(1, 6)
+            )
+
+            # set the fonts cache dir path into the smashcima cache path
+            augmentation.fonts_directory = str(
+                Path(MC_CACHE_HOME) / "augraphy_fonts"
+            )
+
+            bitmap = augmentation(input.bitmap)
         
         return ImageLayer(
             bitmap=bitmap,
@@ -209,16 +266,16 @@ class _BleedThrough(Filter):
         )
 
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.BleedThrough(
-            intensity_range=(0.1, 0.3),
-            color_range=(32, 224),
-            ksize=(ksize*2+1, ksize*2+1),
-            sigmaX=1,
-            alpha=self.rng.uniform(0.1, 0.5),
-            offsets=offsets,
-        )
-        gray = augmentation(gray)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.BleedThrough(
+                intensity_range=(0.1, 0.3),
+                color_range=(32, 224),
+                ksize=(ksize*2+1, ksize*2+1),
+                sigmaX=1,
+                alpha=self.rng.uniform(0.1, 0.5),
+                offsets=offsets,
+            )
+            gray = augmentation(gray)
 
         # re-intorduce the alpha
         bitmap = augraphy_gray_to_smashcima_bgra(gray)
@@ -236,9 +293,9 @@ class _ShadowCast(Filter):
     """Applies the Augraphy ShadowCast filter to the composed image"""
     def apply_to(self, input: ImageLayer) -> ImageLayer:
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.ShadowCast()
-        bitmap = augmentation(input.bitmap)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.ShadowCast()
+            bitmap = augmentation(input.bitmap)
         
         return ImageLayer(
             bitmap=bitmap,
@@ -252,9 +309,9 @@ class _LightingGradient(Filter):
     """Applies the Augraphy LightingGradient filter to the composed image"""
     def apply_to(self, input: ImageLayer) -> ImageLayer:
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.LightingGradient()
-        bitmap = augmentation(input.bitmap)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.LightingGradient()
+            bitmap = augmentation(input.bitmap)
         
         return ImageLayer(
             bitmap=bitmap,
@@ -270,12 +327,12 @@ class _Geometric(Filter):
         # TODO: apply to regions as well
         
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.Geometric(
-            rotate_range=(-5, 5), # angle in degrees
-            padding_value=(0, 0, 0)
-        )
-        bitmap = augmentation(input.bitmap)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.Geometric(
+                rotate_range=(-5, 5), # angle in degrees
+                padding_value=(0, 0, 0)
+            )
+            bitmap = augmentation(input.bitmap)
         
         return ImageLayer(
             bitmap=bitmap,
@@ -291,20 +348,20 @@ class _Folding(Filter):
         # TODO: apply to regions as well
         
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.Folding(
-            fold_count=10,
-            fold_noise=0.0,
-            fold_angle_range=(-360,360),
-            gradient_width=(0.1, 0.2),
-            gradient_height=(0.005, 0.01),
-            backdrop_color=(0,0,0),
-        )
-        pad = augraphy.Geometric(
-            padding=[0.01]*4,
-            padding_value=(0, 0, 0)
-        )
-        bitmap = augmentation(pad(input.bitmap))
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.Folding(
+                fold_count=10,
+                fold_noise=0.0,
+                fold_angle_range=(-360,360),
+                gradient_width=(0.1, 0.2),
+                gradient_height=(0.005, 0.01),
+                backdrop_color=(0,0,0),
+            )
+            pad = augraphy.Geometric(
+                padding=[0.01]*4,
+                padding_value=(0, 0, 0)
+            )
+            bitmap = augmentation(pad(input.bitmap))
         
         return ImageLayer(
             bitmap=bitmap,
@@ -344,7 +401,7 @@ class _InkColor(Filter):
     def apply_to(self, input: ImageLayer) -> ImageLayer:
         # start_time = time.time()
 
-        bgr = input.bitmap[:,:,0:3]
+        bgr = input.bitmap[:,:,0:3].copy() # (the input must stay intact)
         alpha = input.bitmap[:,:,3]
 
         # choose ink color
@@ -382,9 +439,9 @@ class _Letterpress(Filter):
         gray = smashcima_bgra_to_augraphy_gray(input.bitmap)
 
         # make augraphy deterministic and call it
-        random.seed(self.rng.random())
-        augmentation = augraphy.Letterpress()
-        gray = augmentation(gray)
+        with _seeded_global_random(self.rng):
+            augmentation = augraphy.Letterpress()
+            gray = augmentation(gray)
         
         # re-intorduce the alpha
         bitmap = augraphy_gray_to_smashcima_bgra(gray)
@@ -437,13 +494,11 @@ class _DilateStafflines(Filter):
 def smashcima_bgra_to_augraphy_gray(bitmap: np.ndarray) -> np.ndarray:
     """Converts smashcima BGRA image with black ink on transparent to the
     augraphy ink grayscale, where white means kinda-transparent"""
-    c = Canvas(
-        width=bitmap.shape[1],
-        height=bitmap.shape[0],
+    merged = Canvas.merge_layers(
+        [bitmap],
         background_color=(255, 255, 255, 255) # white
     )
-    c.place_layer(bitmap)
-    gray = cv2.cvtColor(c.read(), cv2.COLOR_BGRA2GRAY)
+    gray = cv2.cvtColor(merged, cv2.COLOR_BGRA2GRAY)
     return gray
 
 
@@ -1,6 +1,8 @@
 import random
 from abc import ABC, abstractmethod
 
+from smashcima.instrumentation import measure
+
 from ..image.ImageLayer import ImageLayer
 
 
@@ -28,7 +30,8 @@ class Filter(ABC):
             return input
         
         if self.force_do or self.rng.random() < self.p:
-            return self.apply_to(input)
+            with measure("Filter." + type(self).__name__):
+                return self.apply_to(input)
         else:
             return input
     
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 
 from ..image.ImageLayer import ImageLayer
 from ..image.LayerSet import LayerSet
@@ -16,6 +17,25 @@ class Postprocessor(ABC):
         """Processes layers separately right after they are extracted
         from the scene."""
         raise NotImplementedError
+
+    def process_extracted_layers_concurrently(
+        self,
+        layers: LayerSet,
+        executor: Executor
+    ) -> LayerSet:
+        """Processes the extracted layers like `process_extracted_layers`,
+        but may process the individual layers in parallel on the given
+        thread pool. The result must not depend on the threads scheduling.
+        By default, the layers are processed in the calling thread.
+        Tasks should be submitted via `submit_in_context`, so that
+        their measurements are recorded."""
+        return self.process_extracted_layers(layers)
+
+    def reseeded(self, seed: int) -> "Postprocessor":
+        """Returns a postprocessor that applies the same filters, but draws
+        its randomness from an independent stream given by the seed.
+        Postprocessors without randomness return themselves."""
+        return self
     
     @abstractmethod
     def process_final_layer(
@@ -1,5 +1,23 @@
-from .BaseHandwrittenPostprocessor import BaseHandwrittenPostprocessor
-from .Filter import Filter
-from .FilterStack import FilterStack
-from .NullPostprocessor import NullPostprocessor
-from .Postprocessor import Postprocessor
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .BaseHandwrittenPostprocessor import BaseHandwrittenPostprocessor
+    from .Filter import Filter
+    from .FilterStack import FilterStack
+    from .NullPostprocessor import NullPostprocessor
+    from .Postprocessor import Postprocessor
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "BaseHandwrittenPostprocessor": ".BaseHandwrittenPostprocessor",
+    "Filter": ".Filter",
+    "FilterStack": ".FilterStack",
+    "NullPostprocessor": ".NullPostprocessor",
+    "Postprocessor": ".Postprocessor"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
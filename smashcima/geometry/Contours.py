@@ -1,4 +1,4 @@
-from typing import List, Sequence
+from typing import Any, Dict, List, Sequence
 
 import numpy as np
 
@@ -7,22 +7,85 @@ from .Rectangle import Rectangle
 
 
 class Contours:
-    """Contours is a list of polygons that together encapsulate a shape"""
+    """Contours is a list of polygons that together encapsulate a shape.
+
+    Points of all the polygons are stored in one contiguous array, so that
+    the whole shape can be transformed or reduced (e.g. to its bounding box)
+    by a single NumPy operation.
+    """
 
     def __init__(self, polygons: List[Polygon]):
-        self.polygons = polygons
+        lengths = [len(p.coordinates) for p in polygons]
+
+        self.coordinates: np.ndarray = (
+            np.concatenate([p.coordinates for p in polygons], axis=0)
+            if len(polygons) > 0 else np.zeros((0, 2), dtype=np.float64)
+        )
+        """The (N, 2) float64 array of coordinates of all the points
+        of all the polygons"""
+
+        self.offsets: np.ndarray = np.concatenate(
+            ([0], np.cumsum(lengths, dtype=np.int64))
+        ).astype(np.int64)
+        """Polygon `i` consists of points from `offsets[i]`
+        to `offsets[i + 1]` (exclusive), there is one more offset
+        than polygons"""
+
+    @staticmethod
+    def from_arrays(
+        coordinates: np.ndarray,
+        offsets: np.ndarray
+    ) -> "Contours":
+        """Constructs contours from the point coordinates array and
+        the polygon offsets array (see the attributes), without copying"""
+        assert coordinates.ndim == 2 and coordinates.shape[1] == 2
+        assert offsets[0] == 0 and offsets[-1] == len(coordinates)
+        contours = Contours.__new__(Contours)
+        contours.coordinates = coordinates.astype(np.float64, copy=False)
+        contours.offsets = offsets.astype(np.int64, copy=False)
+        return contours
 
     @staticmethod
     def from_cv2_contours(cv_contours: Sequence[np.ndarray]) -> "Contours":
         """Constructs a polygon from an OpenCV contour instance"""
-        return Contours([
-            Polygon.from_cv2_contour(cv_contour)
-            for cv_contour in cv_contours
-        ])
+        if len(cv_contours) == 0:
+            return Contours([])
+        return Contours.from_arrays(
+            np.concatenate(
+                [c.reshape(-1, 2) for c in cv_contours], axis=0
+            ).astype(np.float64),
+            np.concatenate(
+                ([0], np.cumsum([len(c) for c in cv_contours]))
+            )
+        )
+
+    @staticmethod
+    def concatenate(contours: Sequence["Contours"]) -> "Contours":
+        """Joins polygons of multiple contours into one contours instance"""
+        if len(contours) == 0:
+            return Contours([])
+        coordinates = np.concatenate([c.coordinates for c in contours], axis=0)
+        offsets = [contours[0].offsets]
+        base = contours[0].offsets[-1]
+        for c in contours[1:]:
+            offsets.append(c.offsets[1:] + base)
+            base += c.offsets[-1]
+        return Contours.from_arrays(coordinates, np.concatenate(offsets))
+
+    @property
+    def polygons(self) -> List[Polygon]:
+        """The polygons, their coordinates are views into this instance"""
+        offsets = self.offsets.tolist()
+        return [
+            Polygon(self.coordinates[start:end])
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+    def __setstate__(self, state: Dict[str, Any]):
+        if "polygons" in state: # pickled before points were stored in arrays
+            state = Contours(state["polygons"]).__dict__
+        self.__dict__.update(state)
 
     def bbox(self) -> Rectangle:
         """Returns the bounding box of all contours"""
-        point_cloud = [
-            point for polygon in self.polygons for point in polygon.points
-        ]
-        return Polygon(point_cloud).bbox()
+        return Polygon(self.coordinates).bbox()
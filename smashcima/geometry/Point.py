@@ -1,31 +1,59 @@
+from typing import Any, Tuple, Union
+
 from .Vector2 import Vector2
 
 
 class Point:
-    """Geometric 2D point"""
+    """Geometric 2D point, immutable (so it can be hashed by value)"""
+
+    # points are allocated in large numbers (e.g. for polygons),
+    # slots make them smaller and faster to construct
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
-        self.vector = Vector2(float(x), float(y))
-        "The vector from origin to the point position that defines this point"
+        _set_x(self, float(x))
+        _set_y(self, float(y))
     
     @staticmethod
     def from_origin_vector(vector: Vector2) -> "Point":
         return Point(vector.x, vector.y)
 
     @property
-    def x(self) -> float:
-        return self.vector.x
-
-    @property
-    def y(self) -> float:
-        return self.vector.y
+    def vector(self) -> Vector2:
+        """The vector from origin to the point position that defines
+        this point"""
+        return Vector2(self.x, self.y)
 
     @property
     def left(self) -> float:
-        return self.vector.x
+        return self.x
 
     @property
     def top(self) -> float:
-        return self.vector.y
+        return self.y
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self) -> Tuple[float, float]:
+        return (self.x, self.y)
+
+    def __setstate__(self, state: Union[Tuple[float, float], dict]):
+        if isinstance(state, dict): # pickled before slots were introduced
+            state = (state["vector"].x, state["vector"].y)
+        _set_x(self, state[0])
+        _set_y(self, state[1])
     
     def __repr__(self):
         return f"Point({self.x}, {self.y})"
@@ -36,3 +64,8 @@ class Point:
     def __iter__(self):
         yield self.x
         yield self.y
+
+
+# fields are set via their slot descriptors, bypassing __setattr__
+_set_x = Point.x.__set__
+_set_y = Point.y.__set__
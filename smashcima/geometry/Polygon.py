@@ -1,7 +1,7 @@
 from .Point import Point
 from .Rectangle import Rectangle
 from .Quad import Quad
-from typing import List
+from typing import Any, Dict, List, Union
 import numpy as np
 
 
@@ -10,8 +10,31 @@ class Polygon:
     Polygon is a list of points that enclose an area.
     """
 
-    def __init__(self, points: List[Point]):
-        self.points = points
+    def __init__(self, points: Union[List[Point], np.ndarray]):
+        if isinstance(points, np.ndarray):
+            coordinates = points.astype(np.float64, copy=False) \
+                .reshape(-1, 2)
+        else:
+            coordinates = np.array(
+                [(p.x, p.y) for p in points], dtype=np.float64
+            ).reshape(-1, 2)
+
+        self.coordinates: np.ndarray = coordinates
+        """The (N, 2) float64 array of point coordinates,
+        one row per point with X and Y"""
+
+    @property
+    def points(self) -> List[Point]:
+        """Returns the polygon points as a list"""
+        return [Point(x, y) for x, y in self.coordinates.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+    def __setstate__(self, state: Dict[str, Any]):
+        if "points" in state: # pickled before points were stored in an array
+            state = {"coordinates": Polygon(state["points"]).coordinates}
+        self.__dict__.update(state)
 
     @staticmethod
     def from_rectangle(rectangle: Rectangle) -> "Polygon":
@@ -33,18 +56,17 @@ class Polygon:
     def from_cv2_contour(contour: np.ndarray) -> "Polygon":
         """Constructs a polygon from an OpenCV contour instance"""
         # enumerated points are vertical vectors: [[X, Y]]
-        return Polygon([Point(p[0, 0], p[0, 1]) for p in contour])
+        return Polygon(contour.reshape(-1, 2).astype(np.float64))
 
     def __repr__(self):
-        return f"Quad({self.a}, {self.b}, {self.c}, {self.d})"
+        return f"Polygon({self.points})"
 
     def bbox(self) -> Rectangle:
         """Returns the bounding box of the polygon"""
-        pts = self.points
-        top = min(p.y for p in pts)
-        bottom = max(p.y for p in pts)
-        left = min(p.x for p in pts)
-        right = max(p.x for p in pts)
+        if len(self.coordinates) == 0:
+            raise ValueError("An empty polygon has no bounding box")
+        left, top = self.coordinates.min(axis=0).tolist()
+        right, bottom = self.coordinates.max(axis=0).tolist()
         return Rectangle(
             x=left,
             y=top,
@@ -1,6 +1,6 @@
 from .Point import Point
 from .Rectangle import Rectangle
-from typing import List
+from typing import Any, List, Tuple, Union
 
 
 class Quad:
@@ -9,14 +9,45 @@ class Quad:
     This is what you get from a rectangle after doing an affine transform.
     You can turn it back to a rectangle by getting the bounding box (bbox).
     It's created from a rectangle by going over its corners from the left top
-    corner in the clockwise direction.
+    corner in the clockwise direction. It is immutable.
     """
 
+    __slots__ = ("a", "b", "c", "d")
+
     def __init__(self, a: Point, b: Point, c: Point, d: Point):
-        self.a = a
-        self.b = b
-        self.c = c
-        self.d = d
+        _set_a(self, a)
+        _set_b(self, b)
+        _set_c(self, c)
+        _set_d(self, d)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Quad):
+            return NotImplemented
+        return self.a == other.a and self.b == other.b \
+            and self.c == other.c and self.d == other.d
+
+    def __hash__(self) -> int:
+        return hash((self.a, self.b, self.c, self.d))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self) -> Tuple[Point, Point, Point, Point]:
+        return (self.a, self.b, self.c, self.d)
+
+    def __setstate__(
+        self,
+        state: Union[Tuple[Point, Point, Point, Point], dict]
+    ):
+        if isinstance(state, dict): # pickled before slots were introduced
+            state = (state["a"], state["b"], state["c"], state["d"])
+        _set_a(self, state[0])
+        _set_b(self, state[1])
+        _set_c(self, state[2])
+        _set_d(self, state[3])
 
     @staticmethod
     def from_rectangle(rectangle: Rectangle) -> "Quad":
@@ -50,3 +81,10 @@ class Quad:
             width=right-left,
             height=bottom-top
         )
+
+
+# fields are set via their slot descriptors, bypassing __setattr__
+_set_a = Quad.a.__set__
+_set_b = Quad.b.__set__
+_set_c = Quad.c.__set__
+_set_d = Quad.d.__set__
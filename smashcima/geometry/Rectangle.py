@@ -1,14 +1,48 @@
 from .Point import Point
 from math import ceil, floor
+from typing import Any, Tuple, Union
 
 
 class Rectangle:
+    """Axis-aligned rectangle, immutable (so it can be hashed by value)"""
+
+    __slots__ = ("x", "y", "width", "height")
+
     def __init__(self, x: float, y: float, width: float, height: float):
         assert width >= 0 and height >= 0, "Rectangle cannot have negative size"
-        self.x = float(x)
-        self.y = float(y)
-        self.width = float(width)
-        self.height = float(height)
+        _set_x(self, float(x))
+        _set_y(self, float(y))
+        _set_width(self, float(width))
+        _set_height(self, float(height))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Rectangle):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y \
+            and self.width == other.width and self.height == other.height
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y, self.width, self.height))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self) -> Tuple[float, float, float, float]:
+        return (self.x, self.y, self.width, self.height)
+
+    def __setstate__(
+        self,
+        state: Union[Tuple[float, float, float, float], dict]
+    ):
+        if isinstance(state, dict): # pickled before slots were introduced
+            state = (state["x"], state["y"], state["width"], state["height"])
+        _set_x(self, state[0])
+        _set_y(self, state[1])
+        _set_width(self, state[2])
+        _set_height(self, state[3])
     
     @property
     def left(self) -> float:
@@ -149,3 +183,10 @@ class Rectangle:
             width=viewport.width * self.width,
             height=viewport.height * self.height
         )
+
+
+# fields are set via their slot descriptors, bypassing __setattr__
+_set_x = Rectangle.x.__set__
+_set_y = Rectangle.y.__set__
+_set_width = Rectangle.width.__set__
+_set_height = Rectangle.height.__set__
@@ -0,0 +1,121 @@
+import math
+from typing import Dict, Generic, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from .Rectangle import Rectangle
+
+
+T = TypeVar("T")
+
+
+MAX_CELLS_PER_ITEM = 1024
+"""Items covering more grid cells are not put into cells,
+they are tested by every query"""
+
+
+class SpatialIndex(Generic[T]):
+    """Uniform grid index over items with bounding boxes, answers which
+    items have their bounding box intersecting a query rectangle.
+
+    Items are sorted into square grid cells by their bounding boxes.
+    A query only tests items from the cells that the query rectangle covers,
+    so querying a small window of a page does not test all the items.
+    The index is immutable, build a new one when the items change.
+    """
+
+    def __init__(
+        self,
+        items: Sequence[T],
+        bboxes: Sequence[Rectangle],
+        cell_size: float = 0.0
+    ):
+        """
+        :param items: The indexed items.
+        :param bboxes: Bounding boxes of the items (in the same order).
+        :param cell_size: Size of the grid cells, derived from the sizes
+            of the bounding boxes if not positive.
+        """
+        assert len(items) == len(bboxes), \
+            "There must be a bounding box for each item"
+
+        self.items: List[T] = list(items)
+        """The indexed items"""
+
+        self.bboxes: np.ndarray = np.array(
+            [(b.left, b.top, b.right, b.bottom) for b in bboxes],
+            dtype=np.float64
+        ).reshape(-1, 4)
+        """(N, 4) array with the left, top, right, bottom coordinates
+        of bounding boxes of the items"""
+
+        if cell_size <= 0:
+            cell_size = self._default_cell_size(self.bboxes)
+        self.cell_size = cell_size
+        """Size of the grid cells"""
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        large_items: List[int] = []
+        for i, (x0, y0, x1, y1) in enumerate(self._cell_ranges(self.bboxes)):
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_CELLS_PER_ITEM:
+                large_items.append(i)
+                continue
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cells.setdefault((cx, cy), []).append(i)
+
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {
+            key: np.array(indices, dtype=np.int64)
+            for key, indices in cells.items()
+        }
+        self._large_items = np.array(large_items, dtype=np.int64)
+
+    @staticmethod
+    def _default_cell_size(bboxes: np.ndarray) -> float:
+        """Cells about twice the size of a typical item"""
+        if len(bboxes) == 0:
+            return 1.0
+        sizes = np.maximum(
+            bboxes[:, 2] - bboxes[:, 0],
+            bboxes[:, 3] - bboxes[:, 1]
+        )
+        return max(float(np.median(sizes)) * 2, 1e-6)
+
+    def _cell_ranges(self, bboxes: np.ndarray) -> List[List[int]]:
+        """First and last cell coordinates covered by each bounding box"""
+        return np.floor(bboxes / self.cell_size).astype(np.int64).tolist()
+
+    def query(self, rectangle: Rectangle) -> List[T]:
+        """Returns items whose bounding boxes intersect (or touch) the
+        rectangle, in the order in which they were given"""
+        x0 = math.floor(rectangle.left / self.cell_size)
+        y0 = math.floor(rectangle.top / self.cell_size)
+        x1 = math.floor(rectangle.right / self.cell_size)
+        y1 = math.floor(rectangle.bottom / self.cell_size)
+
+        # visit cells of the window, or of the items, whichever is fewer
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(self._cells):
+            candidates = [
+                self._cells[(cx, cy)]
+                for cx in range(x0, x1 + 1)
+                for cy in range(y0, y1 + 1)
+                if (cx, cy) in self._cells
+            ]
+        else:
+            candidates = [
+                indices for (cx, cy), indices in self._cells.items()
+                if x0 <= cx <= x1 and y0 <= cy <= y1
+            ]
+        candidates.append(self._large_items)
+        indices = np.unique(np.concatenate(candidates))
+
+        # exact test of the candidate bounding boxes
+        b = self.bboxes[indices]
+        hits = indices[
+            (b[:, 0] <= rectangle.right) & (b[:, 2] >= rectangle.left) &
+            (b[:, 1] <= rectangle.bottom) & (b[:, 3] >= rectangle.top)
+        ]
+        return [self.items[i] for i in hits.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -1,6 +1,6 @@
-from typing import TypeVar
+import math
+from typing import Any, Tuple, TypeVar
 
-import cv2
 import numpy as np
 
 from .Contours import Contours
@@ -18,69 +18,169 @@ class Transform:
 
     When used in scene objects, it maps from the local space
     to the parent object's space.
+
+    The transform is stored as the six numbers a, b, c, d, e, f
+    of the matrix:
+    ```
+    | a c e |
+    | b d f |
+    ```
+    Composing transforms and transforming single vectors is done with plain
+    Python floats (NumPy call overhead would dwarf the math). NumPy is used
+    only for transforming many points at once (polygons and contours).
     """
 
     # Based on:
     # https://www.w3.org/TR/SVGTiny12/coords.html#TransformAttribute
 
+    __slots__ = ("a", "b", "c", "d", "e", "f")
+
     def __init__(self, matrix: np.ndarray):
         assert matrix.shape == (2, 3)
         assert matrix.dtype == np.float64
-        
-        self.matrix = matrix
-        "The 2x3 transformation matrix as a numpy array"
+
+        (a, c, e), (b, d, f) = matrix.tolist()
+        self.a: float = a
+        self.b: float = b
+        self.c: float = c
+        self.d: float = d
+        self.e: float = e
+        self.f: float = f
+
+    @staticmethod
+    def from_values(
+        a: float, b: float, c: float, d: float, e: float, f: float
+    ) -> "Transform":
+        """Constructs the transform from the six matrix values
+        (in the SVG matrix order, see the class documentation)"""
+        t = Transform.__new__(Transform)
+        t.a = float(a)
+        t.b = float(b)
+        t.c = float(c)
+        t.d = float(d)
+        t.e = float(e)
+        t.f = float(f)
+        return t
+
+    def __getstate__(self) -> Tuple[float, ...]:
+        return (self.a, self.b, self.c, self.d, self.e, self.f)
+
+    def __setstate__(self, state: Any):
+        if isinstance(state, dict): # pickled with the matrix array
+            (a, c, e), (b, d, f) = state["matrix"].tolist()
+            state = (a, b, c, d, e, f)
+        self.a, self.b, self.c, self.d, self.e, self.f = state
+
+    def __repr__(self) -> str:
+        return f"Transform.from_values({self.a}, {self.b}, {self.c}, " + \
+            f"{self.d}, {self.e}, {self.f})"
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The 2x3 transformation matrix as a numpy array
+        (e.g. for `cv2.warpAffine`). The array is built on each access,
+        so it is read-only, assign a new matrix to change the transform."""
+        matrix = np.array([
+            [self.a, self.c, self.e],
+            [self.b, self.d, self.f]
+        ], dtype=np.float64)
+        matrix.setflags(write=False)
+        return matrix
+
+    @matrix.setter
+    def matrix(self, matrix: np.ndarray):
+        assert matrix.shape == (2, 3)
+        (a, c, e), (b, d, f) = matrix.tolist()
+        self.a, self.b, self.c, self.d, self.e, self.f = \
+            float(a), float(b), float(c), float(d), float(e), float(f)
 
     @property
     def matrix3(self) -> np.ndarray:
         """The 3x3 extended matrix of this transformation"""
-        return np.concatenate(
-            (self.matrix, np.array([[0, 0, 1]], dtype=np.float64)),
-            axis=0
-        )
+        return np.array([
+            [self.a, self.c, self.e],
+            [self.b, self.d, self.f],
+            [0, 0, 1]
+        ], dtype=np.float64)
 
     @property
     def matrix2(self) -> np.ndarray:
         """The 2x2 matrix that ignores translation"""
-        return self.matrix[0:2, 0:2]
+        return np.array([
+            [self.a, self.c],
+            [self.b, self.d]
+        ], dtype=np.float64)
 
     @property
     def determinant(self) -> float:
         """Returns the determinant of the affine transformation"""
-        return np.linalg.det(self.matrix2)
+        return self.a * self.d - self.b * self.c
 
     def inverse(self) -> "Transform":
-        """Returns the inverted affine transform"""
-        return Transform(cv2.invertAffineTransform(self.matrix))
+        """Returns the inverted affine transform
+
+        :raises ValueError: The transform is singular (e.g. a zero scale)
+        """
+        determinant = self.determinant
+        if determinant == 0:
+            raise ValueError("A singular transform cannot be inverted")
+        a = self.d / determinant
+        b = -self.b / determinant
+        c = -self.c / determinant
+        d = self.a / determinant
+        return Transform.from_values(
+            a, b, c, d,
+            -(a * self.e + c * self.f),
+            -(b * self.e + d * self.f)
+        )
 
     def apply_to(self, other: T) -> T:
         """Transform a vector or another transformation"""
-        m = self.matrix3
         if isinstance(other, Transform):
-            o = other.matrix3
-            r = m.dot(o)
-            return Transform(r[0:2, :]) # type: ignore
+            a, b, c, d, e, f = self.a, self.b, self.c, self.d, self.e, self.f
+            return Transform.from_values( # type: ignore
+                a * other.a + c * other.b,
+                b * other.a + d * other.b,
+                a * other.c + c * other.d,
+                b * other.c + d * other.d,
+                a * other.e + c * other.f + e,
+                b * other.e + d * other.f + f
+            )
         elif isinstance(other, Vector2):
-            o = np.array([[other.x], [other.y], [1]], dtype=np.float64)
-            r = m.dot(o)
-            return Vector2(r[0, 0], r[1, 0]) # type: ignore
+            return Vector2( # type: ignore
+                self.a * other.x + self.c * other.y + self.e,
+                self.b * other.x + self.d * other.y + self.f
+            )
         elif isinstance(other, Point):
-            v = self.apply_to(other.vector)
-            return Point(v.x, v.y) # type: ignore
+            return Point( # type: ignore
+                self.a * other.x + self.c * other.y + self.e,
+                self.b * other.x + self.d * other.y + self.f
+            )
         elif isinstance(other, Quad):
             pts = [self.apply_to(p) for p in other.points]
             return Quad(*pts) # type: ignore
         elif isinstance(other, Polygon):
-            pts = [self.apply_to(p) for p in other.points]
-            return Polygon(pts) # type: ignore
+            return Polygon( # type: ignore
+                self.apply_to_coordinates(other.coordinates)
+            )
         elif isinstance(other, Contours):
-            ps = [self.apply_to(p) for p in other.polygons]
-            return Contours(ps) # type: ignore
+            return Contours.from_arrays( # type: ignore
+                self.apply_to_coordinates(other.coordinates),
+                other.offsets
+            )
         else:
             raise ValueError(
                 "Transform applied to an unexpected type: " +
                 str(type(other))
             )
 
+    def apply_to_coordinates(self, coordinates: np.ndarray) -> np.ndarray:
+        """Transforms an (N, 2) array of point coordinates at once,
+        returns a new array"""
+        return coordinates @ np.array(
+            [[self.a, self.b], [self.c, self.d]], dtype=np.float64
+        ) + np.array([self.e, self.f], dtype=np.float64)
+
     def __matmul__(self, other: T) -> T:
         return self.apply_to(other)
 
@@ -96,36 +196,24 @@ class Transform:
     @staticmethod
     def identity() -> "Transform":
         """Returns the identity transform"""
-        return Transform(
-            np.array([
-                [1, 0, 0],
-                [0, 1, 0]
-            ], dtype=np.float64)
-        )
+        return Transform.from_values(1, 0, 0, 1, 0, 0)
 
     @staticmethod
     def translate(offset: Vector2) -> "Transform":
         """Returns a translation transform"""
-        return Transform(
-            np.array([
-                [1, 0, offset.x],
-                [0, 1, offset.y]
-            ], dtype=np.float64)
-        )
+        return Transform.from_values(1, 0, 0, 1, offset.x, offset.y)
 
     @staticmethod
     def scale(scale: float) -> "Transform":
         """Returns a scaling transform"""
-        return Transform(
-            np.array([
-                [scale, 0, 0],
-                [0, scale, 0]
-            ], dtype=np.float64)
-        )
+        return Transform.from_values(scale, 0, 0, scale, 0, 0)
 
     @staticmethod
     def rotateDegCC(angle: float):
         """Creates a rotation transform for a coutner-clockwise rotation
         of a given number of degrees"""
-        matrix = cv2.getRotationMatrix2D((0, 0), angle, 1)
-        return Transform(matrix)
+        # (the same matrix as cv2.getRotationMatrix2D((0, 0), angle, 1))
+        radians = math.radians(angle)
+        cos = math.cos(radians)
+        sin = math.sin(radians)
+        return Transform.from_values(cos, -sin, sin, cos, 0, 0)
@@ -1,13 +1,40 @@
 import math
-from typing import Iterator
+from typing import Any, Iterator, Tuple, Union
 
 
 class Vector2:
-    """Mathematical 2D vector"""
+    """Mathematical 2D vector, immutable (so it can be hashed by value)"""
+
+    # vectors are allocated in large numbers (e.g. for polygon points),
+    # slots make them smaller and faster to construct
+    __slots__ = ("x", "y")
 
     def __init__(self, x: float, y: float):
-        self.x = float(x)
-        self.y = float(y)
+        _set_x(self, float(x))
+        _set_y(self, float(y))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Vector2):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self) -> Tuple[float, float]:
+        return (self.x, self.y)
+
+    def __setstate__(self, state: Union[Tuple[float, float], dict]):
+        if isinstance(state, dict): # pickled before slots were introduced
+            state = (state["x"], state["y"])
+        _set_x(self, state[0])
+        _set_y(self, state[1])
     
     @property
     def left(self) -> float:
@@ -73,3 +100,8 @@ class Vector2:
         if m == 0:
             raise Exception("Zero vector cannot be normalized")
         return self / m
+
+
+# fields are set via their slot descriptors, bypassing __setattr__
+_set_x = Vector2.x.__set__
+_set_y = Vector2.y.__set__
@@ -1,9 +1,33 @@
-from .Contours import Contours
-from .Point import Point
-from .Polygon import Polygon
-from .Quad import Quad
-from .Rectangle import Rectangle
-from .Transform import Transform
-from .Vector2 import Vector2
-
-from .units import mm_to_px, px_to_mm
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .Contours import Contours
+    from .Point import Point
+    from .Polygon import Polygon
+    from .Quad import Quad
+    from .Rectangle import Rectangle
+    from .SpatialIndex import SpatialIndex
+    from .Transform import Transform
+    from .Vector2 import Vector2
+
+    from .units import mm_to_px, px_to_mm
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "Contours": ".Contours",
+    "Point": ".Point",
+    "Polygon": ".Polygon",
+    "Quad": ".Quad",
+    "Rectangle": ".Rectangle",
+    "SpatialIndex": ".SpatialIndex",
+    "Transform": ".Transform",
+    "Vector2": ".Vector2",
+    "mm_to_px": ".units",
+    "px_to_mm": ".units"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,158 @@
+import contextlib
+import contextvars
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+
+R = TypeVar("R")
+
+
+class Instrumentation:
+    """Opt-in profiling service that records wall time and call counts
+    of the individual stages of the synthesis pipeline.
+
+    The model registers an instance into its service container, disabled
+    by default. When enabled, pipeline stages (style picking, score loading,
+    page synthesis, notation synthesis, layer extraction, postprocessing
+    filters, rendering) measure their duration and the statistics can be
+    aggregated over a run of many samples.
+
+    Usage:
+    ```
+    model = BaseHandwrittenModel()
+    model.instrumentation.enabled = True
+    for file in files:
+        scene = model(file)
+        scene.render(scene.pages[0])
+    print(model.instrumentation.report())
+    ```
+
+    Code deep in the pipeline (e.g. filters) does not have access to the
+    instance, it uses the `measure` function instead, which records into
+    the instrumentation that is currently active (see `activate`).
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        """Whether measurements are being recorded"""
+
+        self.durations: Dict[str, List[float]] = {}
+        """Recorded durations (in seconds) for each measured stage name"""
+
+    @contextlib.contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Measures the duration of the wrapped block of code"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, duration: float):
+        """Records one measured duration (in seconds) for a stage"""
+        self.durations.setdefault(name, []).append(duration)
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["Instrumentation"]:
+        """Makes this instance the target of the `measure` function
+        for the wrapped block of code (in the current thread or task)"""
+        token = _active_instrumentation.set(self)
+        try:
+            yield self
+        finally:
+            _active_instrumentation.reset(token)
+
+    def reset(self):
+        """Forgets all the recorded measurements"""
+        self.durations = {}
+
+    def merge(self, other: "Instrumentation"):
+        """Adds measurements from another instance (e.g. from a worker
+        process) into this instance"""
+        for name, durations in other.durations.items():
+            self.durations.setdefault(name, []).extend(durations)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregates the recorded measurements for each stage.
+        Durations are in seconds."""
+        result: Dict[str, Dict[str, float]] = {}
+        for name, durations in self.durations.items():
+            if len(durations) == 0:
+                continue
+            ordered = sorted(durations)
+            result[name] = {
+                "count": len(ordered),
+                "total": sum(ordered),
+                "mean": sum(ordered) / len(ordered),
+                "p50": _percentile(ordered, 50),
+                "p90": _percentile(ordered, 90),
+                "p99": _percentile(ordered, 99),
+                "max": ordered[-1]
+            }
+        return result
+
+    def report(self) -> str:
+        """Formats the summary as a human-readable table
+        (stages sorted by the total time, durations in milliseconds)"""
+        summary = self.summary()
+        rows = sorted(summary.items(), key=lambda i: -i[1]["total"])
+        width = max([len("stage")] + [len(name) for name, _ in rows])
+        columns = ["count", "total", "mean", "p50", "p90", "p99", "max"]
+
+        lines = [
+            "stage".ljust(width) + "".join(c.rjust(11) for c in columns)
+        ]
+        for name, stats in rows:
+            lines.append(name.ljust(width) + "".join(
+                str(int(stats[c])).rjust(11) if c == "count"
+                else f"{stats[c] * 1000:.2f}".rjust(11)
+                for c in columns
+            ))
+        return "\n".join(lines)
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    """Percentile with linear interpolation of an ordered non-empty list"""
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) \
+        * (position - lower)
+
+
+_active_instrumentation: "contextvars.ContextVar[Optional[Instrumentation]]" \
+    = contextvars.ContextVar("smashcima_instrumentation", default=None)
+
+
+def active_instrumentation() -> Optional[Instrumentation]:
+    """Returns the currently active instrumentation, if any"""
+    return _active_instrumentation.get()
+
+
+@contextlib.contextmanager
+def measure(name: str) -> Iterator[None]:
+    """Measures the duration of the wrapped block of code and records it
+    into the currently active instrumentation. Does nothing if there is
+    no active instrumentation or if it is disabled."""
+    instrumentation = _active_instrumentation.get()
+    if instrumentation is None or not instrumentation.enabled:
+        yield
+        return
+    with instrumentation.measure(name):
+        yield
+
+
+def submit_in_context(
+    executor: Executor,
+    function: Callable[..., R],
+    *args: Any
+) -> "Future[R]":
+    """Submits a function to a thread pool, to be executed in a copy
+    of the current context, so that it records its measurements into
+    the currently active instrumentation"""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, function, *args)
@@ -1,2 +1,17 @@
-from .load_score import load_score
-from .MusicXmlLoader import MusicXmlLoader
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .load_score import load_score
+    from .MusicXmlLoader import MusicXmlLoader
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "load_score": ".load_score",
+    "MusicXmlLoader": ".MusicXmlLoader"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
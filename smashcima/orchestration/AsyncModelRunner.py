@@ -0,0 +1,307 @@
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import (Any, Callable, Deque, Generic, List, Optional, Tuple,
+                    TypeVar)
+
+import numpy as np
+
+from smashcima.scene.visual.Page import Page
+
+from .Model import Model
+from .seed_random_streams import derive_seed
+
+
+T = TypeVar("T")
+"""The scene type the model returns"""
+
+R = TypeVar("R")
+"""The return type of a function executed by the runner"""
+
+
+class RunnerOverloadedError(Exception):
+    """Raised when a request is submitted to a runner whose queue
+    of waiting requests is full"""
+    pass
+
+
+class _SharedExclusiveLock:
+    """Lock that can be held by many threads at once (shared), or by
+    a single thread (exclusive). Exclusive requests take precedence."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._exclusive_waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._exclusive or self._exclusive_waiting > 0:
+                self._condition.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._exclusive_waiting += 1
+            while self._exclusive or self._shared > 0:
+                self._condition.wait()
+            self._exclusive_waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class AsyncModelRunner(Generic[T]):
+    """Serves model invocations to asyncio code (e.g. web request handlers).
+
+    Synthesis and rendering are CPU-bound and would block the event loop,
+    so the runner executes them in a thread pool. Models are not
+    thread-safe (they hold the RNG and the picked style), therefore the
+    runner owns a small pool of model instances and each request holds
+    one model exclusively while it runs. The number of models is the
+    concurrency limit. Requests beyond that wait in a FIFO queue and when
+    the queue is full, new requests fail immediately with
+    `RunnerOverloadedError`, so that an overloaded service responds
+    quickly instead of piling up work.
+
+    A scene is always rendered by the model that synthesized it, because
+    the scene uses the compositor (and the RNG) of that model.
+
+    Seeded synthesis re-seeds the process-wide NumPy and Python RNGs,
+    which are also consumed by the work of other models. To keep seeded
+    requests reproducible, a seeded synthesis runs alone, while other
+    requests (unseeded synthesis, rendering, etc.) run concurrently.
+    The model's RNG is used by other requests between the synthesis and
+    the rendering of a scene, so a seeded scene is rendered with its own
+    seed derived from the synthesis seed (the `render(page, seed)` method
+    of the scene receives it, like with the `BaseHandwrittenScene`).
+
+    Requests can be cancelled (e.g. with `asyncio.wait_for`). A waiting
+    request just leaves the queue. A running request cannot be interrupted,
+    its model is returned to the pool once the work in the thread finishes.
+
+    Usage:
+    ```
+    runner = AsyncModelRunner(BaseHandwrittenModel, concurrency=4)
+
+    async def handle_request(path):
+        scene = await runner.synthesize(path)
+        return await runner.render(scene, scene.pages[0])
+    ```
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Model[T]],
+        concurrency: int = 1,
+        max_queued: Optional[int] = None
+    ):
+        """
+        :param model_factory: Callable that constructs the model
+            (e.g. the model class itself). Models share loaded assets
+            via the default asset repository, so additional models
+            are cheap to construct.
+        :param concurrency: Number of model instances, i.e. how many
+            requests are executed at once.
+        :param max_queued: Maximum number of requests waiting for a model,
+            unlimited if None.
+        """
+        assert concurrency >= 1, "Concurrency must be at least one"
+
+        self.models: List[Model[T]] = [
+            model_factory() for _ in range(concurrency)
+        ]
+        """The pool of models used to serve requests"""
+
+        self.max_queued = max_queued
+        """Maximum number of requests waiting for a model"""
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="smashcima-model"
+        )
+        self._idle: List[Model[T]] = list(self.models)
+        self._waiters: Deque[
+            Tuple[Optional[Model[T]], "asyncio.Future[Model[T]]"]
+        ] = deque()
+        self._scene_models: "weakref.WeakKeyDictionary[Any, Model[T]]" \
+            = weakref.WeakKeyDictionary()
+        self._scene_seeds: "weakref.WeakKeyDictionary[Any, int]" \
+            = weakref.WeakKeyDictionary()
+        self._global_random_lock = _SharedExclusiveLock()
+
+    @property
+    def queued_count(self) -> int:
+        """Number of requests waiting for a model"""
+        return len(self._waiters)
+
+    @property
+    def running_count(self) -> int:
+        """Number of requests being executed"""
+        return len(self.models) - len(self._idle)
+
+    async def synthesize(
+        self,
+        *args,
+        seed: Optional[int] = None,
+        configure: Optional[Callable[[Model[T]], None]] = None,
+        **kwargs
+    ) -> T:
+        """Invokes a model with the given arguments and returns the scene.
+
+        :param seed: Makes the synthesized scene reproducible
+            (the synthesis then runs alone, see the class docstring).
+        :param configure: Receives the model before it is invoked
+            (in the thread pool), e.g. to select specific styles.
+        """
+        def _synthesize(model: Model[T]) -> T:
+            if configure is not None:
+                configure(model)
+            return model(*args, seed=seed, **kwargs)
+
+        model = await self._acquire(None)
+        scene = await self._execute(
+            model, _synthesize, exclusive=seed is not None
+        )
+        try:
+            self._scene_models[scene] = model
+            if seed is not None:
+                self._scene_seeds[scene] = derive_seed(seed, "render")
+        except TypeError:
+            pass # the scene type does not support weak references
+        return scene
+
+    async def render(self, scene: Any, page: Page) -> np.ndarray:
+        """Renders the bitmap BGRA image of a page of a synthesized scene
+        (the scene must provide the `render(page)` method, and for seeded
+        scenes the `render(page, seed)` method, like the
+        `BaseHandwrittenScene`)"""
+        try:
+            seed = self._scene_seeds.get(scene)
+        except TypeError:
+            seed = None # the scene type does not support weak references
+        if seed is None:
+            return await self.run(
+                lambda model: scene.render(page), scene=scene
+            )
+        return await self.run(
+            lambda model: scene.render(page, seed=seed), scene=scene
+        )
+
+    async def run(
+        self,
+        function: Callable[[Model[T]], R],
+        scene: Optional[Any] = None
+    ) -> R:
+        """Executes an arbitrary function that receives an exclusively
+        held model (e.g. to configure the model before invoking it).
+
+        :param function: Receives the model, runs in the thread pool.
+        :param scene: If given, the function receives the model that
+            synthesized this scene.
+        """
+        model = await self._acquire(self._model_of(scene))
+        return await self._execute(model, function)
+
+    def _model_of(self, scene: Optional[Any]) -> Optional[Model[T]]:
+        """Returns the model that synthesized the scene, if known"""
+        if scene is None:
+            return None
+        try:
+            return self._scene_models.get(scene)
+        except TypeError:
+            return None # the scene type does not support weak references
+
+    def close(self):
+        """Waits for the running requests and shuts down the thread pool"""
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncModelRunner[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def _execute(
+        self,
+        model: Model[T],
+        function: Callable[[Model[T]], R],
+        exclusive: bool = False
+    ) -> R:
+        """Runs the function with an acquired model in the thread pool
+        and releases the model once the function finishes. An exclusive
+        function runs while no other function runs (and vice versa)."""
+        def _locked(model: Model[T]) -> R:
+            lock = self._global_random_lock
+            with (lock.exclusive() if exclusive else lock.shared()):
+                return function(model)
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, _locked, model)
+        except Exception:
+            self._release(model)
+            raise
+        future.add_done_callback(lambda _: self._release(model))
+
+        # shielded, so that cancellation does not release the model
+        # while the thread is still using it
+        return await asyncio.shield(future)
+
+    async def _acquire(self, model: Optional[Model[T]]) -> Model[T]:
+        """Waits for the given model or any model (if None) to be idle,
+        removes it from the idle models and returns it"""
+        # (no request in the queue can use an idle model, otherwise
+        # it would have received it upon release, so taking it is fair)
+        for idle in self._idle:
+            if model is None or idle is model:
+                self._idle.remove(idle)
+                return idle
+
+        if self.max_queued is not None and \
+                len(self._waiters) >= self.max_queued:
+            raise RunnerOverloadedError(
+                f"There are already {len(self._waiters)} requests waiting."
+            )
+
+        waiter: "asyncio.Future[Model[T]]" = \
+            asyncio.get_running_loop().create_future()
+        self._waiters.append((model, waiter))
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if (model, waiter) in self._waiters:
+                self._waiters.remove((model, waiter))
+            elif waiter.done() and not waiter.cancelled():
+                # the model was handed over just before the cancellation
+                self._release(waiter.result())
+            raise
+
+    def _release(self, model: Model[T]):
+        """Hands the model over to the first request waiting for it,
+        or returns it to the idle models"""
+        for entry in self._waiters:
+            wanted, waiter = entry
+            if waiter.done():
+                continue # cancelled, it removes itself from the queue
+            if wanted is None or wanted is model:
+                self._waiters.remove(entry)
+                waiter.set_result(model)
+                return
+        self._idle.append(model)
@@ -1,15 +1,20 @@
 import copy
+import random
+import uuid
+import weakref
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
 from smashcima.exporting.BitmapRenderer import BitmapRenderer
 from smashcima.exporting.compositing.Compositor import Compositor
+from smashcima.exporting.compositing.CompositorCache import CompositorCache
 from smashcima.exporting.image.ImageLayer import ImageLayer
 from smashcima.geometry import Vector2
+from smashcima.instrumentation import Instrumentation
 from smashcima.loading import load_score
-from smashcima.scene import AffineSpace, Page, Scene, Score
+from smashcima.scene import AffineSpace, Page, Scene, Score, Sprite
 from smashcima.synthesis import (BeamStemSynthesizer,
                                  ColumnMusicNotationSynthesizer,
                                  GlyphSynthesizer, LineSynthesizer,
@@ -28,6 +33,14 @@ from smashcima.synthesis.PageSynthesizer import PageSynthesizer
 from smashcima.synthesis.style.MzkPaperStyleDomain import Patch
 
 from .Model import Model
+from .seed_random_streams import derive_seed
+
+
+def _release_cached_pages(cache: CompositorCache, cache_owner: str):
+    """Drops the cached pages of a scene that was garbage collected"""
+    cache.invalidate_where(
+        lambda owner: isinstance(owner, tuple) and owner[0] == cache_owner
+    )
 
 
 class BaseHandwrittenScene(Scene):
@@ -39,7 +52,9 @@ class BaseHandwrittenScene(Scene):
         mpp_writer: int,
         mzk_background_patch: Patch,
         pages: List[Page],
-        compositor: Compositor
+        compositor: Compositor,
+        instrumentation: Optional[Instrumentation] = None,
+        compositor_cache: Optional[CompositorCache] = None
     ):
         super().__init__(root_space)
         
@@ -61,30 +76,169 @@ class BaseHandwrittenScene(Scene):
         self.dpi: float = 300.0
         """The DPI at which to rasterize the scene"""
 
-        self.__compositor_cache: Dict[int, ImageLayer] = {}
-        """Caches composed image layers fr pages"""
+        self.instrumentation = instrumentation or Instrumentation()
+        """Measures the duration of compositing and rendering
+        (shared with the model that synthesized the scene)"""
+
+        self.compositor_cache = (
+            compositor_cache if compositor_cache is not None
+            else CompositorCache()
+        )
+        """Caches composed image layers of pages, with a memory limit
+        (may be shared with other scenes, the pages of a scene are dropped
+        from it when the scene is garbage collected)"""
+
+        self.drop_sprite_bitmaps = False
+        """Replaces the sprite bitmaps of a page with transparent placeholders
+        (that take no memory) once the page is composed. The composed image
+        is then kept by the scene (outside of the cache), because the page
+        cannot be composed again, not even at a different DPI."""
+
+        self._cache_owner = uuid.uuid4().hex
+
+        # id(cache) -> finalizer that drops the pages of this scene from it
+        self._cache_finalizers: Dict[int, weakref.finalize] = {}
+
+        # page index -> (DPI, image) of pages without sprite bitmaps
+        self._retained_layers: Dict[int, Tuple[float, ImageLayer]] = {}
 
         # add to the list of scene objects
         self.add_many([score, *pages])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        state.pop("_cache_finalizers", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        # scenes pickled before the cache was introduced
+        state.pop("_BaseHandwrittenScene__compositor_cache", None)
+        state.setdefault("compositor_cache", CompositorCache())
+        state.setdefault("drop_sprite_bitmaps", False)
+        state.setdefault("_retained_layers", {})
+
+        # the copy is a different scene, it must not share cached images
+        state["_cache_owner"] = uuid.uuid4().hex
+        state["_cache_finalizers"] = {}
+        super().__setstate__(state)
     
     def compose_page(self, page: Page) -> ImageLayer:
         """Runs the given page through the compositor and returns the image.
         Caches the resulting image layer so that it can be used by multiple
         exporters without recomputing it many times over."""
         assert page in self.pages, "Given page is not in this scene"
-        key = self.pages.index(page)
+        index = self.pages.index(page)
+        owner = (self._cache_owner, index)
+
+        if index in self._retained_layers:
+            dpi, layer = self._retained_layers[index]
+            if dpi != self.dpi:
+                raise Exception(
+                    f"The page was composed at {dpi} DPI and its sprite "
+                    f"bitmaps were dropped, it cannot be composed again "
+                    f"at {self.dpi} DPI."
+                )
+            return layer
+
+        layer = self.compositor_cache.get(owner, self.dpi)
+        if layer is None:
+            with self.instrumentation.activate():
+                layer = self.compositor.run(page.view_box, dpi=self.dpi)
+            if not self.drop_sprite_bitmaps:
+                self._put_in_cache(owner, layer)
+
+        if self.drop_sprite_bitmaps:
+            # the image moves from the cache to the scene
+            self.compositor_cache.invalidate(owner)
+            self._retained_layers[index] = (self.dpi, layer)
+            self._drop_sprite_bitmaps(index)
+
+        return layer
+
+    def _put_in_cache(self, owner: Tuple[str, int], layer: ImageLayer):
+        cache = self.compositor_cache
+        if id(cache) not in self._cache_finalizers:
+            # the cache may outlive the scene (it's shared by the model)
+            self._cache_finalizers[id(cache)] = weakref.finalize(
+                self, _release_cached_pages, cache, self._cache_owner
+            )
+        cache.put(owner, self.dpi, layer)
+
+    def invalidate_composed_pages(self, page: Optional[Page] = None):
+        """Drops the cached images of all pages, or of the given page,
+        so that they are composed again (e.g. after modifying the scene).
+        Pages without sprite bitmaps keep their images."""
+        pages = self.pages if page is None else [page]
+        for p in pages:
+            assert p in self.pages, "Given page is not in this scene"
+            self.compositor_cache.invalidate(
+                (self._cache_owner, self.pages.index(p))
+            )
 
-        if key not in self.__compositor_cache:
-            self.__compositor_cache[key] \
-                = self.compositor.run(page.view_box, dpi=self.dpi)
+    def _drop_sprite_bitmaps(self, index: int):
+        spaces = [self.pages[index].space]
+        while len(spaces) > 0:
+            space = spaces.pop()
+            spaces.extend(space.get_children())
+            for sprite in Sprite.many_of_space(space):
+                sprite.bitmap = np.broadcast_to(
+                    np.zeros(shape=(1, 1, 4), dtype=np.uint8),
+                    sprite.bitmap.shape
+                )
+
+    def compose_variants(
+        self,
+        page: Page,
+        n: int = 8,
+        seed: Optional[int] = None
+    ) -> List[ImageLayer]:
+        """Composits a page into several images that share the extracted
+        layers and differ in postprocessing. The layers are extracted from
+        the scene only once, the postprocessor runs once per variant,
+        each time with an independent random stream.
+
+        :param page: The page to composit.
+        :param n: Number of variants to produce.
+        :param seed: Seed from which the variant streams are derived
+            (drawn from the global `random` module if not given).
+        :returns: The composed image layers, one per variant. They are
+            not cached, unlike the result of `compose_page`.
+        """
+        assert page in self.pages, "Given page is not in this scene"
+        if seed is None:
+            seed = random.getrandbits(63)
+        seeds = [derive_seed(seed, "variant", i) for i in range(n)]
+
+        with self.instrumentation.activate():
+            return self.compositor.run_variants(
+                page.view_box, dpi=self.dpi, seeds=seeds
+            )
 
-        return self.__compositor_cache[key]
+    def render(self, page: Page, seed: Optional[int] = None) -> np.ndarray:
+        """Renders the bitmap BGRA image of a page
 
-    def render(self, page: Page) -> np.ndarray:
-        """Renders the bitmap BGRA image of a page"""
-        layer = self.compose_page(page)
+        :param page: The page to render.
+        :param seed: If given, the postprocessing draws its randomness
+            from a stream derived from this seed (and the page), instead of
+            the model's RNG, so the image is reproducible. Such images are
+            not cached (see `compose_variants`).
+        """
+        if seed is None:
+            layer = self.compose_page(page)
+        else:
+            assert page in self.pages, "Given page is not in this scene"
+            index = self.pages.index(page)
+            if index in self._retained_layers:
+                raise Exception(
+                    "The sprite bitmaps of the page were dropped, "
+                    "it cannot be composed again with a seed."
+                )
+            layer = self.compose_variants(
+                page, n=1, seed=derive_seed(seed, "page", index)
+            )[0]
         renderer = BitmapRenderer()
-        return renderer.render(layer)
+        with self.instrumentation.activate():
+            return renderer.render(layer)
 
 
 class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
@@ -148,6 +302,9 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         c.interface(PaperSynthesizer, MzkQuiltingPaperSynthesizer)
         # c.interface(PaperSynthesizer, SolidColorPaperSynthesizer)
 
+        # compositor cache, shared by all the synthesized scenes
+        c.instance(CompositorCache, CompositorCache())
+
     def resolve_services(self):
         super().resolve_services()
         c = self.container
@@ -155,6 +312,10 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         self.notation_synthesizer = c.resolve(MusicNotationSynthesizer)
         self.page_synthesizer = c.resolve(PageSynthesizer)
 
+        self.compositor_cache = c.resolve(CompositorCache)
+        """Caches the images composed from synthesized scenes, shared by all
+        the scenes so that they hold a bounded amount of memory together"""
+
         self.mpp_style_domain = c.resolve(MuscimaPPStyleDomain)
         self.mzk_paper_style_domain = c.resolve(MzkPaperStyleDomain)
 
@@ -164,7 +325,8 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         data: Union[bytes, str, None] = None,
         format: Optional[str] = None,
         score: Optional[Score] = None,
-        clone_score: bool = False
+        clone_score: bool = False,
+        seed: Optional[int] = None
     ) -> BaseHandwrittenScene:
         """Synthesizes handwritten pages given a musical content.
         
@@ -183,6 +345,8 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             Smashcima Score
         :param clone_score: Should the score be cloned before being embedded
             in the resulting scene
+        :param seed: Seed that makes the synthesized scene reproducible
+            (including its compositing, if done right after the synthesis)
         :returns: The synthesized scene with all the pages
         """
 
@@ -195,15 +359,16 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         # For example, the Model base class sets the self.scene property here.
 
         if score is None:
-            score = self.load_score(
-                file=file,
-                data=data,
-                format=format
-            )
+            with self.instrumentation.measure("load_score"):
+                score = self.load_score(
+                    file=file,
+                    data=data,
+                    format=format
+                )
         elif clone_score:
             score = copy.deepcopy(score)
 
-        return super().__call__(score)
+        return super().__call__(score, seed=seed)
 
     def load_score(
         self,
@@ -238,7 +403,10 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         _PAGE_SPACING = 10 # 1cm
         while next_measure_index < score.measure_count:
             # prepare the next page of music
-            page = self.page_synthesizer.synthesize_page(next_page_origin)
+            with self.instrumentation.measure(
+                "PageSynthesizer.synthesize_page"
+            ):
+                page = self.page_synthesizer.synthesize_page(next_page_origin)
             page.space.parent_space = root_space
             pages.append(page)
 
@@ -248,11 +416,14 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             )
 
             # synthesize music onto the page
-            systems = self.notation_synthesizer.fill_page(
-                page,
-                score,
-                start_on_measure=next_measure_index
-            )
+            with self.instrumentation.measure(
+                "MusicNotationSynthesizer.fill_page"
+            ):
+                systems = self.notation_synthesizer.fill_page(
+                    page,
+                    score,
+                    start_on_measure=next_measure_index
+                )
             next_measure_index = systems[-1].last_measure_index + 1
 
         # construct the complete scene and return
@@ -262,5 +433,7 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             mpp_writer=self.mpp_style_domain.current_writer,
             mzk_background_patch=self.mzk_paper_style_domain.current_patch,
             pages=pages,
-            compositor=self.compositor
+            compositor=self.compositor,
+            instrumentation=self.instrumentation,
+            compositor_cache=self.compositor_cache
         )
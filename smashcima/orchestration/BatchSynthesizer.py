@@ -0,0 +1,361 @@
+import concurrent.futures
+import gc
+import multiprocessing
+import os
+from collections import deque
+from pathlib import Path
+from typing import (Any, Callable, Deque, Dict, Generic, Iterable, Iterator,
+                    Optional, Tuple, TypeVar, Union)
+
+from smashcima.scene.semantic.Score import Score
+
+from .Model import Model
+from .seed_random_streams import derive_seed
+
+
+R = TypeVar("R")
+"""The type of results produced by the batch synthesizer"""
+
+
+BatchInput = Union[Path, str, Score, Dict[str, Any]]
+"""One input sample for the batch synthesizer. Either a path to a file with
+musical content, an already parsed Score, or a dictionary of keyword
+arguments to be passed to the model invocation. A "seed" in the dictionary
+is used only when the batch is not seeded, otherwise the per-sample seed
+overrides it."""
+
+
+def invoke_model(
+    model: Model,
+    item: BatchInput,
+    seed: Optional[int] = None
+) -> Any:
+    """Invokes the model on one batch input item and returns the scene.
+
+    :param seed: The per-sample seed, if given, it overrides the seed
+        in a dictionary item.
+    """
+    if isinstance(item, Score):
+        return model(score=item, seed=seed)
+    if isinstance(item, (Path, str)):
+        return model(file=item, seed=seed)
+    if isinstance(item, dict):
+        if seed is None:
+            return model(**item)
+        return model(**{**item, "seed": seed})
+    raise TypeError(
+        "Unsupported batch input type: " + str(type(item))
+    )
+
+
+def return_scene(model: Model, scene: Any) -> Any:
+    """The default processing function, returns the synthesized scene"""
+    return scene
+
+
+# state of a worker process (each worker process has its own copy)
+_worker_model: Optional[Model] = None
+_worker_process: Optional[Callable[[Model, Any], Any]] = None
+
+
+def _initialize_worker(
+    model_factory: Callable[[], Model],
+    process: Callable[[Model, Any], Any],
+    warm_model: Optional[Model] = None
+):
+    """Runs once in each worker process, builds the worker's model,
+    or adopts the warm model inherited from the parent process"""
+    global _worker_model, _worker_process
+    if warm_model is None:
+        _worker_model = model_factory()
+    else:
+        # Move everything inherited from the parent process out of reach
+        # of the garbage collector, so that collections in this worker
+        # do not write into the memory pages shared with the parent.
+        gc.freeze()
+
+        # all the forked workers inherit the same random state,
+        # so unseeded samples would repeat across workers
+        warm_model.reseed(int.from_bytes(os.urandom(8), "little"))
+        _worker_model = warm_model
+    _worker_process = process
+
+
+def _synthesize_in_worker(item: BatchInput, seed: Optional[int]) -> Any:
+    """Runs in a worker process, synthesizes and processes one sample"""
+    assert _worker_model is not None, "The worker has not been initialized"
+    assert _worker_process is not None
+    scene = invoke_model(_worker_model, item, seed)
+    return _worker_process(_worker_model, scene)
+
+
+class BatchSynthesizer(Generic[R]):
+    """Runs a model over many input samples in a pool of worker processes.
+
+    Each worker process constructs its own model instance via the model
+    factory exactly once and then reuses it for all the samples it receives.
+    The synthesized scene is passed to the `process` function inside the
+    worker and only its return value is sent back to the parent process.
+    Sending back whole scenes is possible (it's the default), but it is slow,
+    because scenes must be pickled. It's better to render the scene and
+    extract annotations in the worker and return only those.
+
+    Inputs are consumed lazily and there are never more than `max_pending`
+    samples submitted to the pool, so that arbitrarily long input
+    iterables do not pile up in memory.
+
+    When a seed is given, each sample receives its own seed derived from
+    the base seed and the sample index. The sample i is then identical
+    regardless of which worker synthesizes it and in what order.
+
+    With warm start (the default, used only with the fork start method,
+    when it is requested or when it is the default start method), the model
+    is constructed only once, in the calling process, and the workers are
+    forked from it. They inherit the resolved services and the loaded assets
+    (e.g. the unpickled symbol repositories) and share their memory
+    copy-on-write, instead of each worker loading its own copy.
+    Because all models resolve assets via the process-wide
+    `AssetRepository.default()`, this works for custom models too.
+    The workers freeze the inherited objects (see `gc.freeze`), so they are
+    never garbage collected in the workers, while the calling process
+    is not affected.
+
+    Usage:
+    ```
+    def render_first_page(model, scene):
+        return scene.render(scene.pages[0])
+
+    with BatchSynthesizer(BaseHandwrittenModel, workers=8,
+                          process=render_first_page) as batch:
+        for index, bitmap in batch.run(musicxml_paths):
+            ...
+    ```
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Model],
+        workers: Optional[int] = None,
+        process: Optional[Callable[[Model, Any], R]] = None,
+        ordered: bool = True,
+        max_pending: Optional[int] = None,
+        start_method: Optional[str] = None,
+        seed: Optional[int] = None,
+        warm_start: bool = True
+    ):
+        """
+        :param model_factory: Picklable callable that constructs the model
+            (e.g. the model class itself).
+        :param workers: Number of worker processes, defaults to the number
+            of CPUs. Zero means that the synthesis runs in the calling process
+            (useful for debugging).
+        :param process: Picklable function that receives the worker's model
+            and the synthesized scene and returns the result to be sent back.
+        :param ordered: If true, results are yielded in the input order,
+            otherwise they are yielded in the completion order.
+        :param max_pending: Maximum number of samples submitted to the pool
+            at once, defaults to twice the number of workers.
+        :param start_method: The multiprocessing start method to use
+            ('fork', 'spawn', 'forkserver'), the platform default if None.
+        :param seed: Base seed from which per-sample seeds are derived,
+            the synthesis is not reproducible if None.
+        :param warm_start: Construct the model in the calling process and
+            fork the workers from it. Ignored unless the fork start method
+            is requested, or it is the default start method.
+        """
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        assert workers >= 0, "Number of workers cannot be negative"
+
+        self.model_factory = model_factory
+        """Constructs the model in each worker process"""
+
+        self.workers = workers
+        """Number of worker processes"""
+
+        self.process: Callable[[Model, Any], R] = process or return_scene
+        """Converts the synthesized scene to the result in the worker"""
+
+        self.ordered = ordered
+        """Whether results are yielded in the input order"""
+
+        self.max_pending = max_pending or max(2 * workers, 1)
+        """Maximum number of samples being synthesized at once"""
+
+        self.start_method = start_method
+        """The multiprocessing start method for the worker processes"""
+
+        self.seed = seed
+        """Base seed from which per-sample seeds are derived"""
+
+        self.warm_start = warm_start
+        """Whether workers are forked from a model built in this process,
+        when the fork start method is used"""
+
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._model: Optional[Model] = None
+
+    def __enter__(self) -> "BatchSynthesizer[R]":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._model = None
+
+    def start(self):
+        """Starts the worker processes right away (otherwise they are
+        started when the first sample is submitted)"""
+        if self.workers > 0:
+            executor = self._get_executor()
+            concurrent.futures.wait(
+                [executor.submit(int) for _ in range(self.workers)]
+            )
+
+    def _get_model(self) -> Model:
+        """Lazily constructs the model in the calling process"""
+        if self._model is None:
+            self._model = self.model_factory()
+        return self._model
+
+    def _forks_warm_workers(self) -> bool:
+        """Whether the warm start applies, the start method is never
+        switched to fork only for it (it's unsafe e.g. on macOS)"""
+        if not self.warm_start:
+            return False
+        if self.start_method is not None:
+            return self.start_method == "fork"
+        return multiprocessing.get_start_method() == "fork"
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Lazily starts the worker pool, it's kept alive between runs"""
+        if self._executor is not None:
+            return self._executor
+
+        if not self._forks_warm_workers():
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=(
+                    multiprocessing.get_context(self.start_method)
+                    if self.start_method is not None else None
+                ),
+                initializer=_initialize_worker,
+                initargs=(self.model_factory, self.process)
+            )
+            return self._executor
+
+        # Build the model here, the forked workers inherit it (initargs
+        # are not pickled with the fork start method). The collection
+        # keeps the garbage from being inherited and frozen in the workers.
+        warm_model = self._get_model()
+        gc.collect()
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_initialize_worker,
+            initargs=(self.model_factory, self.process, warm_model)
+        )
+        return self._executor
+
+    def run(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int = 0
+    ) -> Iterator[Tuple[int, R]]:
+        """Synthesizes all the inputs and yields results with their
+        index in the input iterable.
+
+        :param inputs: Iterable of paths, scores, or invocation kwargs.
+        :param first_index: Index of the first input, useful when resuming
+            an interrupted run (per-sample seeds are derived from indices).
+        :returns: Iterator of (input index, result) pairs.
+        """
+        if self.workers == 0:
+            yield from self._run_in_process(inputs, first_index)
+        elif self.ordered:
+            yield from self._run_ordered(inputs, first_index)
+        else:
+            yield from self._run_unordered(inputs, first_index)
+
+    def __call__(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int = 0
+    ) -> Iterator[Tuple[int, R]]:
+        return self.run(inputs, first_index)
+
+    def sample_seed(self, index: int) -> Optional[int]:
+        """Returns the seed used for the sample with the given index"""
+        if self.seed is None:
+            return None
+        return derive_seed(self.seed, index)
+
+    def _run_in_process(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int
+    ) -> Iterator[Tuple[int, R]]:
+        model = self._get_model()
+        for index, item in enumerate(inputs, start=first_index):
+            scene = invoke_model(model, item, self.sample_seed(index))
+            yield index, self.process(model, scene)
+
+    def _run_ordered(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int
+    ) -> Iterator[Tuple[int, R]]:
+        executor = self._get_executor()
+        pending: Deque[Tuple[int, concurrent.futures.Future]] = deque()
+        try:
+            for index, item in enumerate(inputs, start=first_index):
+                future = executor.submit(
+                    _synthesize_in_worker, item, self.sample_seed(index)
+                )
+                pending.append((index, future))
+                if len(pending) >= self.max_pending:
+                    done_index, future = pending.popleft()
+                    yield done_index, future.result()
+            while len(pending) > 0:
+                done_index, future = pending.popleft()
+                yield done_index, future.result()
+        finally:
+            # the consumer stopped early or a sample failed
+            for _, future in pending:
+                future.cancel()
+
+    def _run_unordered(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int
+    ) -> Iterator[Tuple[int, R]]:
+        executor = self._get_executor()
+        pending: Dict[concurrent.futures.Future, int] = {}
+
+        def _collect_completed():
+            done, _ = concurrent.futures.wait(
+                pending.keys(),
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                yield pending.pop(future), future.result()
+
+        try:
+            for index, item in enumerate(inputs, start=first_index):
+                future = executor.submit(
+                    _synthesize_in_worker, item, self.sample_seed(index)
+                )
+                pending[future] = index
+                if len(pending) >= self.max_pending:
+                    yield from _collect_completed()
+            while len(pending) > 0:
+                yield from _collect_completed()
+        finally:
+            # the consumer stopped early or a sample failed
+            for future in pending.keys():
+                future.cancel()
@@ -1,6 +1,6 @@
 from types import FunctionType
 import punq
-from typing import Callable, List, Optional, Set, TypeVar, Type, Union
+from typing import Callable, Dict, List, Optional, TypeVar, Type, Union
 
 
 T = TypeVar("T")
@@ -22,7 +22,10 @@ class Container:
 
     def __init__(self, register_itself=True) -> None:
         self._container = punq.Container()
-        self._registered_types: Set[Type] = set()
+        # dict used as an ordered set, the registration order must be kept,
+        # because sets of types iterate in an address-dependent order
+        # (which would make style picking irreproducible across processes)
+        self._registered_types: Dict[Type, None] = dict()
 
         # register the container itself into the container
         if register_itself:
@@ -39,7 +42,7 @@ class Container:
         :param instance_type: The service type the instance should be bound to.
         :param instance: The instance that should be returned when resolving.
         """
-        self._registered_types.add(instance_type)
+        self._registered_types[instance_type] = None
         self._container.register(
             service=instance_type,
             instance=instance
@@ -53,7 +56,7 @@ class Container:
         
         :param concrete_type: The type to be registered.
         """
-        self._registered_types.add(concrete_type)
+        self._registered_types[concrete_type] = None
         self._container.register(
             service=concrete_type,
             scope=punq.Scope.singleton
@@ -105,7 +108,7 @@ class Container:
         :param concrete_type: The type to be resolved.
         :param factory: The factory that constructs that type.
         """
-        self._registered_types.add(concrete_type)
+        self._registered_types[concrete_type] = None
         self._container.register(
             service=concrete_type,
             factory=factory,
@@ -7,9 +7,11 @@ from smashcima.exporting.compositing.Compositor import Compositor
 from smashcima.exporting.compositing.DefaultCompositor import DefaultCompositor
 from smashcima.exporting.postprocessing.NullPostprocessor import NullPostprocessor
 from smashcima.exporting.postprocessing.Postprocessor import Postprocessor
+from smashcima.instrumentation import Instrumentation
 from smashcima.synthesis.style.Styler import Styler
 
 from .Container import Container
+from .seed_random_streams import seed_random_streams
 
 
 T = TypeVar("T")
@@ -55,6 +57,9 @@ class Model(Generic[T], abc.ABC):
         # register the default RNG to use during randomization
         self.container.instance(random.Random, random.Random())
 
+        # register the profiling service (disabled until opted-in)
+        self.container.instance(Instrumentation, Instrumentation())
+
         # register the styler,
         # with the container reference provided
         self.container.factory(Styler, lambda: Styler(self.container))
@@ -94,6 +99,12 @@ class Model(Generic[T], abc.ABC):
             Postprocessor # type: ignore
         )
         """Applies augmentation filters during the compositing process"""
+
+        self.instrumentation: Instrumentation = self.container.resolve(
+            Instrumentation
+        )
+        """Measures the duration of synthesis stages (disabled by default,
+        set `model.instrumentation.enabled = True` to opt-in)"""
     
     def configure_services(self):
         """Modifies and configures resolved servies.
@@ -106,19 +117,38 @@ class Model(Generic[T], abc.ABC):
         # controls them properly
         self.styler.register_domains_from_container()
     
-    def __call__(self, *args, **kwargs) -> T:
+    def reseed(self, seed: int):
+        """Seeds all the randomness used during synthesis from a single seed.
+
+        The container RNG, the NumPy global RNG and the Python global RNG
+        each receive an independent sub-stream derived from the seed, so that
+        a sample synthesized with a given seed is identical regardless of
+        which process synthesizes it or what was synthesized before it.
+        """
+        seed_random_streams(self.rng, seed)
+
+    def __call__(self, *args, seed: Optional[int] = None, **kwargs) -> T:
         """Synthesizes a new scene based on the arguments and returns it.
 
         Override this to specify what arguments your model expects
         and perform any pre-synthesis and post-synthesis state changes
         to the model instance (e.g. select styles, remember the scene).
+
+        :param seed: If provided, the model is re-seeded before synthesis,
+            making the synthesized sample reproducible.
         """
 
-        # select the styles used for synthesis of this sample
-        self.styler.pick_style()
+        with self.instrumentation.activate():
+            # make the sample reproducible
+            if seed is not None:
+                self.reseed(seed)
+
+            # select the styles used for synthesis of this sample
+            with self.instrumentation.measure("Styler.pick_style"):
+                self.styler.pick_style()
 
-        # run the synthesis pipeline and build the scene
-        self.scene = self.call(*args, **kwargs)
+            # run the synthesis pipeline and build the scene
+            self.scene = self.call(*args, **kwargs)
 
         # return the new scene
         return self.scene
@@ -0,0 +1,364 @@
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+from typing import (Any, Callable, Dict, Generic, Iterable, Iterator,
+                    Optional, Tuple, TypeVar)
+
+import numpy as np
+
+from smashcima.scene.scene_serialization import dump_scene, load_scene
+
+from .BatchSynthesizer import BatchInput, BatchSynthesizer
+from .Model import Model
+from .seed_random_streams import derive_seed
+
+
+R = TypeVar("R")
+"""The type of results produced by the pipelined synthesizer"""
+
+
+def return_scene(scene: Any) -> Any:
+    """The default raster function, returns the synthesized scene"""
+    return scene
+
+
+def _dump_scene_for_transfer(
+    model: Model,
+    scene: Any,
+    transfer_directory: str
+) -> str:
+    """Runs in a layout worker, stores the scene into a transfer file"""
+    file = tempfile.NamedTemporaryFile(
+        dir=transfer_directory, suffix=".scene", delete=False
+    )
+    file.close()
+    dump_scene(scene, file.name)
+    return file.name
+
+
+# state of a raster worker process (each worker process has its own copy)
+_worker_raster: Optional[Callable[[Any], Any]] = None
+
+
+def _initialize_raster_worker(raster: Callable[[Any], Any]):
+    """Runs once in each raster worker process"""
+    global _worker_raster
+    _worker_raster = raster
+
+    # forked workers share the state of the global RNGs
+    random.seed(os.urandom(8))
+    np.random.seed(int.from_bytes(os.urandom(4), "little"))
+
+
+def _raster_in_worker(path: str, seed: Optional[int]) -> Any:
+    """Runs in a raster worker, loads the scene and rasterizes it"""
+    assert _worker_raster is not None, "The worker has not been initialized"
+    scene = load_scene(path)
+    os.unlink(path) # the memory-mapped data stays available
+
+    # postprocessing filters use the global RNGs
+    if seed is not None:
+        random.seed(derive_seed(seed, "raster", "python"))
+        np.random.seed(derive_seed(seed, "raster", "numpy") % (2 ** 32))
+
+    return _worker_raster(scene)
+
+
+def _start_workers(
+    executor: concurrent.futures.ProcessPoolExecutor,
+    workers: int
+):
+    """Makes the executor start its worker processes right away"""
+    concurrent.futures.wait([executor.submit(int) for _ in range(workers)])
+
+
+_END_OF_INPUT = object()
+"""Sent through the stage queue after the last synthesized scene"""
+
+
+class PipelinedSynthesizer(Generic[R]):
+    """Runs a model over many input samples in two pipelined stages,
+    each with its own pool of worker processes.
+
+    The layout stage invokes the model, producing scenes. It is heavy on
+    Python objects and it is run by a `BatchSynthesizer`. The raster stage
+    converts scenes into results (e.g. composes, postprocesses and encodes
+    page images). It is heavy on NumPy and OpenCV and needs more memory.
+    Sizing the two pools independently lets both stages saturate the
+    machine, instead of each worker alternating between the two.
+
+    Scenes are passed between the stages via files in a temporary directory
+    (in shared memory, if available), in the compact binary format (see
+    `dump_scene`). Raster workers memory-map them, so bitmaps are not copied
+    through pipes. The stages are connected by a bounded queue and the
+    number of samples in flight is bounded as well, so a slower stage holds
+    back the faster one instead of accumulating scenes in memory.
+
+    The raster function runs with the global RNGs seeded from the sample
+    seed, so the results are reproducible, regardless of the pool sizes
+    (but they differ from rasterizing right after the synthesis, as done
+    by the `BatchSynthesizer`).
+
+    Usage:
+    ```
+    def render_first_page(scene):
+        return scene.render(scene.pages[0])
+
+    with PipelinedSynthesizer(BaseHandwrittenModel, layout_workers=4,
+                              raster_workers=12,
+                              raster=render_first_page) as pipeline:
+        for index, bitmap in pipeline.run(musicxml_paths):
+            ...
+    ```
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Model],
+        layout_workers: Optional[int] = None,
+        raster_workers: Optional[int] = None,
+        raster: Optional[Callable[[Any], R]] = None,
+        ordered: bool = True,
+        max_pending: Optional[int] = None,
+        start_method: Optional[str] = None,
+        seed: Optional[int] = None,
+        warm_start: bool = True,
+        transfer_directory: Optional[str] = None
+    ):
+        """
+        :param model_factory: Picklable callable that constructs the model
+            (e.g. the model class itself).
+        :param layout_workers: Number of worker processes invoking the model,
+            defaults to a quarter of the CPUs.
+        :param raster_workers: Number of worker processes rasterizing scenes,
+            defaults to the remaining CPUs.
+        :param raster: Picklable function that receives the synthesized scene
+            in a raster worker and returns the result to be sent back.
+        :param ordered: If true, results are yielded in the input order,
+            otherwise they are yielded in the completion order.
+        :param max_pending: Maximum number of samples in flight (in either
+            stage, in between, or waiting to be yielded in order), defaults
+            to twice the total number of workers.
+        :param start_method: The multiprocessing start method to use
+            ('fork', 'spawn', 'forkserver'), the platform default if None.
+        :param seed: Base seed from which per-sample seeds are derived,
+            the synthesis is not reproducible if None.
+        :param warm_start: Construct the model in the calling process and
+            fork the layout workers from it (see `BatchSynthesizer`).
+        :param transfer_directory: Where a temporary directory for scenes
+            passed between the stages is created, defaults to /dev/shm
+            (if it exists) or the system temporary directory.
+        """
+        cpu_count = multiprocessing.cpu_count()
+        if layout_workers is None:
+            layout_workers = max(cpu_count // 4, 1)
+        if raster_workers is None:
+            raster_workers = max(cpu_count - layout_workers, 1)
+        assert layout_workers >= 1, "There must be a layout worker"
+        assert raster_workers >= 1, "There must be a raster worker"
+        if transfer_directory is None and os.path.isdir("/dev/shm"):
+            transfer_directory = "/dev/shm"
+
+        self.layout_workers = layout_workers
+        """Number of worker processes invoking the model"""
+
+        self.raster_workers = raster_workers
+        """Number of worker processes rasterizing scenes"""
+
+        self.raster: Callable[[Any], R] = raster or return_scene
+        """Converts the synthesized scene to the result in the worker"""
+
+        self.ordered = ordered
+        """Whether results are yielded in the input order"""
+
+        self.max_pending = max_pending or 2 * (layout_workers + raster_workers)
+        """Maximum number of samples in flight"""
+
+        self.start_method = start_method
+        """The multiprocessing start method for the worker processes"""
+
+        self.seed = seed
+        """Base seed from which per-sample seeds are derived"""
+
+        self._transfer_directory = tempfile.mkdtemp(
+            prefix="smashcima-pipeline-", dir=transfer_directory
+        )
+
+        self._layout = BatchSynthesizer(
+            model_factory,
+            workers=layout_workers,
+            process=functools.partial(
+                _dump_scene_for_transfer,
+                transfer_directory=self._transfer_directory
+            ),
+            # (scenes enter the raster stage in order, so that the reorder
+            # buffer holds at most the samples being rasterized)
+            ordered=ordered,
+            max_pending=2 * layout_workers,
+            start_method=start_method,
+            seed=seed,
+            warm_start=warm_start
+        )
+        self._raster_executor: Optional[
+            concurrent.futures.ProcessPoolExecutor
+        ] = None
+
+    def __enter__(self) -> "PipelinedSynthesizer[R]":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker processes and removes transfer files"""
+        self._layout.close()
+        if self._raster_executor is not None:
+            self._raster_executor.shutdown(wait=True)
+            self._raster_executor = None
+        shutil.rmtree(self._transfer_directory, ignore_errors=True)
+
+    def sample_seed(self, index: int) -> Optional[int]:
+        """Returns the seed used for the sample with the given index"""
+        return self._layout.sample_seed(index)
+
+    def _get_raster_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Lazily starts the raster pool, it's kept alive between runs"""
+        if self._raster_executor is None:
+            self._raster_executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.raster_workers,
+                mp_context=(
+                    multiprocessing.get_context(self.start_method)
+                    if self.start_method is not None else None
+                ),
+                initializer=_initialize_raster_worker,
+                initargs=(self.raster,)
+            )
+            _start_workers(self._raster_executor, self.raster_workers)
+        return self._raster_executor
+
+    def run(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int = 0
+    ) -> Iterator[Tuple[int, R]]:
+        """Synthesizes all the inputs and yields results with their
+        index in the input iterable.
+
+        :param inputs: Iterable of paths, scores, or invocation kwargs.
+        :param first_index: Index of the first input, useful when resuming
+            an interrupted run (per-sample seeds are derived from indices).
+        :returns: Iterator of (input index, result) pairs.
+        """
+        # Start the layout pool first, its warm workers are forked from
+        # the model before this process runs any threads of its own (the
+        # management threads of the pools and the feeder), unless the
+        # caller started some. The raster workers may be forked from
+        # a multi-threaded process, they only build their state from
+        # the picklable raster function.
+        self._layout.start()
+        executor = self._get_raster_executor()
+
+        # the layout stage runs in a thread that feeds the bounded queue
+        scenes: "queue.Queue[Any]" = queue.Queue(maxsize=self.raster_workers)
+        stop = threading.Event()
+        feeder = threading.Thread(
+            target=self._feed_scenes,
+            args=(inputs, first_index, scenes, stop),
+            name="smashcima-layout-feeder",
+            daemon=True
+        )
+        feeder.start()
+
+        pending: Dict[concurrent.futures.Future, int] = {}
+        finished: Dict[int, R] = {} # the reorder buffer
+        next_index = first_index
+        input_exhausted = False
+        try:
+            while True:
+                # move scenes from the queue into the raster stage,
+                # as long as the number of samples in flight allows it
+                while not input_exhausted \
+                        and len(pending) + len(finished) < self.max_pending:
+                    try:
+                        item = scenes.get(block=len(pending) == 0)
+                    except queue.Empty:
+                        break
+                    if item is _END_OF_INPUT:
+                        input_exhausted = True
+                    elif isinstance(item, BaseException):
+                        raise item
+                    else:
+                        index, path = item
+                        future = executor.submit(
+                            _raster_in_worker, path, self.sample_seed(index)
+                        )
+                        pending[future] = index
+
+                if len(pending) == 0:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    pending.keys(),
+                    timeout=None if input_exhausted else 0.05,
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    index = pending.pop(future)
+                    if self.ordered:
+                        finished[index] = future.result()
+                    else:
+                        yield index, future.result()
+                while next_index in finished:
+                    yield next_index, finished.pop(next_index)
+                    next_index += 1
+
+            assert len(finished) == 0, "Some samples were not yielded"
+        finally:
+            # the consumer stopped early or a sample failed
+            stop.set()
+            for future in pending.keys():
+                future.cancel()
+            feeder.join()
+
+    def __call__(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int = 0
+    ) -> Iterator[Tuple[int, R]]:
+        return self.run(inputs, first_index)
+
+    def _feed_scenes(
+        self,
+        inputs: Iterable[BatchInput],
+        first_index: int,
+        scenes: "queue.Queue[Any]",
+        stop: threading.Event
+    ):
+        """Runs the layout stage and puts the (index, transfer file path)
+        pairs into the queue, followed by the end marker or an exception"""
+        def _put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    scenes.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        layout = self._layout.run(inputs, first_index)
+        try:
+            for index, path in layout:
+                if not _put((index, path)):
+                    return
+            _put(_END_OF_INPUT)
+        except BaseException as e:
+            _put(e)
+        finally:
+            layout.close() # cancels the pending layout work
+
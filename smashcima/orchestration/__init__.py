@@ -1,7 +1,40 @@
-# core types
-from .Container import Container
-from .Model import Model
+from typing import TYPE_CHECKING
 
-# specific models
-from .BaseHandwrittenModel import BaseHandwrittenModel, BaseHandwrittenScene
-from .OmniOMRModel import OmniOMRModel
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    # core types
+    from .Container import Container
+    from .Model import Model
+
+    # batch synthesis
+    from .BatchSynthesizer import BatchSynthesizer
+    from .PipelinedSynthesizer import PipelinedSynthesizer
+
+    # serving
+    from .AsyncModelRunner import AsyncModelRunner, RunnerOverloadedError
+
+    # specific models
+    from .BaseHandwrittenModel import BaseHandwrittenModel, BaseHandwrittenScene
+    from .OmniOMRModel import OmniOMRModel
+
+    # dataset generation
+    from .generate_dataset import generate_dataset
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "Container": ".Container",
+    "Model": ".Model",
+    "BatchSynthesizer": ".BatchSynthesizer",
+    "PipelinedSynthesizer": ".PipelinedSynthesizer",
+    "AsyncModelRunner": ".AsyncModelRunner",
+    "RunnerOverloadedError": ".AsyncModelRunner",
+    "BaseHandwrittenModel": ".BaseHandwrittenModel",
+    "BaseHandwrittenScene": ".BaseHandwrittenModel",
+    "OmniOMRModel": ".OmniOMRModel",
+    "generate_dataset": ".generate_dataset"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
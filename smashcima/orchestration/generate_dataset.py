@@ -0,0 +1,182 @@
+import functools
+import json
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Tuple,
+                    Union)
+
+import cv2
+
+from smashcima.exporting.BitmapRenderer import BitmapRenderer
+from smashcima.exporting.ShardWriter import ShardWriter
+
+from .BaseHandwrittenModel import BaseHandwrittenScene
+from .BatchSynthesizer import BatchSynthesizer
+from .Model import Model
+from .PipelinedSynthesizer import PipelinedSynthesizer
+
+
+CORPUS_FILE_SUFFIXES = [".musicxml"]
+"""Files in the corpus directory with these suffixes are used as inputs"""
+
+
+def list_corpus_files(corpus_directory: Union[Path, str]) -> List[Path]:
+    """Lists all music files in a corpus directory (recursively)
+    in a stable order"""
+    return sorted(
+        path for path in Path(corpus_directory).rglob("*")
+        if path.is_file() and path.suffix in CORPUS_FILE_SUFFIXES
+    )
+
+
+def render_pages(
+    scene: BaseHandwrittenScene,
+    dpi: float
+) -> List[Tuple[bytes, Dict[str, Any]]]:
+    """Renders all pages of a synthesized scene into PNG images with
+    annotations (region labels with pixel bounding boxes).
+    Runs inside the worker process."""
+    scene.dpi = dpi
+    renderer = BitmapRenderer()
+
+    pages: List[Tuple[bytes, Dict[str, Any]]] = []
+    for page_index, page in enumerate(scene.pages):
+        layer = scene.compose_page(page)
+        success, png = cv2.imencode(".png", renderer.render(layer))
+        assert success, "PNG encoding failed"
+
+        regions = []
+        for region in layer.regions:
+            bbox = region.get_bbox_in_space(layer.space)
+            regions.append({
+                "label": region.label,
+                "bbox": [bbox.left, bbox.top, bbox.width, bbox.height]
+            })
+
+        annotation = {
+            "page": page_index,
+            "page_count": len(scene.pages),
+            "width": layer.width,
+            "height": layer.height,
+            "dpi": layer.dpi,
+            "regions": regions
+        }
+        pages.append((png.tobytes(), annotation))
+    return pages
+
+
+def _render_pages_with_model(
+    model: Model,
+    scene: BaseHandwrittenScene,
+    dpi: float
+) -> List[Tuple[bytes, Dict[str, Any]]]:
+    """The `BatchSynthesizer` process function variant of `render_pages`"""
+    return render_pages(scene, dpi)
+
+
+def generate_dataset(
+    corpus_directory: Union[Path, str],
+    output_directory: Union[Path, str],
+    model_factory: Callable[[], Model],
+    samples: int,
+    dpi: float = 300,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    max_shard_size: int = 1024 * 1024 * 1024,
+    raster_workers: Optional[int] = None
+) -> Iterator[int]:
+    """Synthesizes a dataset of page images with annotations and streams
+    it into tar shards (see `ShardWriter`).
+
+    The sample i is synthesized from the i-th corpus file (cycling over
+    the corpus) with a seed derived from the base seed and the sample
+    index. Each page of the sample is stored as a separate record
+    (a PNG image and a JSON annotation) with the key
+    `{sample:09d}_p{page:02d}`.
+
+    If the output directory contains a manifest from an interrupted run
+    with the same arguments, the generation resumes after the last
+    complete shard. Because samples are seeded by their index, the
+    resumed dataset is the same as if the run never crashed. A finished
+    dataset can also be extended by running again with more samples.
+
+    :param corpus_directory: Directory with MusicXML files.
+    :param output_directory: Directory for the shards and the manifest.
+    :param model_factory: Picklable callable constructing the model
+        (e.g. `BaseHandwrittenModel`).
+    :param samples: Total number of samples (model invocations).
+    :param dpi: Resolution of the rendered pages.
+    :param workers: Number of worker processes (CPU count if None).
+    :param seed: Base seed of the whole dataset.
+    :param max_shard_size: Shard size limit in bytes.
+    :param raster_workers: If given, the synthesis and the rendering run
+        in two separate pools (see `PipelinedSynthesizer`), with `workers`
+        synthesizing scenes and `raster_workers` rendering them. Otherwise
+        each worker does both.
+    :returns: Iterator that yields indices of written samples (the work
+        is done as the iterator is consumed).
+    """
+    corpus = list_corpus_files(corpus_directory)
+    if len(corpus) == 0:
+        raise Exception(f"No music files found in {corpus_directory}")
+
+    # paths relative to the corpus directory, so that the same dataset
+    # is recognized regardless of how the directory path is spelled
+    sources = [
+        path.relative_to(corpus_directory).as_posix() for path in corpus
+    ]
+
+    metadata: Dict[str, Any] = {
+        "corpus": sources,
+        "model": getattr(model_factory, "__qualname__", str(model_factory)),
+        "dpi": dpi,
+        "seed": seed
+    }
+    if raster_workers is not None:
+        # the pipelined rendering is seeded differently,
+        # the two modes cannot be mixed in one dataset
+        metadata["pipelined"] = True
+
+    with ShardWriter(
+        output_directory,
+        max_shard_size=max_shard_size,
+        metadata=metadata
+    ) as writer:
+        first_sample = writer.next_sample_index
+        inputs = (
+            corpus[index % len(corpus)]
+            for index in range(first_sample, samples)
+        )
+        # (shards must contain a prefix of the dataset, hence ordered)
+        if raster_workers is None:
+            batch = BatchSynthesizer(
+                model_factory,
+                workers=workers,
+                process=functools.partial(_render_pages_with_model, dpi=dpi),
+                ordered=True,
+                seed=seed
+            )
+        else:
+            batch = PipelinedSynthesizer(
+                model_factory,
+                layout_workers=workers,
+                raster_workers=raster_workers,
+                raster=functools.partial(render_pages, dpi=dpi),
+                ordered=True,
+                seed=seed
+            )
+        with batch:
+            for index, pages in batch.run(inputs, first_index=first_sample):
+                records: Dict[str, Dict[str, bytes]] = {}
+                for page_index, (png, annotation) in enumerate(pages):
+                    annotation = {
+                        "sample": index,
+                        "source": sources[index % len(corpus)],
+                        "seed": batch.sample_seed(index),
+                        **annotation
+                    }
+                    records[f"{index:09d}_p{page_index:02d}"] = {
+                        "png": png,
+                        "json": json.dumps(annotation).encode("utf-8")
+                    }
+                writer.write(records)
+                yield index
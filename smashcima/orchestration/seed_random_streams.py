@@ -0,0 +1,37 @@
+import hashlib
+import random
+from typing import Union
+
+import numpy as np
+
+
+def derive_seed(seed: int, *keys: Union[int, str]) -> int:
+    """Derives an independent 64-bit seed from a base seed and a sequence
+    of keys. The derivation is stable across processes, platforms and
+    Python versions (it does not depend on the salted `hash()` function).
+
+    For example, `derive_seed(1234, 42)` is the seed for the sample 42 of
+    a dataset generated with the seed 1234.
+    """
+    path = "/".join([str(int(seed)), *(str(k) for k in keys)])
+    digest = hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, byteorder="little")
+
+
+def seed_random_streams(rng: random.Random, seed: int):
+    """Seeds all the random number generators used during synthesis
+    from a single seed, each with its own independent sub-stream.
+
+    There are three generators that must be controlled for the synthesis
+    to be reproducible:
+    - the model's `random.Random` instance from the service container
+    - the NumPy global RNG (used for example by the `Quilter`)
+    - the Python global `random` module (used by augraphy filters)
+
+    :param rng: The model's RNG instance (it is re-seeded in-place,
+        because all the services hold a reference to it).
+    :param seed: The seed for the synthesized sample.
+    """
+    rng.seed(derive_seed(seed, "container"))
+    np.random.seed(derive_seed(seed, "numpy") % (2 ** 32))
+    random.seed(derive_seed(seed, "python"))
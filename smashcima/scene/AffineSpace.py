@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, ClassVar, List, Optional
 
 from ..geometry.Transform import Transform
 from .SceneObject import SceneObject
@@ -22,6 +22,47 @@ class AffineSpace(SceneObject):
     to the parent's space coordinates, effectively defining the placement of
     this space within the parent space."""
 
+    # NOTE: The transform to the root space is cached in the instance
+    # dictionary (not as a dataclass field). When the `transform` or the
+    # `parent_space` of a space changes, the cached transforms of the space
+    # and of its whole subtree are discarded. A space can only have its
+    # transform cached if all its ancestors have it cached, so the discarding
+    # stops at spaces that have nothing cached.
+
+    move_count: ClassVar[int] = 0
+    """Incremented whenever any affine space is moved (its transform or
+    parent changes), lets caches of spatial information detect changes"""
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name == "transform" or name == "parent_space":
+            AffineSpace.move_count += 1
+            self._invalidate_transform_to_root()
+
+    def _invalidate_transform_to_root(self):
+        stack: List[AffineSpace] = [self]
+        while len(stack) > 0:
+            space = stack.pop()
+            if space.__dict__.pop("_transform_to_root", None) is None:
+                continue
+            stack.extend(
+                link.source for link in
+                space.inlinks.find("parent_space", AffineSpace)
+            )
+
+    def get_transform_to_root(self) -> Transform:
+        """Returns the transform from this space to the root space
+        (cached until this space or any of its ancestors is moved)"""
+        cached = self.__dict__.get("_transform_to_root")
+        if cached is not None:
+            return cached
+        if self.parent_space is None:
+            t = self.transform
+        else:
+            t = self.transform.then(self.parent_space.get_transform_to_root())
+        self.__dict__["_transform_to_root"] = t
+        return t
+
     def get_children(self) -> List["AffineSpace"]:
         """Returns child affine spaces as a list"""
         return AffineSpace.many_of(self, lambda s: s.parent_space)
@@ -38,13 +79,26 @@ class AffineSpace(SceneObject):
         if sub_space is None:
             raise ValueError("The given space should not be None")
         
+        if sub_space is self:
+            return Transform.identity()
+
+        # the cached transform, when going all the way to the root
+        # (which only holds if the root transform is the identity)
+        t = self.transform
+        if self.parent_space is None and \
+                (t.a, t.b, t.c, t.d, t.e, t.f) == (1, 0, 0, 1, 0, 0):
+            if sub_space.get_root() is not self:
+                raise Exception(
+                    "The given sub space is not attached under this space"
+                )
+            return sub_space.get_transform_to_root()
+
+        # otherwise compose the chain up to this space
         t = Transform.identity()
         s: Optional[AffineSpace] = sub_space
-        
         while s is not None:
             if s is self:
                 return t
-            
             t = t.then(s.transform)
             s = s.parent_space
 
@@ -15,7 +15,8 @@ class AffineSpaceVisitor(abc.ABC):
     def run(self):
         """Executes the tree visiting algorithm"""
         # IMPORTANT: Iterate in the order in which inlinks are listed!
-        for link in self.space.inlinks:
+        # (over a copy, visits may modify the scene)
+        for link in list(self.space.inlinks):
             if isinstance(link.source, AffineSpace):
                 sub_visitor = self.create_sub_visitor(link.source)
                 sub_visitor.run()
@@ -77,9 +77,8 @@ class ComposedGlyph(Glyph):
         sprites: List[Sprite] = [s for g in sub_glyphs for s in g.sprites]
 
         # gather contours
-        contours = Contours([
-            c for g in sub_glyphs
-            for c in g.region.get_contours_in_space(space).polygons
+        contours = Contours.concatenate([
+            g.region.get_contours_in_space(space) for g in sub_glyphs
         ])
 
         return ComposedGlyph(
@@ -1,10 +1,9 @@
 from dataclasses import dataclass
 from typing import List
 
-import cv2
 import numpy as np
 
-from smashcima.geometry import Contours, Point, Polygon, Rectangle
+from smashcima.geometry import Contours, Point, Rectangle
 
 from .AffineSpace import AffineSpace
 from .LabeledRegion import LabeledRegion
@@ -87,7 +86,10 @@ class Glyph(SceneObject):
         assert all(s.space is space for s in sprites), \
             "All provided sprites must be in the same affine space"
         
-        contour_polygons: List[Polygon] = []
+        # lazy import opencv (the scene should be usable without it)
+        import cv2
+
+        sprite_contours: List[Contours] = []
 
         # for each sprite
         for sprite in sprites:
@@ -103,16 +105,14 @@ class Glyph(SceneObject):
             # wrap the results in geometry instances
             transform = sprite.get_pixels_to_origin_space_transform()\
                 .then(sprite.transform)
-            for cv_contour in cv_contours:
-                polygon = transform.apply_to(
-                    Polygon.from_cv2_contour(cv_contour)
-                )
-                contour_polygons.append(polygon)
+            sprite_contours.append(transform.apply_to(
+                Contours.from_cv2_contours(cv_contours)
+            ))
         
         # build the final region instance
         return LabeledRegion(
             space=space,
-            contours=Contours(contour_polygons),
+            contours=Contours.concatenate(sprite_contours),
             label=label
         )
     
@@ -0,0 +1,456 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from smashcima.geometry import Contours, Quad, Rectangle, Transform
+
+from .AffineSpace import AffineSpace
+from .AffineSpaceVisitor import AffineSpaceVisitor
+from .ComposedGlyph import ComposedGlyph
+from .Glyph import Glyph
+from .LabeledRegion import LabeledRegion
+from .SceneObject import SceneObject
+from .Sprite import Sprite
+from .ViewBox import ViewBox
+from .visual.Page import Page
+
+
+class GlyphStore:
+    """Compact, columnar snapshot of the glyphs, regions and sprites
+    placed under an affine space (e.g. a synthesized page).
+
+    Instead of a graph of scene objects (glyphs with their affine spaces,
+    regions, sprites and links), the store keeps a few NumPy arrays with one
+    row per glyph, region or sprite. Transforms are stored as the six
+    numbers of the affine matrix (see `Transform`), labels as indices into
+    the `labels` list and references between the objects as row indices
+    (-1 stands for none). Sprite bitmaps are referenced, not copied.
+
+    The store is built from a finished scene and it is read-only. It is meant
+    for holding many synthesized pages in memory (e.g. waiting to be
+    composited), the scene objects can be released once the store is built.
+    Glyphs, regions and sprites can be accessed via lightweight views.
+    All coordinates are in the space the store was built from.
+    """
+
+    def __init__(self, view_rectangle: Rectangle):
+        self.view_rectangle = view_rectangle
+        """The viewed rectangle (e.g. the page), in the store space"""
+
+        self.labels: List[str] = []
+        """Distinct labels of glyphs and regions"""
+
+        self.bitmaps: List[np.ndarray] = []
+        """Distinct sprite bitmaps (BGRA uint8 arrays)"""
+
+        self.glyph_transforms = np.zeros((0, 6), dtype=np.float64)
+        """(G, 6) transforms from glyph spaces to the store space"""
+
+        self.glyph_labels = np.zeros(0, dtype=np.int32)
+        """(G,) label indices of glyphs"""
+
+        self.glyph_regions = np.zeros(0, dtype=np.int32)
+        """(G,) region index of each glyph"""
+
+        self.glyph_parents = np.zeros(0, dtype=np.int32)
+        """(G,) index of the composed glyph that the glyph is part of"""
+
+        self.region_labels = np.zeros(0, dtype=np.int32)
+        """(R,) label indices of regions"""
+
+        self.region_glyphs = np.zeros(0, dtype=np.int32)
+        """(R,) index of the (not composed) glyph that owns the region"""
+
+        self.region_offsets = np.zeros(1, dtype=np.int64)
+        """(R + 1,) region `i` consists of polygons from `region_offsets[i]`
+        to `region_offsets[i + 1]` (exclusive)"""
+
+        self.polygon_offsets = np.zeros(1, dtype=np.int64)
+        """(P + 1,) polygon `i` consists of points from `polygon_offsets[i]`
+        to `polygon_offsets[i + 1]` (exclusive)"""
+
+        self.coordinates = np.zeros((0, 2), dtype=np.float64)
+        """(N, 2) coordinates of all the region polygon points"""
+
+        self.sprite_transforms = np.zeros((0, 6), dtype=np.float64)
+        """(S, 6) transforms from sprite pixel spaces to the store space,
+        sprites are in the rendering order"""
+
+        self.sprite_bitmaps = np.zeros(0, dtype=np.int32)
+        """(S,) bitmap index of each sprite"""
+
+        self.sprite_glyphs = np.zeros(0, dtype=np.int32)
+        """(S,) index of the (not composed) glyph that owns the sprite"""
+
+    @staticmethod
+    def from_space(
+        space: AffineSpace,
+        view_rectangle: Optional[Rectangle] = None
+    ) -> "GlyphStore":
+        """Builds the store from all the objects placed under the space.
+
+        :param space: The space to collect objects from, it becomes
+            the store space.
+        :param view_rectangle: The viewed rectangle in the space,
+            the bounding box of all the regions if None.
+        """
+        visitor = GlyphStoreVisitor(
+            space, Transform.identity(), {}, [], [], []
+        )
+        visitor.run()
+        store = GlyphStore(view_rectangle or Rectangle(0, 0, 0, 0))
+        store._fill(visitor)
+        if view_rectangle is None and len(store.coordinates) > 0:
+            store.view_rectangle = Contours.from_arrays(
+                store.coordinates, np.array([0, len(store.coordinates)])
+            ).bbox()
+        return store
+
+    @staticmethod
+    def from_view_box(view_box: ViewBox) -> "GlyphStore":
+        """Builds the store of the whole scene framed by the view box
+        (with the same assumption as the compositor, that the view box
+        is placed in the root space of the scene)"""
+        return GlyphStore.from_space(
+            view_box.space.get_root(),
+            view_box.rectangle
+        )
+
+    @staticmethod
+    def from_page(page: Page) -> "GlyphStore":
+        """Builds the store of a page, in the page space, viewing
+        the page view box"""
+        view_box = page.view_box
+        to_page = view_box.space.transform_from(page.space).inverse()
+        return GlyphStore.from_space(
+            page.space,
+            to_page.apply_to(Quad.from_rectangle(view_box.rectangle)).bbox()
+        )
+
+    def _fill(self, visitor: "GlyphStoreVisitor"):
+        label_ids: Dict[str, int] = {}
+        bitmap_ids: Dict[int, int] = {}
+
+        def label_id(label: str) -> int:
+            if label not in label_ids:
+                label_ids[label] = len(self.labels)
+                self.labels.append(label)
+            return label_ids[label]
+
+        # glyphs (also those only reachable from regions and sprites)
+        glyphs = list(visitor.glyphs)
+        glyph_ids: Dict[int, int] = {id(g): i for i, g in enumerate(glyphs)}
+        owners = [
+            _owning_glyph(obj) for obj in
+            [*visitor.regions, *(s for s, _ in visitor.sprites)]
+        ]
+        for glyph in owners:
+            if glyph is not None and id(glyph) not in glyph_ids:
+                glyph_ids[id(glyph)] = len(glyphs)
+                glyphs.append(glyph)
+
+        def glyph_id(glyph: Optional[Glyph]) -> int:
+            return -1 if glyph is None else glyph_ids[id(glyph)]
+
+        # regions
+        region_ids: Dict[int, int] = {}
+        region_contours: List[Contours] = []
+        for region in visitor.regions:
+            region_ids[id(region)] = len(region_contours)
+            transform = visitor.transforms[id(region.space)]
+            region_contours.append(transform.apply_to(region.contours))
+        self.region_labels = np.array(
+            [label_id(r.label) for r in visitor.regions], dtype=np.int32
+        )
+        self.region_glyphs = np.array(
+            [glyph_id(g) for g in owners[:len(visitor.regions)]],
+            dtype=np.int32
+        )
+        self.region_offsets = np.concatenate(
+            ([0], np.cumsum([len(c.offsets) - 1 for c in region_contours]))
+        ).astype(np.int64)
+        contours = Contours.concatenate(region_contours)
+        self.polygon_offsets = contours.offsets
+        self.coordinates = contours.coordinates
+
+        # glyphs
+        parents: Dict[int, int] = {}
+        for i, glyph in enumerate(glyphs):
+            if isinstance(glyph, ComposedGlyph):
+                for sub_glyph in glyph.sub_glyphs:
+                    parents[id(sub_glyph)] = i
+        self.glyph_transforms = _transforms_array([
+            visitor.transforms.get(id(g.space), Transform.identity())
+            for g in glyphs
+        ])
+        self.glyph_labels = np.array(
+            [label_id(g.label) for g in glyphs], dtype=np.int32
+        )
+        self.glyph_regions = np.array(
+            [region_ids.get(id(g.region), -1) for g in glyphs],
+            dtype=np.int32
+        )
+        self.glyph_parents = np.array(
+            [parents.get(id(g), -1) for g in glyphs], dtype=np.int32
+        )
+
+        # sprites
+        for sprite, _ in visitor.sprites:
+            if id(sprite.bitmap) not in bitmap_ids:
+                bitmap_ids[id(sprite.bitmap)] = len(self.bitmaps)
+                self.bitmaps.append(sprite.bitmap)
+        self.sprite_transforms = _transforms_array(
+            [t for _, t in visitor.sprites]
+        )
+        self.sprite_bitmaps = np.array(
+            [bitmap_ids[id(s.bitmap)] for s, _ in visitor.sprites],
+            dtype=np.int32
+        )
+        self.sprite_glyphs = np.array(
+            [glyph_id(g) for g in owners[len(visitor.regions):]],
+            dtype=np.int32
+        )
+
+    @property
+    def glyph_count(self) -> int:
+        return len(self.glyph_labels)
+
+    @property
+    def region_count(self) -> int:
+        return len(self.region_labels)
+
+    @property
+    def sprite_count(self) -> int:
+        return len(self.sprite_bitmaps)
+
+    @property
+    def glyphs(self) -> List["GlyphView"]:
+        """Views of all the glyphs"""
+        return [GlyphView(self, i) for i in range(self.glyph_count)]
+
+    @property
+    def regions(self) -> List["RegionView"]:
+        """Views of all the regions"""
+        return [RegionView(self, i) for i in range(self.region_count)]
+
+    @property
+    def sprites(self) -> List["SpriteView"]:
+        """Views of all the sprites, in the rendering order"""
+        return [SpriteView(self, i) for i in range(self.sprite_count)]
+
+    def region_contours(self, index: int) -> Contours:
+        """Contours of the region (a view into the store arrays)"""
+        first = self.region_offsets[index]
+        last = self.region_offsets[index + 1]
+        offsets = self.polygon_offsets[first:last + 1]
+        return Contours.from_arrays(
+            self.coordinates[offsets[0]:offsets[-1]],
+            offsets - offsets[0]
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the arrays of the store (excluding sprite bitmaps)"""
+        return sum(
+            value.nbytes for value in self.__dict__.values()
+            if isinstance(value, np.ndarray)
+        )
+
+
+class GlyphView:
+    """Lightweight read-only view of a glyph in a glyph store"""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: GlyphStore, index: int):
+        self.store = store
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"GlyphView({self.index}, {self.label!r})"
+
+    @property
+    def label(self) -> str:
+        return self.store.labels[self.store.glyph_labels[self.index]]
+
+    @property
+    def transform(self) -> Transform:
+        """Transform from the glyph space to the store space"""
+        return Transform.from_values(
+            *self.store.glyph_transforms[self.index].tolist()
+        )
+
+    @property
+    def region(self) -> Optional["RegionView"]:
+        region = int(self.store.glyph_regions[self.index])
+        return None if region < 0 else RegionView(self.store, region)
+
+    @property
+    def parent(self) -> Optional["GlyphView"]:
+        """The composed glyph that this glyph is part of"""
+        parent = int(self.store.glyph_parents[self.index])
+        return None if parent < 0 else GlyphView(self.store, parent)
+
+    @property
+    def sub_glyphs(self) -> List["GlyphView"]:
+        """Glyphs that make up this glyph, if it is a composed glyph"""
+        indices = np.flatnonzero(self.store.glyph_parents == self.index)
+        return [GlyphView(self.store, i) for i in indices.tolist()]
+
+    @property
+    def sprites(self) -> List["SpriteView"]:
+        """Sprites of the glyph (and of its sub-glyphs)"""
+        glyphs: Set[int] = set()
+        pending = [self.index]
+        while len(pending) > 0:
+            glyph = pending.pop()
+            glyphs.add(glyph)
+            pending.extend(
+                np.flatnonzero(self.store.glyph_parents == glyph).tolist()
+            )
+        indices = np.flatnonzero(
+            np.isin(self.store.sprite_glyphs, list(glyphs))
+        )
+        return [SpriteView(self.store, i) for i in indices.tolist()]
+
+    def bbox(self) -> Rectangle:
+        """Bounding box of the glyph region, in the store space"""
+        region = self.region
+        if region is None:
+            raise ValueError("The glyph has no region in the store")
+        return region.bbox()
+
+
+class RegionView:
+    """Lightweight read-only view of a labeled region in a glyph store"""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: GlyphStore, index: int):
+        self.store = store
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"RegionView({self.index}, {self.label!r})"
+
+    @property
+    def label(self) -> str:
+        return self.store.labels[self.store.region_labels[self.index]]
+
+    @property
+    def contours(self) -> Contours:
+        """Contours of the region in the store space"""
+        return self.store.region_contours(self.index)
+
+    @property
+    def glyph(self) -> Optional[GlyphView]:
+        glyph = int(self.store.region_glyphs[self.index])
+        return None if glyph < 0 else GlyphView(self.store, glyph)
+
+    def bbox(self) -> Rectangle:
+        """Bounding box of the region, in the store space"""
+        return self.contours.bbox()
+
+
+class SpriteView:
+    """Lightweight read-only view of a sprite in a glyph store"""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: GlyphStore, index: int):
+        self.store = store
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"SpriteView({self.index})"
+
+    @property
+    def bitmap(self) -> np.ndarray:
+        return self.store.bitmaps[self.store.sprite_bitmaps[self.index]]
+
+    @property
+    def transform(self) -> Transform:
+        """Transform from the sprite pixel space to the store space"""
+        return Transform.from_values(
+            *self.store.sprite_transforms[self.index].tolist()
+        )
+
+    @property
+    def glyph(self) -> Optional[GlyphView]:
+        glyph = int(self.store.sprite_glyphs[self.index])
+        return None if glyph < 0 else GlyphView(self.store, glyph)
+
+    @property
+    def pixels_bbox(self) -> Rectangle:
+        """Sprite bounding box in its pixel space"""
+        height, width = self.bitmap.shape[:2]
+        return Rectangle(0, 0, width, height)
+
+
+class GlyphStoreVisitor(AffineSpaceVisitor):
+    """Collects objects for the glyph store, together with
+    the transforms of their spaces to the store space"""
+
+    def __init__(
+        self,
+        space: AffineSpace,
+        transform: Transform,
+        transforms: Dict[int, Transform],
+        glyphs: List[Glyph],
+        regions: List[LabeledRegion],
+        sprites: List[Tuple[Sprite, Transform]]
+    ):
+        super().__init__(space)
+        self.transform = transform
+        self.transforms = transforms
+        self.transforms[id(space)] = transform
+        self.glyphs = glyphs
+        self.regions = regions
+        self.sprites = sprites
+
+    def create_sub_visitor(
+        self,
+        sub_space: AffineSpace
+    ) -> "GlyphStoreVisitor":
+        return GlyphStoreVisitor(
+            sub_space,
+            sub_space.transform.then(self.transform),
+            self.transforms,
+            self.glyphs,
+            self.regions,
+            self.sprites
+        )
+
+    def accept_sub_visitor(self, sub_visitor: "GlyphStoreVisitor"):
+        # nothing - all visitors write to the same lists
+        pass
+
+    def visit_scene_object(self, obj: SceneObject):
+        if isinstance(obj, Glyph):
+            self.glyphs.append(obj)
+        elif isinstance(obj, LabeledRegion):
+            self.regions.append(obj)
+        elif isinstance(obj, Sprite):
+            self.sprites.append((
+                obj,
+                obj.get_pixels_to_parent_space_transform()
+                    .then(self.transform)
+            ))
+
+
+def _owning_glyph(obj: SceneObject) -> Optional[Glyph]:
+    """The glyph that owns the region or sprite, composed glyphs are
+    skipped (the same as when compositing)"""
+    if isinstance(obj, LabeledRegion):
+        glyphs = Glyph.many_of(obj, lambda g: g.region)
+    else:
+        glyphs = Glyph.many_of(obj, lambda g: g.sprites)
+    glyphs = [g for g in glyphs if not isinstance(g, ComposedGlyph)]
+    return glyphs[0] if len(glyphs) > 0 else None
+
+
+def _transforms_array(transforms: List[Transform]) -> np.ndarray:
+    return np.array(
+        [(t.a, t.b, t.c, t.d, t.e, t.f) for t in transforms],
+        dtype=np.float64
+    ).reshape(-1, 6)
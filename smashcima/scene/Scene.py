@@ -1,5 +1,12 @@
-from typing import TypeVar, Type, Optional, List, Dict
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Type, TypeVar)
+
+from smashcima.geometry import Rectangle
+from smashcima.geometry.SpatialIndex import SpatialIndex
+
 from .AffineSpace import AffineSpace
+from .Glyph import Glyph
+from .LabeledRegion import LabeledRegion
 from .SceneObject import SceneObject
 
 
@@ -19,9 +26,72 @@ class Scene:
         self.objects: Dict[int, SceneObject] = {}
         "Tracks all scene objects"
 
+        self._reset_caches()
+
         # add the root space into the scene as a scene object
         self.add(self.root_space)
-    
+
+    # NOTE: Objects are also indexed by their exact type, so that `find`
+    # does not scan all the objects. The index is kept up to date by `add`
+    # and it is rebuilt whenever the `objects` dictionary is modified
+    # directly (replaced or its size differs from the index).
+
+    def _reset_caches(self):
+        self._objects_by_type: Dict[type, Dict[int, SceneObject]] = {}
+        self._positions: Dict[int, int] = {}
+        self._indexed_objects: Optional[Dict[int, SceneObject]] = None
+        self._matching_types: Dict[type, List[type]] = {}
+
+        # object ID -> appended link counts (inlinks, outlinks) at the time
+        # when objects linked to the object were added
+        self._expanded: Dict[int, Tuple[int, int]] = {}
+
+        # space ID -> (space, object count, move count, index of regions)
+        self._region_indices: Dict[
+            int, Tuple[AffineSpace, int, int, SpatialIndex[LabeledRegion]]
+        ] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        for name in ["_objects_by_type", "_positions", "_indexed_objects",
+                     "_matching_types", "_expanded", "_region_indices"]:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._reset_caches()
+
+        # scene objects are tracked by their IDs, which have changed
+        self.objects = {id(obj): obj for obj in self.objects.values()}
+
+    def _get_index(self) -> Dict[type, Dict[int, SceneObject]]:
+        if self._indexed_objects is not self.objects \
+                or len(self._positions) != len(self.objects):
+            self._objects_by_type = {}
+            self._positions = {}
+            self._matching_types = {}
+            self._expanded = {}
+            for key, obj in self.objects.items():
+                self._objects_by_type.setdefault(type(obj), {})[key] = obj
+                self._positions[key] = len(self._positions)
+            self._indexed_objects = self.objects
+        return self._objects_by_type
+
+    def _insert(self, obj: SceneObject):
+        """Puts the object into the objects dictionary and the index"""
+        key = id(obj)
+        index = self._get_index()
+        if key in self.objects:
+            return
+        self.objects[key] = obj
+        self._positions[key] = len(self._positions)
+        obj_type = type(obj)
+        if obj_type not in index:
+            index[obj_type] = {}
+            self._matching_types.clear()
+        index[obj_type][key] = obj
+
     def has(self, obj: SceneObject) -> bool:
         return id(obj) in self.objects
 
@@ -35,28 +105,45 @@ class Scene:
         if skip_if_added and self.has(obj):
             return
 
-        self.objects[id(obj)] = obj
-        
-        # recursion down
-        if recurse_via_outlinks:
+        self._insert(obj)
+
+        # depth-first traversal, visiting objects in the same order
+        # as recursion would (first down via outlinks, then up via inlinks),
+        # but without the risk of hitting the recursion limit
+        stack: List[Iterator[SceneObject]] = [
+            self._expand(obj, recurse_via_inlinks, recurse_via_outlinks)
+        ]
+        while len(stack) > 0:
+            linked = next(stack[-1], None)
+            if linked is None:
+                stack.pop()
+                continue
+            if self.has(linked):
+                continue
+            self._insert(linked)
+            stack.append(
+                self._expand(linked, recurse_via_inlinks, recurse_via_outlinks)
+            )
+
+    def _expand(
+        self,
+        obj: SceneObject,
+        via_inlinks: bool,
+        via_outlinks: bool
+    ) -> Iterator[SceneObject]:
+        """Yields objects linked to the given object"""
+        if via_inlinks and via_outlinks:
+            self._expanded[id(obj)] = (
+                obj.inlinks.appended_count,
+                obj.outlinks.appended_count
+            )
+        if via_outlinks:
             for link in obj.outlinks:
-                self.add(
-                    link.target,
-                    skip_if_added=True,
-                    recurse_via_inlinks=recurse_via_inlinks,
-                    recurse_via_outlinks=recurse_via_outlinks
-                )
-
-        # recursion up
-        if recurse_via_inlinks:
+                yield link.target
+        if via_inlinks:
             for link in obj.inlinks:
-                self.add(
-                    link.source,
-                    skip_if_added=True,
-                    recurse_via_inlinks=recurse_via_inlinks,
-                    recurse_via_outlinks=recurse_via_outlinks
-                )
-    
+                yield link.source
+
     def add_many(
         self,
         objs: List[SceneObject],
@@ -71,14 +158,123 @@ class Scene:
                 recurse_via_inlinks=recurse_via_inlinks,
                 recurse_via_outlinks=recurse_via_outlinks
             )
-    
+
     def add_closure(self):
         """Add all scene objects linked from already added scene objects"""
+        # only objects whose links were not followed yet, or that gained
+        # new links since then, need to be expanded
         for obj in list(self.objects.values()):
+            expanded = self._expanded.get(id(obj))
+            if expanded is not None and expanded == (
+                obj.inlinks.appended_count,
+                obj.outlinks.appended_count
+            ):
+                continue
             self.add(obj, skip_if_added=False)
 
     def find(self, obj_type: Type[T]) -> List[T]:
-        return [
-            obj for obj in self.objects.values()
-            if isinstance(obj, obj_type)
-        ]
+        """Returns all objects of the given type (including subclasses),
+        in the order in which they were added"""
+        index = self._get_index()
+        matching_types = self._matching_types.get(obj_type)
+        if matching_types is None:
+            matching_types = [t for t in index if issubclass(t, obj_type)]
+            self._matching_types[obj_type] = matching_types
+
+        if len(matching_types) == 0:
+            return []
+        if len(matching_types) == 1:
+            return list(index[matching_types[0]].values()) # type: ignore
+
+        # objects of more types, restore the order in which they were added
+        keys = [key for t in matching_types for key in index[t].keys()]
+        keys.sort(key=self._positions.__getitem__)
+        return [self.objects[key] for key in keys] # type: ignore
+
+    ###################
+    # Spatial queries #
+    ###################
+
+    def get_region_index(
+        self,
+        space: Optional[AffineSpace] = None
+    ) -> SpatialIndex[LabeledRegion]:
+        """Returns the spatial index of all labeled regions placed under
+        the given space, by their bounding boxes in that space.
+
+        The index is built on first use and it is rebuilt after objects
+        are added to the scene or after any affine space is moved.
+
+        :param space: The space of the bounding boxes, the root space
+            of the scene if None (e.g. a page space).
+        """
+        if space is None:
+            space = self.root_space
+
+        cached = self._region_indices.get(id(space))
+        if cached is not None and cached[0] is space \
+                and cached[1] == len(self.objects) \
+                and cached[2] == AffineSpace.move_count:
+            return cached[3]
+
+        regions: List[LabeledRegion] = []
+        bboxes: List[Rectangle] = []
+        for region in self.find(LabeledRegion):
+            if not _is_placed_under(region.space, space):
+                continue
+            if len(region.contours.coordinates) == 0:
+                continue
+            regions.append(region)
+            bboxes.append(region.get_bbox_in_space(space))
+
+        index = SpatialIndex(regions, bboxes)
+        self._region_indices[id(space)] = (
+            space, len(self.objects), AffineSpace.move_count, index
+        )
+        return index
+
+    def regions_in(
+        self,
+        rectangle: Rectangle,
+        labels: Optional[Iterable[str]] = None,
+        space: Optional[AffineSpace] = None
+    ) -> List[LabeledRegion]:
+        """Returns labeled regions whose bounding box intersects
+        the rectangle, in the order in which they were added to the scene.
+
+        :param rectangle: The queried window (e.g. a crop of a page).
+        :param labels: Return only regions with one of these labels.
+        :param space: The space of the rectangle coordinates, the root
+            space of the scene if None (e.g. a page space).
+        """
+        regions = self.get_region_index(space).query(rectangle)
+        if labels is not None:
+            labels = set(labels)
+            regions = [r for r in regions if r.label in labels]
+        return regions
+
+    def glyphs_in(
+        self,
+        rectangle: Rectangle,
+        labels: Optional[Iterable[str]] = None,
+        space: Optional[AffineSpace] = None
+    ) -> List[Glyph]:
+        """Returns glyphs whose region bounding box intersects
+        the rectangle (see `regions_in`)"""
+        glyphs: List[Glyph] = []
+        for region in self.regions_in(rectangle, labels, space):
+            glyph = Glyph.of_or_none(region, lambda g: g.region)
+            if glyph is not None:
+                glyphs.append(glyph)
+        return glyphs
+
+
+def _is_placed_under(
+    space: Optional[AffineSpace],
+    ancestor: AffineSpace
+) -> bool:
+    while space is not None:
+        if space is ancestor:
+            return True
+        space = space.parent_space
+    return False
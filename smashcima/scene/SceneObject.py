@@ -1,4 +1,8 @@
-from typing import Any, Callable, Tuple, Type, TypeVar, List, Optional
+import copyreg
+import heapq
+from itertools import islice
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    SupportsIndex, Tuple, Type, TypeVar, Union)
 from dataclasses import dataclass, field
 
 from smashcima.scene.nameof_via_dummy import nameof_via_dummy
@@ -18,10 +22,24 @@ class Link:
     target: "SceneObject"
     name: str
 
+    __slots__ = ("source", "target", "name")
+
     def __init__(self, source: "SceneObject", target: "SceneObject", name: str):
         self.source = source
         self.target = target
         self.name = name
+
+    def __hash__(self) -> int:
+        # links are equal when they link the very same objects
+        return hash((id(self.source), id(self.target), self.name))
+
+    def __getstate__(self) -> Tuple["SceneObject", "SceneObject", str]:
+        return (self.source, self.target, self.name)
+
+    def __setstate__(self, state: Any):
+        if isinstance(state, dict): # pickled before slots were introduced
+            state = (state["source"], state["target"], state["name"])
+        self.source, self.target, self.name = state
     
     def __eq__(self, other) -> bool:
         if not isinstance(other, Link):
@@ -49,34 +67,366 @@ class Link:
         self.target.inlinks.remove(self)
 
 
+class LinkList:
+    """Insertion-ordered list of links of a scene object (its inlinks
+    or outlinks), indexed by the link name and the source object type.
+
+    Adding and removing a link is O(1) and finding links with a given
+    name and source type takes time proportional to the number of found
+    links, regardless of how many other links there are (the root space
+    of a page has thousands of inlinks). Iteration yields links in the order
+    in which they were added. The list must not be modified while iterating
+    over it, iterate over a copy (`list(links)`) to do that.
+    """
+
+    __slots__ = ("_links", "_index", "appended_count")
+
+    def __init__(self, links: Iterable[Link] = ()):
+        self._links: Dict[int, Link] = {id(l): l for l in links}
+        """All the links, keyed by their identity"""
+
+        self._index: Optional[
+            Dict[str, Dict[type, Dict[int, Tuple[int, Link]]]]
+        ] = None
+        """Links (with their sequence numbers that give the insertion order)
+        by their name and by the type of their source object. Built lazily,
+        because links are not fully constructed yet when unpickling
+        a scene."""
+
+        self.appended_count = len(self._links)
+        """Number of links ever appended to the list (it changes whenever
+        a link is added, see `Scene.add_closure`)"""
+
+    def _get_index(
+        self
+    ) -> Dict[str, Dict[type, Dict[int, Tuple[int, Link]]]]:
+        if self._index is None:
+            self._index = {}
+            # (sequence numbers of appended links continue after these,
+            # because the appended count is at least the number of links)
+            for sequence, (key, link) in enumerate(self._links.items()):
+                self._index.setdefault(link.name, {}) \
+                    .setdefault(type(link.source), {})[key] = (sequence, link)
+        return self._index
+
+    def append(self, link: Link):
+        """Adds the link to the end of the list"""
+        self._links[id(link)] = link
+        if self._index is not None:
+            self._index.setdefault(link.name, {}) \
+                .setdefault(type(link.source), {})[id(link)] \
+                = (self.appended_count, link)
+        self.appended_count += 1
+
+    def extend(self, links: Iterable[Link]):
+        """Adds the links to the end of the list"""
+        for link in links:
+            self.append(link)
+
+    def remove(self, link: Link):
+        """Removes the link (the very instance) from the list"""
+        if self._links.pop(id(link), None) is None:
+            raise ValueError("The link is not in the list")
+        if self._index is not None:
+            by_type = self._index[link.name]
+            group = by_type[type(link.source)]
+            del group[id(link)]
+            if len(group) == 0:
+                del by_type[type(link.source)]
+                if len(by_type) == 0:
+                    del self._index[link.name]
+
+    def named(self, name: str) -> List[Link]:
+        """Returns links with the given name, in the insertion order"""
+        return self.find(name, object)
+
+    def find(self, name: Optional[str], source_type: type) -> List[Link]:
+        """Returns links with the given name (any name if None), whose
+        source is an instance of the given type, in the insertion order"""
+        index = self._get_index()
+        if name is None:
+            by_types = list(index.values())
+        elif name in index:
+            by_types = [index[name]]
+        else:
+            return []
+
+        groups = [
+            group
+            for by_type in by_types
+            for t, group in by_type.items()
+            if issubclass(t, source_type)
+        ]
+        if len(groups) == 0:
+            return []
+        if len(groups) == 1:
+            return [link for _, link in groups[0].values()]
+
+        # links of more source types, each group is in the insertion order,
+        # merge them by the sequence numbers
+        return [
+            link for _, link in heapq.merge(*(g.values() for g in groups))
+        ]
+
+    def __iter__(self) -> Iterator[Link]:
+        return iter(self._links.values())
+
+    def __len__(self) -> int:
+        return len(self._links)
+
+    def __getitem__(self, index: int) -> Link:
+        """Returns the link at the given position, O(n) in the position
+        (links are not stored in an array, prefer iteration or `find`)"""
+        if isinstance(index, slice):
+            return list(self._links.values())[index] # type: ignore
+        if index < 0:
+            index = len(self._links) + index
+        if index < 0 or index >= len(self._links):
+            raise IndexError("Link index out of range")
+        return next(islice(self._links.values(), index, None))
+
+    def __contains__(self, link: Any) -> bool:
+        return id(link) in self._links
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LinkList):
+            return list(self._links.values()) == list(other._links.values())
+        if isinstance(other, list):
+            return list(self._links.values()) == other
+        return False
+
+    def __repr__(self) -> str:
+        return repr(list(self._links.values()))
+
+    def __getstate__(self) -> List[Link]:
+        return list(self._links.values())
+
+    def __setstate__(self, state: List[Link]):
+        self._links = {id(l): l for l in state}
+        self._index = None
+        self.appended_count = len(self._links)
+
+
+class SceneObjectList(list):
+    """List field of a scene object that keeps the scene graph links
+    up to date when it is modified in-place.
+
+    Lists assigned to scene object fields are wrapped in this type,
+    so that `append`, `extend`, `insert`, `remove`, `pop`, item assignment
+    and deletion add and remove links to the affected items only.
+    Growing a list one item at a time is thus O(1) per item, instead of
+    re-linking all the items on each reassignment of the whole list.
+
+    The assigned list is copied into the wrapper, the field does not alias
+    the caller's list. After `obj.items = x`, modifying `x` does not affect
+    `obj.items` (nor the links), the list must be modified via the field.
+    """
+
+    __slots__ = ("_owner", "_name", "_links")
+
+    def __init__(
+        self,
+        owner: Optional["SceneObject"],
+        name: str,
+        items: Iterable[Any] = ()
+    ):
+        super().__init__(items)
+
+        self._owner = owner
+        """The scene object whose field this list is (None when the list
+        is no longer assigned to the field and so it is not linked)"""
+
+        self._name = name
+        """Name of the field and of its links"""
+
+        self._links: Optional[Dict[int, List[Link]]] = {}
+        """Links from the owner to the items, keyed by item IDs.
+        Built lazily from the owner's outlinks after unpickling."""
+
+        for item in self:
+            self._link(item)
+
+    @staticmethod
+    def wrap(owner: "SceneObject", name: str, items: List[Any]):
+        """Wraps items whose links already exist (e.g. after unpickling)"""
+        wrapped = SceneObjectList(None, name, items)
+        wrapped._owner = owner
+        wrapped._links = None
+        return wrapped
+
+    def release(self):
+        """Disconnects the list from its owner (without removing links),
+        further modifications do not affect the scene graph"""
+        self._owner = None
+        self._links = {}
+
+    def _get_links(self) -> Dict[int, List[Link]]:
+        if self._links is None:
+            self._links = {}
+            if self._owner is not None:
+                for link in self._owner.outlinks.named(self._name):
+                    self._links.setdefault(id(link.target), []).append(link)
+        return self._links
+
+    def _link(self, item: Any):
+        if self._owner is None or not isinstance(item, SceneObject):
+            return
+        link = Link(source=self._owner, target=item, name=self._name)
+        link.attach()
+        self._get_links().setdefault(id(item), []).append(link)
+
+    def _unlink(self, item: Any):
+        if self._owner is None or not isinstance(item, SceneObject):
+            return
+        links = self._get_links()
+        item_links = links.get(id(item))
+        if not item_links:
+            return
+        item_links.pop().detach()
+        if len(item_links) == 0:
+            del links[id(item)]
+
+    def append(self, item: Any):
+        super().append(item)
+        self._link(item)
+
+    def extend(self, items: Iterable[Any]):
+        items = list(items)
+        super().extend(items)
+        for item in items:
+            self._link(item)
+
+    def __iadd__( # type: ignore
+        self,
+        items: Iterable[Any]
+    ) -> "SceneObjectList":
+        self.extend(items)
+        return self
+
+    def __imul__(self, count: SupportsIndex) -> "SceneObjectList":
+        if int(count) <= 0:
+            self.clear()
+        else:
+            self.extend(list(self) * (int(count) - 1))
+        return self
+
+    def insert(self, index: SupportsIndex, item: Any):
+        super().insert(index, item)
+        self._link(item)
+
+    def remove(self, item: Any):
+        del self[self.index(item)]
+
+    def pop(self, index: SupportsIndex = -1) -> Any:
+        item = super().pop(index)
+        self._unlink(item)
+        return item
+
+    def clear(self):
+        items = list(self)
+        super().clear()
+        for item in items:
+            self._unlink(item)
+
+    def __setitem__(self, key: Union[SupportsIndex, slice], value: Any):
+        if isinstance(key, slice):
+            removed = super().__getitem__(key)
+            added = list(value)
+            super().__setitem__(key, added)
+        else:
+            removed = [super().__getitem__(key)]
+            added = [value]
+            super().__setitem__(key, value)
+        for item in removed:
+            self._unlink(item)
+        for item in added:
+            self._link(item)
+
+    def __delitem__(self, key: Union[SupportsIndex, slice]):
+        removed = super().__getitem__(key)
+        super().__delitem__(key)
+        for item in (removed if isinstance(key, slice) else [removed]):
+            self._unlink(item)
+
+    def __copy__(self) -> List[Any]:
+        return list(self)
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Any:
+        # items are part of the state, so that unpickling does not
+        # call `extend` (links are pickled with the scene objects)
+        return (
+            copyreg.__newobj__, (SceneObjectList,),
+            (self._owner, self._name, list(self))
+        )
+
+    def __setstate__(self, state: Tuple[Any, str, List[Any]]):
+        owner, name, items = state
+        super().extend(items)
+        self._owner = owner
+        self._name = name
+        self._links = None
+
+
 @dataclass
 class SceneObject:
-    inlinks: List[Link] = field(default_factory=list, init=False, repr=False)
-    outlinks: List[Link] = field(default_factory=list, init=False, repr=False)
+    inlinks: LinkList = field(default_factory=LinkList, init=False, repr=False)
+    outlinks: LinkList = field(default_factory=LinkList, init=False, repr=False)
 
     def __setattr__(self, name: str, value: Any) -> None:
-        if name == "inlinks":
-            pass
-        elif name == "outlinks":
-            pass
+        if name == "inlinks" or name == "outlinks":
+            if not isinstance(value, LinkList):
+                value = LinkList(value)
         elif isinstance(value, SceneObject):
+            self._release_list(name)
             self._destroy_outlinks_for(name)
             Link(source=self, target=value, name=name).attach()
-        elif isinstance(value, list) or isinstance(value, set):
-            # TODO: hook into mutation methods or freeze the instances!
+        elif isinstance(value, list):
+            # (the list is copied, see `SceneObjectList`)
+            self._release_list(name)
+            self._destroy_outlinks_for(name)
+            value = SceneObjectList(self, name, value)
+        elif isinstance(value, set):
+            # NOTE: sets are linked when assigned, in-place modifications
+            # are not tracked (unlike lists)
+            self._release_list(name)
             self._destroy_outlinks_for(name)
             for item in value:
                 if isinstance(item, SceneObject):
                     Link(source=self, target=item, name=name).attach()
         else:
+            self._release_list(name)
             self._destroy_outlinks_for(name)
 
         super().__setattr__(name, value)
     
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+
+        # scene objects pickled before links were indexed hold plain lists
+        for name in ["inlinks", "outlinks"]:
+            if not isinstance(self.__dict__.get(name), LinkList):
+                self.__dict__[name] = LinkList(self.__dict__.get(name, []))
+
+        self._wrap_list_fields()
+
+    def _wrap_list_fields(self):
+        """Wraps plain list fields (of objects pickled before lists were
+        link-aware), their links are restored separately"""
+        for name, value in self.__dict__.items():
+            if type(value) is list:
+                self.__dict__[name] = SceneObjectList.wrap(self, name, value)
+
+    def _release_list(self, name: str):
+        value = self.__dict__.get(name)
+        if isinstance(value, SceneObjectList) and value._owner is self:
+            value.release()
+
     def _destroy_outlinks_for(self, name: str):
-        for link in list(self.outlinks):
-            if link.name == name:
-                link.detach()
+        outlinks = self.outlinks
+        if len(outlinks) == 0:
+            return
+        for link in outlinks.named(name):
+            link.detach()
 
     ########################
     # Relationship queries #
@@ -90,11 +440,7 @@ class SceneObject:
     ) -> Tuple[List[T], str]:
         name = nameof_via_dummy(cls, name_probe)
         return (
-            [
-                link.source for link in subject.inlinks
-                if isinstance(link.source, cls)
-                    and (name is None or link.name == name)
-            ],
+            [link.source for link in subject.inlinks.find(name, cls)],
             name
         )
 
@@ -1,26 +1,71 @@
-# -----------------------------------------------------------------------------
-# import local types
-from .AffineSpace import AffineSpace
-from .AffineSpaceVisitor import AffineSpaceVisitor
-from .ComposedGlyph import ComposedGlyph
-from .Glyph import Glyph
-from .LabeledRegion import LabeledRegion
-from .LineGlyph import LineGlyph
-from .Region import Region
-from .Scene import Scene
-from .SceneObject import SceneObject
-from .ScenePoint import ScenePoint
-from .SmashcimaLabels import SmashcimaLabels
-from .SmuflLabels import SmuflLabels
-from .Sprite import Sprite
-from .ViewBox import ViewBox
+from typing import TYPE_CHECKING
 
-# -----------------------------------------------------------------------------
-# import nested types
-from .semantic import *
-from .visual import *
+from smashcima._lazy_exports import lazy_exports
 
-# -----------------------------------------------------------------------------
-# import sub-modules to make them accessible from this module
-from smashcima.scene import semantic
-from smashcima.scene import visual
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    # -------------------------------------------------------------------------
+    # import local types
+    from .AffineSpace import AffineSpace
+    from .AffineSpaceVisitor import AffineSpaceVisitor
+    from .ComposedGlyph import ComposedGlyph
+    from .Glyph import Glyph
+    from .GlyphStore import GlyphStore, GlyphView, RegionView, SpriteView
+    from .LabeledRegion import LabeledRegion
+    from .LineGlyph import LineGlyph
+    from .Region import Region
+    from .Scene import Scene
+    from .SceneObject import SceneObject
+    from .ScenePoint import ScenePoint
+    from .SmashcimaLabels import SmashcimaLabels
+    from .SmuflLabels import SmuflLabels
+    from .Sprite import Sprite
+    from .ViewBox import ViewBox
+
+    # -------------------------------------------------------------------------
+    # import functions
+    from .scene_serialization import (dump_scene, dumps_scene, load_scene,
+                                      loads_scene)
+
+    # -------------------------------------------------------------------------
+    # import nested types
+    from .semantic import *
+    from .visual import *
+
+    # -------------------------------------------------------------------------
+    # import sub-modules to make them accessible from this module
+    from smashcima.scene import semantic
+    from smashcima.scene import visual
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "AffineSpace": ".AffineSpace",
+    "AffineSpaceVisitor": ".AffineSpaceVisitor",
+    "ComposedGlyph": ".ComposedGlyph",
+    "Glyph": ".Glyph",
+    "GlyphStore": ".GlyphStore",
+    "GlyphView": ".GlyphStore",
+    "RegionView": ".GlyphStore",
+    "SpriteView": ".GlyphStore",
+    "LabeledRegion": ".LabeledRegion",
+    "LineGlyph": ".LineGlyph",
+    "Region": ".Region",
+    "Scene": ".Scene",
+    "SceneObject": ".SceneObject",
+    "ScenePoint": ".ScenePoint",
+    "SmashcimaLabels": ".SmashcimaLabels",
+    "SmuflLabels": ".SmuflLabels",
+    "Sprite": ".Sprite",
+    "ViewBox": ".ViewBox",
+    "dump_scene": ".scene_serialization",
+    "dumps_scene": ".scene_serialization",
+    "load_scene": ".scene_serialization",
+    "loads_scene": ".scene_serialization"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(
+    __name__, _EXPORTS,
+    nested=[".semantic", ".visual"],
+    submodules=["semantic", "visual"]
+)
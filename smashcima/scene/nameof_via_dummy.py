@@ -1,4 +1,6 @@
-from typing import Any, Callable, Type, TypeVar
+import dis
+from types import CodeType
+from typing import Any, Callable, Dict, Optional, Type, TypeVar, Union
 
 
 T = TypeVar("T")
@@ -12,11 +14,58 @@ class _Dummy:
         return name
 
 
-def nameof_via_dummy(examined_type: Type[T], probe: Callable[[T], Any]) -> str:
+_DUMMY = _Dummy()
+
+
+_names_by_code: Dict[CodeType, Optional[str]] = {}
+"""Resolved names by the code object of the probe, None for probes
+whose result may differ between calls (and so cannot be cached)"""
+
+
+def _is_pure_probe(probe: Callable) -> bool:
+    """Whether the probe result depends only on its code, i.e. the probe
+    does not read captured variables, globals, or default arguments"""
+    if getattr(probe, "__closure__", None) is not None:
+        return False
+    if getattr(probe, "__defaults__", None) is not None:
+        return False
+    if getattr(probe, "__kwdefaults__", None) is not None:
+        return False
+    return not any(
+        instruction.opname in ("LOAD_GLOBAL", "LOAD_NAME", "LOAD_DEREF")
+        for instruction in dis.get_instructions(probe)
+    )
+
+
+def nameof_via_dummy(
+    examined_type: Type[T],
+    probe: Union[Callable[[T], Any], str]
+) -> str:
     """Get the name of an object property via a lambda function by substituting
     a dummy instance instead of the real examined type.
-    
+
     Can be used like this:
     nameof_via_dummy(MyType, lambda my_type: my_type.my_property)
+
+    The name does not depend on the examined type, so it is cached by the code
+    object of the probe (the same lambda expression in a loop has the same
+    code object), unless the probe reads variables or globals. A string can
+    be given instead of the probe, it is then returned as is.
     """
-    return str(probe(_Dummy())) # type: ignore
+    if isinstance(probe, str):
+        return probe
+
+    code = getattr(probe, "__code__", None)
+    if code is None:
+        return str(probe(_DUMMY)) # type: ignore
+
+    try:
+        name = _names_by_code[code]
+    except KeyError:
+        name = str(probe(_DUMMY)) # type: ignore
+        _names_by_code[code] = name if _is_pure_probe(probe) else None
+        return name
+
+    if name is None:
+        return str(probe(_DUMMY)) # type: ignore
+    return name
@@ -0,0 +1,326 @@
+import copyreg
+import hashlib
+import io
+import mmap
+import pickle
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Tuple, Union
+
+import numpy as np
+
+from .Scene import Scene
+from .SceneObject import Link, LinkList, SceneObject
+
+
+# NOTE: Pickling a scene directly is slow and produces large files. Pickle
+# recursively walks the `inlinks` and `outlinks` lists of every scene object
+# (each link being a separate Python object) and copies every bitmap into
+# the pickle stream. The format below stores the scene as a "skeleton"
+# (a pickle of the scene objects without their links), followed by a compact
+# table of links and by a single contiguous buffer with all the large numpy
+# arrays (sprite bitmaps, composed image layers). Arrays with identical
+# contents are stored only once. The buffer can be memory-mapped when
+# loading, so that bitmaps are paged in lazily, only when actually used.
+#
+# File layout:
+# - header (see _HEADER)
+# - skeleton: a stream of pickles sharing one memo (see _ScenePickler)
+# - padding to BUFFER_ALIGNMENT
+# - buffer: arrays, each starting at a multiple of BUFFER_ALIGNMENT
+
+
+MAGIC = b"SMCSCENE"
+"""Identifies serialized scene files"""
+
+FORMAT_VERSION = 1
+"""Incremented whenever the format changes incompatibly"""
+
+BUFFER_ALIGNMENT = 64
+"""Arrays in the buffer start at multiples of this many bytes"""
+
+MIN_BUFFERED_ARRAY_BYTES = 1024
+"""Smaller arrays (e.g. transform matrices) are kept in the skeleton"""
+
+_HEADER = struct.Struct("<8sIIQQQ")
+"""Magic, format version, reserved, skeleton size, buffer offset,
+buffer size"""
+
+
+def _align(size: int) -> int:
+    return -(-size // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT
+
+
+def _set_scene_object_state(obj: SceneObject, state: Dict[str, Any]):
+    """Restores a scene object without its links (bypassing __setattr__,
+    so that no links are created, they are restored from the link table)"""
+    obj.__dict__.update(state)
+    obj.__dict__["inlinks"] = LinkList()
+    obj.__dict__["outlinks"] = LinkList()
+    obj._wrap_list_fields()
+
+
+class _ScenePickler(pickle.Pickler):
+    """Pickles the scene skeleton, collects scene objects and arrays"""
+
+    def __init__(self, file: BinaryIO):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.objects: List[SceneObject] = []
+        """All the scene objects, in the order of their indices"""
+
+        self.object_indices: Dict[int, int] = {}
+        """Maps scene object IDs to their indices"""
+
+        self.arrays: Dict[int, np.ndarray] = {}
+        """Arrays to be written into the buffer, keyed by their offsets"""
+
+        self.buffer_size = 0
+        """Size of the buffer with arrays"""
+
+        self._offsets_by_id: Dict[int, Tuple[np.ndarray, int]] = {}
+        self._offsets_by_size: Dict[int, List[int]] = {}
+        self._digests: Dict[int, bytes] = {}
+
+    def register_object(self, obj: SceneObject):
+        """Registers the object with all the objects reachable via links,
+        so that the whole link graph can be stored in the link table"""
+        stack = [obj]
+        while len(stack) > 0:
+            o = stack.pop()
+            if id(o) in self.object_indices:
+                continue
+            self.object_indices[id(o)] = len(self.objects)
+            self.objects.append(o)
+            stack.extend(link.target for link in o.outlinks)
+            stack.extend(link.source for link in o.inlinks)
+
+    def reducer_override(self, obj: Any) -> Any:
+        if not isinstance(obj, SceneObject):
+            return NotImplemented
+        if id(obj) not in self.object_indices:
+            self.register_object(obj)
+        state = dict(obj.__dict__)
+        del state["inlinks"]
+        del state["outlinks"]
+        return (
+            copyreg.__newobj__, (type(obj),), state,
+            None, None, _set_scene_object_state
+        )
+
+    def persistent_id(self, obj: Any) -> Any:
+        if not isinstance(obj, np.ndarray) \
+                or obj.nbytes < MIN_BUFFERED_ARRAY_BYTES \
+                or obj.dtype.hasobject:
+            return None
+
+        if id(obj) in self._offsets_by_id:
+            offset = self._offsets_by_id[id(obj)][1]
+        else:
+            offset = self._store_array(np.ascontiguousarray(obj))
+            # (keep the array alive, so that its ID is not reused)
+            self._offsets_by_id[id(obj)] = (obj, offset)
+
+        return (offset, obj.dtype.str, obj.shape)
+
+    def _store_array(self, data: np.ndarray) -> int:
+        """Adds the array into the buffer, unless an array with the same
+        contents is already there, returns its offset in the buffer"""
+        # contents are hashed only when there are more arrays of the same
+        # size, most large arrays (e.g. the paper) have a unique size
+        candidates = self._offsets_by_size.setdefault(data.nbytes, [])
+        if len(candidates) > 0:
+            digest = self._digest(data)
+            for offset in candidates:
+                if self._digest_at(offset) == digest:
+                    return offset
+
+        offset = self.buffer_size
+        self.arrays[offset] = data
+        self.buffer_size = _align(offset + data.nbytes)
+        candidates.append(offset)
+        if len(candidates) > 1:
+            self._digests[offset] = digest
+        return offset
+
+    def _digest_at(self, offset: int) -> bytes:
+        if offset not in self._digests:
+            self._digests[offset] = self._digest(self.arrays[offset])
+        return self._digests[offset]
+
+    @staticmethod
+    def _digest(data: np.ndarray) -> bytes:
+        return hashlib.blake2b(
+            data.view(np.uint8).data, digest_size=16
+        ).digest()
+
+    def dump_scene(self, scene: Scene):
+        """Pickles the scene skeleton followed by the link table"""
+        self.dump(scene)
+
+        # pickle all the linked objects that were not reached by pickling
+        # the scene (pickling them may reach new objects, hence the loop)
+        pickled_count = 0
+        while pickled_count < len(self.objects):
+            chunk = self.objects[pickled_count:]
+            pickled_count = len(self.objects)
+            self.dump(chunk)
+
+        # the link table (outlinks are ordered by the link index)
+        link_names: Dict[str, int] = {}
+        link_indices: Dict[int, int] = {}
+        table: List[Tuple[int, int, int]] = []
+        for source_index, obj in enumerate(self.objects):
+            for link in obj.outlinks:
+                link_indices[id(link)] = len(table)
+                table.append((
+                    source_index,
+                    self.object_indices[id(link.target)],
+                    link_names.setdefault(link.name, len(link_names))
+                ))
+        inlink_counts = [len(obj.inlinks) for obj in self.objects]
+        inlinks = [
+            link_indices[id(link)]
+            for obj in self.objects for link in obj.inlinks
+        ]
+        self.dump((
+            list(link_names.keys()),
+            np.array(table, dtype=np.int32).reshape(-1, 3),
+            np.array(inlink_counts, dtype=np.int32),
+            np.array(inlinks, dtype=np.int32)
+        ))
+
+
+class _SceneUnpickler(pickle.Unpickler):
+    """Unpickles the scene skeleton with arrays viewing into the buffer"""
+
+    def __init__(self, file: BinaryIO, buffer: np.ndarray):
+        super().__init__(file)
+        self.buffer = buffer
+        self._arrays: Dict[Any, np.ndarray] = {}
+
+    def persistent_load(self, pid: Any) -> Any:
+        if pid not in self._arrays:
+            offset, dtype_str, shape = pid
+            dtype = np.dtype(dtype_str)
+            nbytes = int(np.prod(shape)) * dtype.itemsize
+            self._arrays[pid] = self.buffer[offset:offset + nbytes] \
+                .view(dtype).reshape(shape)
+        return self._arrays[pid]
+
+    def load_scene(self) -> Scene:
+        """Unpickles the scene skeleton and restores the links"""
+        scene = self.load()
+
+        objects: List[SceneObject] = []
+        while True:
+            item = self.load()
+            if isinstance(item, list):
+                objects += item
+            else:
+                names, table, inlink_counts, inlinks = item
+                break
+
+        links = [
+            Link(source=objects[s], target=objects[t], name=names[n])
+            for s, t, n in table.tolist()
+        ]
+        for link in links:
+            link.source.outlinks.append(link)
+        position = 0
+        inlink_list = inlinks.tolist()
+        for obj, count in zip(objects, inlink_counts.tolist()):
+            obj.inlinks.extend(
+                links[i] for i in inlink_list[position:position + count]
+            )
+            position += count
+
+        return scene
+
+
+def _pickle_scene(scene: Scene) -> Tuple[bytes, _ScenePickler]:
+    skeleton = io.BytesIO()
+    pickler = _ScenePickler(skeleton)
+    pickler.dump_scene(scene)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, skeleton.tell(),
+        _align(_HEADER.size + skeleton.tell()), pickler.buffer_size
+    )
+    return header + skeleton.getvalue(), pickler
+
+
+def _read_scene(data: np.ndarray) -> Scene:
+    magic, version, _, skeleton_size, buffer_offset, buffer_size = \
+        _HEADER.unpack(data[:_HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise Exception("The data is not a serialized Smashcima scene")
+    if version != FORMAT_VERSION:
+        raise Exception(
+            f"Unsupported serialized scene format version {version}, " +
+            f"expected version {FORMAT_VERSION}"
+        )
+    skeleton = data[_HEADER.size:_HEADER.size + skeleton_size]
+    buffer = data[buffer_offset:buffer_offset + buffer_size]
+    return _SceneUnpickler(io.BytesIO(skeleton), buffer).load_scene()
+
+
+def dump_scene(scene: Scene, path: Union[Path, str]):
+    """Serializes the scene into a file in the compact binary format.
+
+    Large numpy arrays (sprite bitmaps, composed images) are stored in one
+    contiguous buffer at the end of the file, each distinct array content
+    only once, and the scene graph links are stored as a compact table.
+    """
+    head, pickler = _pickle_scene(scene)
+    buffer_offset = _align(len(head))
+    with open(path, "wb") as file:
+        file.write(head)
+        position = len(head)
+        for offset, array in pickler.arrays.items():
+            file.write(b"\0" * (buffer_offset + offset - position))
+            file.write(array.view(np.uint8).data)
+            position = buffer_offset + offset + array.nbytes
+        file.write(b"\0" * (buffer_offset + pickler.buffer_size - position))
+
+
+def dumps_scene(scene: Scene) -> bytearray:
+    """Serializes the scene into bytes in the compact binary format
+    (e.g. to be sent to another process, see `dump_scene`)"""
+    head, pickler = _pickle_scene(scene)
+    buffer_offset = _align(len(head))
+    data = bytearray(buffer_offset + pickler.buffer_size)
+    data[:len(head)] = head
+    view = np.frombuffer(data, dtype=np.uint8)
+    for offset, array in pickler.arrays.items():
+        start = buffer_offset + offset
+        view[start:start + array.nbytes] = array.view(np.uint8).reshape(-1)
+    return data
+
+
+def load_scene(path: Union[Path, str], memory_map: bool = True) -> Scene:
+    """Loads a scene serialized with `dump_scene`.
+
+    :param path: Path to the serialized scene file.
+    :param memory_map: If true, the file is memory-mapped (copy-on-write)
+        and bitmaps are views into the mapped file, read from the disk
+        only when accessed. Otherwise the whole file is read into memory.
+    :returns: The loaded scene. Arrays that had identical contents when
+        serialized share memory, so modify bitmaps only after copying them.
+    """
+    with open(path, "rb") as file:
+        if memory_map:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+            data = np.frombuffer(mapped, dtype=np.uint8)
+        else:
+            data = np.frombuffer(bytearray(file.read()), dtype=np.uint8)
+    return _read_scene(data)
+
+
+def loads_scene(data: Union[bytes, bytearray, memoryview]) -> Scene:
+    """Loads a scene serialized with `dumps_scene`. Arrays in the scene
+    are views into the given data (which is copied first if read-only),
+    see `load_scene`."""
+    array = np.frombuffer(data, dtype=np.uint8)
+    if not array.flags.writeable:
+        array = array.copy()
+    return _read_scene(array)
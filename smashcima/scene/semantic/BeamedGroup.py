@@ -28,7 +28,7 @@ class BeamedGroup(SceneObject):
         assert chord not in self.chords, \
             "Cannot add a chord twice into a beamed group."
         
-        self.chords = [*self.chords, chord]
+        self.chords.append(chord)
         self.beam_values.append(beam_values)
     
     @property
@@ -65,6 +65,5 @@ class Chord(SceneObject):
                 "All notes in a chord must have the same type duration"
         
         # update the list of notes
-        notes = [*self.notes, note]
-        notes.sort(key=lambda n: n.pitch.get_linear_pitch()) # ascending by pitch
-        self.notes = notes
+        self.notes.append(note)
+        self.notes.sort(key=lambda n: n.pitch.get_linear_pitch()) # ascending
@@ -54,10 +54,10 @@ class Measure(SceneObject):
     ):
         """Adds a durable into the measure"""
         event = self.get_or_create_event(onset)
-        event.durables = [*event.durables, durable]
+        event.durables.append(durable)
 
         staff = self.get_or_create_staff(staff_number)
-        staff.durables = [*staff.durables, durable]
+        staff.durables.append(durable)
 
     def get_or_create_event(self, onset: Fraction) -> Event:
         """Returns event with the given onset"""
@@ -68,7 +68,7 @@ class Measure(SceneObject):
             return matches[0]
         else:
             event = Event(fractional_measure_onset=onset)
-            self.events = [*self.events, event]
+            self.events.append(event)
             self.sort_events_by_onset()
             return event
     
@@ -85,7 +85,7 @@ class Measure(SceneObject):
             return matches[0]
         else:
             staff = StaffSemantic(staff_number=staff_number)
-            self.staves = [*self.staves, staff]
+            self.staves.append(staff)
             self.sort_staves_by_number()
             return staff
     
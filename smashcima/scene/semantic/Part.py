@@ -20,7 +20,7 @@ class Part(SceneObject):
         return cls.of(measure, lambda p: p.measures)
 
     def append_measure(self, measure: Measure):
-        self.measures = [*self.measures, measure]
+        self.measures.append(measure)
     
     def compute_event_attributes(self) -> None:
         """Sets attributes for all events based on present attributes changes"""
@@ -1,24 +1,61 @@
-from .AccidentalValue import AccidentalValue
-from .AttributesChange import AttributesChange
-from .Attributes import Attributes
-from .BeamedGroup import BeamedGroup
-from .BeamValue import BeamValue
-from .Chord import Chord
-from .Clef import Clef
-from .ClefSign import ClefSign
-from .Durable import Durable
-from .Event import Event
-from .KeySignature import KeySignature
-from .Measure import Measure
-from .MeasureRest import MeasureRest
-from .Note import Note
-from .Part import Part
-from .Pitch import Pitch
-from .RestSemantic import RestSemantic
-from .ScoreEvent import ScoreEvent
-from .ScoreMeasure import ScoreMeasure
-from .Score import Score
-from .StaffSemantic import StaffSemantic
-from .StemValue import StemValue
-from .TimeSignature import TimeSignature
-from .TypeDuration import TypeDuration
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .AccidentalValue import AccidentalValue
+    from .AttributesChange import AttributesChange
+    from .Attributes import Attributes
+    from .BeamedGroup import BeamedGroup
+    from .BeamValue import BeamValue
+    from .Chord import Chord
+    from .Clef import Clef
+    from .ClefSign import ClefSign
+    from .Durable import Durable
+    from .Event import Event
+    from .KeySignature import KeySignature
+    from .Measure import Measure
+    from .MeasureRest import MeasureRest
+    from .Note import Note
+    from .Part import Part
+    from .Pitch import Pitch
+    from .RestSemantic import RestSemantic
+    from .ScoreEvent import ScoreEvent
+    from .ScoreMeasure import ScoreMeasure
+    from .Score import Score
+    from .StaffSemantic import StaffSemantic
+    from .StemValue import StemValue
+    from .TimeSignature import TimeSignature
+    from .TypeDuration import TypeDuration
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "AccidentalValue": ".AccidentalValue",
+    "AttributesChange": ".AttributesChange",
+    "Attributes": ".Attributes",
+    "BeamedGroup": ".BeamedGroup",
+    "BeamValue": ".BeamValue",
+    "Chord": ".Chord",
+    "Clef": ".Clef",
+    "ClefSign": ".ClefSign",
+    "Durable": ".Durable",
+    "Event": ".Event",
+    "KeySignature": ".KeySignature",
+    "Measure": ".Measure",
+    "MeasureRest": ".MeasureRest",
+    "Note": ".Note",
+    "Part": ".Part",
+    "Pitch": ".Pitch",
+    "RestSemantic": ".RestSemantic",
+    "ScoreEvent": ".ScoreEvent",
+    "ScoreMeasure": ".ScoreMeasure",
+    "Score": ".Score",
+    "StaffSemantic": ".StaffSemantic",
+    "StemValue": ".StemValue",
+    "TimeSignature": ".TimeSignature",
+    "TypeDuration": ".TypeDuration"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -1,17 +1,47 @@
-from .Accidental import Accidental
-from .AugmentationDot import AugmentationDot
-from .BeamCoordinateSystem import BeamCoordinateSystem
-from .BeamHook import BeamHook
-from .Beam import Beam
-from .Flag import Flag
-from .LedgerLine import LegerLine
-from .Notehead import Notehead
-from .NoteheadSide import NoteheadSide
-from .Page import Page
-from .RestVisual import RestVisual
-from .StaffCoordinateSystem import StaffCoordinateSystem
-from .StaffMeasure import StaffMeasure
-from .StaffVisual import StaffVisual
-from .Stem import Stem
-from .System import System
-from .SystemMeasure import SystemMeasure
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .Accidental import Accidental
+    from .AugmentationDot import AugmentationDot
+    from .BeamCoordinateSystem import BeamCoordinateSystem
+    from .BeamHook import BeamHook
+    from .Beam import Beam
+    from .Flag import Flag
+    from .LedgerLine import LegerLine
+    from .Notehead import Notehead
+    from .NoteheadSide import NoteheadSide
+    from .Page import Page
+    from .RestVisual import RestVisual
+    from .StaffCoordinateSystem import StaffCoordinateSystem
+    from .StaffMeasure import StaffMeasure
+    from .StaffVisual import StaffVisual
+    from .Stem import Stem
+    from .System import System
+    from .SystemMeasure import SystemMeasure
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "Accidental": ".Accidental",
+    "AugmentationDot": ".AugmentationDot",
+    "BeamCoordinateSystem": ".BeamCoordinateSystem",
+    "BeamHook": ".BeamHook",
+    "Beam": ".Beam",
+    "Flag": ".Flag",
+    "LegerLine": ".LedgerLine",
+    "Notehead": ".Notehead",
+    "NoteheadSide": ".NoteheadSide",
+    "Page": ".Page",
+    "RestVisual": ".RestVisual",
+    "StaffCoordinateSystem": ".StaffCoordinateSystem",
+    "StaffMeasure": ".StaffMeasure",
+    "StaffVisual": ".StaffVisual",
+    "Stem": ".Stem",
+    "System": ".System",
+    "SystemMeasure": ".SystemMeasure"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
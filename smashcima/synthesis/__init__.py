@@ -1,15 +1,37 @@
-from .glyph import *
-from .notation import *
-from .page import *
-from .style import *
-
-from .GlyphSynthesizer import GlyphSynthesizer
-from .LineSynthesizer import LineSynthesizer
-from .MusicNotationSynthesizer import MusicNotationSynthesizer
-from .PaperSynthesizer import PaperSynthesizer
-from .StafflinesSynthesizer import StafflinesSynthesizer
-
-from smashcima.synthesis import glyph
-from smashcima.synthesis import notation
-from smashcima.synthesis import page
-from smashcima.synthesis import style
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .glyph import *
+    from .notation import *
+    from .page import *
+    from .style import *
+
+    from .GlyphSynthesizer import GlyphSynthesizer
+    from .LineSynthesizer import LineSynthesizer
+    from .MusicNotationSynthesizer import MusicNotationSynthesizer
+    from .PaperSynthesizer import PaperSynthesizer
+    from .StafflinesSynthesizer import StafflinesSynthesizer
+
+    from smashcima.synthesis import glyph
+    from smashcima.synthesis import notation
+    from smashcima.synthesis import page
+    from smashcima.synthesis import style
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "GlyphSynthesizer": ".GlyphSynthesizer",
+    "LineSynthesizer": ".LineSynthesizer",
+    "MusicNotationSynthesizer": ".MusicNotationSynthesizer",
+    "PaperSynthesizer": ".PaperSynthesizer",
+    "StafflinesSynthesizer": ".StafflinesSynthesizer"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(
+    __name__, _EXPORTS,
+    nested=[".glyph", ".notation", ".page", ".style"],
+    submodules=["glyph", "notation", "page", "style"]
+)
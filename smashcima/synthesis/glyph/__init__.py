@@ -1,4 +1,21 @@
-from .MuscimaPPGlyphSynthesizer import MuscimaPPGlyphSynthesizer
-from .MuscimaPPLineSynthesizer import MuscimaPPLineSynthesizer
-from .NaiveLineSynthesizer import NaiveLineSynthesizer
-from .OmniOMRGlyphSynthesizer import OmniOMRGlyphSynthesizer
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .MuscimaPPGlyphSynthesizer import MuscimaPPGlyphSynthesizer
+    from .MuscimaPPLineSynthesizer import MuscimaPPLineSynthesizer
+    from .NaiveLineSynthesizer import NaiveLineSynthesizer
+    from .OmniOMRGlyphSynthesizer import OmniOMRGlyphSynthesizer
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "MuscimaPPGlyphSynthesizer": ".MuscimaPPGlyphSynthesizer",
+    "MuscimaPPLineSynthesizer": ".MuscimaPPLineSynthesizer",
+    "NaiveLineSynthesizer": ".NaiveLineSynthesizer",
+    "OmniOMRGlyphSynthesizer": ".OmniOMRGlyphSynthesizer"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -1,2 +1,17 @@
-from .column.ColumnMusicNotationSynthesizer import ColumnMusicNotationSynthesizer
-from .BeamStemSynthesizer import BeamStemSynthesizer
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .column.ColumnMusicNotationSynthesizer import ColumnMusicNotationSynthesizer
+    from .BeamStemSynthesizer import BeamStemSynthesizer
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "ColumnMusicNotationSynthesizer": ".column.ColumnMusicNotationSynthesizer",
+    "BeamStemSynthesizer": ".BeamStemSynthesizer"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
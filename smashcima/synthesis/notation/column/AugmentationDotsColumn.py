@@ -173,7 +173,7 @@ def synthesize_augmentation_dots_column(
                     dot = dots[dot_index - 1]
                     assert dot.augmentation_dot_index == dot_index
                     assert dot.pitch_position == pitch_position
-                    dot.owners = [*dot.owners, owner]
+                    dot.owners.append(owner)
 
                 # create new dot
                 glyph = glyph_synthesizer.synthesize_glyph_at(
@@ -368,15 +368,16 @@ class ColumnMusicNotationSynthesizer(MusicNotationSynthesizer):
                 ))
             
             # construct the complete system measure
-            polygons: List[Polygon] = []
-            for sm in staff_measures:
-                polygons += sm.region.get_contours_in_space(page_space).polygons
+            contours = Contours.concatenate([
+                sm.region.get_contours_in_space(page_space)
+                for sm in staff_measures
+            ])
             SystemMeasure(
                 score_measure=score_measure,
                 staff_measures=staff_measures,
                 region=LabeledRegion(
                     space=page_space,
-                    contours=Contours(polygons),
+                    contours=contours,
                     label=SmashcimaLabels.systemMeasure.value
                 )
             )
@@ -303,7 +303,7 @@ def synthesize_noteheads_column(
 
                 # another note for an existing notehead
                 if notehead is not None:
-                    notehead.notes = [*notehead.notes, note]
+                    notehead.notes.append(note)
                     continue
 
                 # resolve context
@@ -2,6 +2,8 @@ import numpy as np
 import random
 import heapq
 
+from smashcima.instrumentation import measure
+
 
 class Quilter:
     """Service that can be used to quilt small textures up to large dimensions"""
@@ -30,6 +32,17 @@ class Quilter:
         """
         Given a source texture, it quilts the texture up to the desired size.
         """
+        with measure("Quilter.quilt_texture_to_dimensions"):
+            return self._quilt_texture_to_dimensions(
+                source_texture, target_width_px, target_height_px
+            )
+
+    def _quilt_texture_to_dimensions(
+        self,
+        source_texture: np.ndarray,
+        target_width_px: int,
+        target_height_px: int
+    ) -> np.ndarray:
         # how large square blocks (in pixels) do we cut from the source texture
         block_size_px = int(
             (min(source_texture.shape[0], source_texture.shape[1]) - 1) \
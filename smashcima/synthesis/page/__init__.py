@@ -1,4 +1,21 @@
-from .MzkQuiltingPaperSynthesizer import MzkQuiltingPaperSynthesizer
-from .NaiveStafflinesSynthesizer import NaiveStafflinesSynthesizer
-from .SimplePageSynthesizer import SimplePageSynthesizer
-from .SolidColorPaperSynthesizer import SolidColorPaperSynthesizer
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .MzkQuiltingPaperSynthesizer import MzkQuiltingPaperSynthesizer
+    from .NaiveStafflinesSynthesizer import NaiveStafflinesSynthesizer
+    from .SimplePageSynthesizer import SimplePageSynthesizer
+    from .SolidColorPaperSynthesizer import SolidColorPaperSynthesizer
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "MzkQuiltingPaperSynthesizer": ".MzkQuiltingPaperSynthesizer",
+    "NaiveStafflinesSynthesizer": ".NaiveStafflinesSynthesizer",
+    "SimplePageSynthesizer": ".SimplePageSynthesizer",
+    "SolidColorPaperSynthesizer": ".SolidColorPaperSynthesizer"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
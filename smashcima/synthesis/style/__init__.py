@@ -1,4 +1,21 @@
-from .MuscimaPPStyleDomain import MuscimaPPStyleDomain
-from .MzkPaperStyleDomain import MzkPaperStyleDomain
-from .StyleDomain import StyleDomain
-from .Styler import Styler
+from typing import TYPE_CHECKING
+
+from smashcima._lazy_exports import lazy_exports
+
+# only for type checkers, names are imported lazily (see _EXPORTS)
+if TYPE_CHECKING:
+    from .MuscimaPPStyleDomain import MuscimaPPStyleDomain
+    from .MzkPaperStyleDomain import MzkPaperStyleDomain
+    from .StyleDomain import StyleDomain
+    from .Styler import Styler
+
+# exported name -> module that defines it, imported on first access
+# (see _lazy_exports.py)
+_EXPORTS = {
+    "MuscimaPPStyleDomain": ".MuscimaPPStyleDomain",
+    "MzkPaperStyleDomain": ".MzkPaperStyleDomain",
+    "StyleDomain": ".StyleDomain",
+    "Styler": ".Styler"
+}
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+import numpy as np
+
+from smashcima.exporting.image.ImageLayer import ImageLayer
+from smashcima.exporting.postprocessing.Filter import Filter
+from smashcima.instrumentation import Instrumentation, measure
+from smashcima.scene.AffineSpace import AffineSpace
+
+
+class _InvertFilter(Filter):
+    def apply_to(self, input: ImageLayer) -> ImageLayer:
+        input.bitmap = 255 - input.bitmap
+        return input
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_it_records_only_when_active_and_enabled(self):
+        instrumentation = Instrumentation()
+
+        with measure("outside"):
+            pass
+        with instrumentation.activate():
+            with measure("disabled"):
+                pass
+            instrumentation.enabled = True
+            with measure("enabled"):
+                pass
+
+        assert list(instrumentation.durations.keys()) == ["enabled"]
+
+    def test_it_aggregates_percentiles(self):
+        instrumentation = Instrumentation(enabled=True)
+        for i in range(101):
+            instrumentation.record("stage", i / 1000)
+
+        summary = instrumentation.summary()["stage"]
+        assert summary["count"] == 101
+        assert abs(summary["p50"] - 0.050) < 1e-9
+        assert abs(summary["p90"] - 0.090) < 1e-9
+        assert abs(summary["p99"] - 0.099) < 1e-9
+        assert abs(summary["max"] - 0.100) < 1e-9
+
+    def test_filters_are_measured_by_their_class_name(self):
+        instrumentation = Instrumentation(enabled=True)
+        layer = ImageLayer(
+            bitmap=np.zeros((4, 4, 4), dtype=np.uint8),
+            dpi=300,
+            space=AffineSpace(),
+            regions=[]
+        )
+
+        with instrumentation.activate():
+            _InvertFilter(random.Random(42))(layer)
+
+        assert instrumentation.summary()["Filter._InvertFilter"]["count"] == 1
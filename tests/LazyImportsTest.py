@@ -0,0 +1,106 @@
+import ast
+import compileall
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+HEAVY_MODULES = [
+    "cv2", "augraphy", "albumentations", "punq", "mung", "muscima", "requests"
+]
+
+
+def _imported_heavy_modules(code: str):
+    """Runs the code in a fresh interpreter and returns the heavy modules
+    it imported"""
+    output = subprocess.check_output(
+        [
+            sys.executable, "-c",
+            code + "\nimport sys, json\n" +
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} " +
+            "if m in sys.modules]))"
+        ],
+        cwd=os.path.join(os.path.dirname(__file__), "../")
+    )
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+class LazyImportsTest(unittest.TestCase):
+    def test_importing_smashcima_imports_nothing_heavy(self):
+        assert _imported_heavy_modules("import smashcima") == []
+
+    def test_loading_and_geometry_do_not_need_the_imaging_stack(self):
+        assert _imported_heavy_modules(
+            "import smashcima as sc\n" +
+            "sc.loading.load_score('testing/input.musicxml')\n" +
+            "sc.geometry.Transform.translate(sc.Vector2(1, 2))\n"
+        ) == []
+
+    def test_models_do_not_import_postprocessing_and_install_dependencies(self):
+        imported = _imported_heavy_modules(
+            "from smashcima.orchestration import BaseHandwrittenModel"
+        )
+        assert "augraphy" not in imported
+        assert "albumentations" not in imported
+        assert "muscima" not in imported
+        assert "requests" not in imported
+
+    def test_exported_names_resolve_to_classes_not_modules(self):
+        import smashcima as sc
+        import smashcima.scene.AffineSpace
+        import smashcima.loading.load_score
+        from smashcima.scene.AffineSpace import AffineSpace
+        from smashcima.loading.load_score import load_score
+
+        assert sc.scene.AffineSpace is AffineSpace
+        assert sc.AffineSpace is AffineSpace
+        assert sc.loading.load_score is load_score
+        assert "AffineSpace" in sc.__all__
+        assert "Notehead" in dir(sc)
+
+    def test_sourceless_installation_can_be_imported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            package = Path(directory) / "smashcima"
+            shutil.copytree(
+                Path(__file__).parent.parent / "smashcima", package,
+                ignore=shutil.ignore_patterns("__pycache__")
+            )
+            compileall.compile_dir(package, quiet=1, legacy=True)
+            for source in package.rglob("*.py"):
+                source.unlink()
+
+            output = subprocess.check_output(
+                [
+                    sys.executable, "-c",
+                    "import smashcima as sc\n" +
+                    "print(sc.scene.AffineSpace.__name__)"
+                ],
+                cwd=directory
+            )
+        assert output.decode("utf-8").strip() == "AffineSpace"
+
+    def test_type_checking_imports_match_the_exports(self):
+        root = Path(__file__).parent.parent
+        for init in (root / "smashcima").rglob("__init__.py"):
+            tree = ast.parse(init.read_text("utf-8"))
+            names = [
+                alias.asname or alias.name
+                for node in tree.body
+                if isinstance(node, ast.If)
+                and getattr(node.test, "id", None) == "TYPE_CHECKING"
+                for statement in node.body
+                for alias in getattr(statement, "names", [])
+                if alias.name != "*"
+            ]
+            package = importlib.import_module(
+                ".".join(init.parent.relative_to(root).parts)
+            )
+            for name in names:
+                assert name in package.__all__, (package.__name__, name)
+                assert getattr(package, name) is not None
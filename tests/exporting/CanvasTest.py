@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from smashcima.exporting.image.Canvas import TILE_SIZE, Canvas
+from smashcima.geometry import Rectangle
+
+
+def random_bitmap(rng: np.random.Generator, height: int, width: int):
+    return rng.integers(0, 256, size=(height, width, 4), dtype=np.uint8)
+
+
+class CanvasTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.width = TILE_SIZE * 2 + 37
+        self.height = TILE_SIZE + 11
+        self.background = random_bitmap(rng, self.height, self.width)
+        self.background[:, :, 3] = 255 # (colors of translucent pixels
+        # are divided by alpha when read, which would amplify the errors)
+        self.sprite = random_bitmap(rng, 40, TILE_SIZE + 5)
+        self.window = Rectangle(
+            TILE_SIZE - 20, TILE_SIZE - 30, TILE_SIZE + 5, 40
+        )
+
+    def paint(self, dtype) -> np.ndarray:
+        canvas = Canvas(self.width, self.height, dtype=dtype)
+        canvas.place_layer(self.background)
+        canvas.place_bitmap(self.sprite, self.window)
+        return canvas.read()
+
+    def test_only_painted_tiles_are_allocated(self):
+        canvas = Canvas(self.width, self.height, (255, 255, 255, 255))
+        transparent = np.zeros_like(self.sprite)
+        canvas.place_bitmap(transparent, self.window)
+        assert len(canvas.tiles) == 0
+
+        canvas.place_bitmap(self.sprite, Rectangle(0, 0, TILE_SIZE + 5, 40))
+        assert set(canvas.tiles.keys()) == {(0, 0), (0, 1)}
+        assert (canvas.read()[TILE_SIZE:, :] == 255).all()
+
+    def test_lower_precision_surfaces_differ_by_at_most_one(self):
+        expected = self.paint(np.float32)
+        for dtype in [np.float16, np.uint8]:
+            difference = np.abs(
+                self.paint(dtype).astype(np.int32) - expected
+            )
+            assert difference.max() <= 1, dtype
+
+    def test_merged_layers_equal_layers_placed_over_a_canvas(self):
+        sprite_layer = Canvas(self.width, self.height)
+        sprite_layer.place_bitmap(self.sprite, self.window)
+        layers = [self.background, sprite_layer.read()]
+
+        canvas = Canvas(self.width, self.height, (255, 255, 255, 255))
+        for layer in layers:
+            canvas.place_layer(layer)
+
+        assert np.array_equal(
+            Canvas.merge_layers(layers, (255, 255, 255, 255)),
+            canvas.read()
+        )
@@ -0,0 +1,135 @@
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from smashcima.exporting.compositing.DefaultCompositor import \
+    DefaultCompositor
+from smashcima.exporting.image.ImageLayer import ImageLayer
+from smashcima.exporting.image.LayerSet import LayerSet
+from smashcima.exporting.postprocessing.BaseHandwrittenPostprocessor import \
+    BaseHandwrittenPostprocessor
+from smashcima.exporting.postprocessing.NullPostprocessor import \
+    NullPostprocessor
+from smashcima.geometry import Rectangle, Transform, Vector2
+from smashcima.instrumentation import Instrumentation
+from smashcima.scene.AffineSpace import AffineSpace
+from smashcima.scene.Glyph import Glyph
+from smashcima.scene.SmashcimaLabels import SmashcimaLabels
+from smashcima.scene.Sprite import Sprite
+from smashcima.scene.ViewBox import ViewBox
+
+
+def place_glyph(
+    parent: AffineSpace,
+    label: str,
+    rectangle: Rectangle,
+    position: Vector2
+) -> Glyph:
+    space = AffineSpace(parent, Transform.translate(position))
+    sprite = Sprite.debug_box(space, rectangle)
+    return Glyph(
+        space=space,
+        region=Glyph.build_region_from_sprites_alpha_channel(
+            label, [sprite]
+        ),
+        sprites=[sprite]
+    )
+
+
+def copy_layers(layers: LayerSet) -> LayerSet:
+    # (filters may modify the layer bitmaps in-place)
+    return LayerSet({
+        name: ImageLayer(
+            bitmap=layers[name].bitmap.copy(),
+            dpi=layers[name].dpi,
+            space=layers[name].space,
+            regions=layers[name].regions
+        )
+        for name in ["paper", "stafflines", "ink"]
+    })
+
+
+class DefaultCompositorTest(unittest.TestCase):
+    def setUp(self):
+        root = AffineSpace()
+        Sprite.rectangle(
+            root, Rectangle(0, 0, 40, 30), fill_color=(200, 220, 240, 255)
+        )
+        for y in [8, 10, 12]:
+            place_glyph(
+                root, SmashcimaLabels.staffLine.value,
+                Rectangle(-15, -0.1, 30, 0.2), Vector2(20, y)
+            )
+        for x in [8, 16, 24]:
+            place_glyph(
+                root, "notehead", Rectangle(-1, -0.8, 2, 1.6), Vector2(x, 11)
+            )
+        self.view_box = ViewBox(root, Rectangle(0, 0, 40, 30))
+        self.executor = ThreadPoolExecutor(max_workers=3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_concurrent_extraction_matches_the_serial_one(self):
+        serial = DefaultCompositor(NullPostprocessor())
+        concurrent = DefaultCompositor(
+            NullPostprocessor(), executor=self.executor
+        )
+
+        expected = serial.extract_layers(self.view_box, dpi=300)
+        actual = concurrent.extract_layers(self.view_box, dpi=300)
+        for name in ["paper", "stafflines", "ink"]:
+            assert np.array_equal(
+                expected[name].bitmap, actual[name].bitmap
+            ), name
+            assert len(expected[name].regions) == len(actual[name].regions)
+
+        assert np.array_equal(
+            serial.run(self.view_box, dpi=300).bitmap,
+            concurrent.run(self.view_box, dpi=300).bitmap
+        )
+
+    def test_concurrent_postprocessing_is_deterministic(self):
+        layers = DefaultCompositor(NullPostprocessor()) \
+            .extract_layers(self.view_box, dpi=100)
+        serial = BaseHandwrittenPostprocessor(random.Random(42))
+        concurrent = BaseHandwrittenPostprocessor(random.Random(42))
+
+        instrumentation = Instrumentation(enabled=True)
+        for _ in range(2):
+            expected = serial.process_extracted_layers(copy_layers(layers))
+            with instrumentation.activate():
+                actual = concurrent.process_extracted_layers_concurrently(
+                    copy_layers(layers), self.executor
+                )
+            for name in ["stafflines", "ink"]:
+                assert np.array_equal(
+                    expected[name].bitmap, actual[name].bitmap
+                ), name
+
+        # measurements in the thread pool are recorded
+        assert "Filter._DilateStafflines" in instrumentation.durations
+
+    def test_variants_share_the_extracted_layers(self):
+        postprocessor = BaseHandwrittenPostprocessor(random.Random(42))
+        for f in [
+            postprocessor.f_scribbles,
+            postprocessor.f_folding,
+            postprocessor.f_camera
+        ]:
+            f.force_dont = True # (final layer filters are slow)
+        compositor = DefaultCompositor(postprocessor)
+
+        variants = compositor.run_variants(
+            self.view_box, dpi=100, seeds=[1, 2, 1]
+        )
+        expected = compositor.process_layers(
+            compositor.extract_layers(self.view_box, dpi=100),
+            postprocessor.reseeded(2)
+        )
+
+        assert np.array_equal(variants[0].bitmap, variants[2].bitmap)
+        assert not np.array_equal(variants[0].bitmap, variants[1].bitmap)
+        assert np.array_equal(variants[1].bitmap, expected.bitmap)
@@ -0,0 +1,62 @@
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from smashcima.exporting.ShardWriter import ShardWriter
+
+
+def _record(i: int):
+    return {f"{i:09d}": {"txt": str(i).encode("utf-8"), "bin": bytes(100)}}
+
+
+def _read_keys(directory: Path):
+    keys = []
+    for shard in sorted(directory.glob("*.tar")):
+        with tarfile.open(shard) as tar:
+            keys += [name for name in tar.getnames() if name.endswith(".txt")]
+    return keys
+
+
+class ShardWriterTest(unittest.TestCase):
+    def test_it_splits_samples_into_shards(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with ShardWriter(directory, max_shard_size=5000) as writer:
+                for i in range(10):
+                    writer.write(_record(i))
+
+            assert len(writer.shards) > 1
+            assert sum(s["sample_count"] for s in writer.shards) == 10
+            assert _read_keys(Path(directory)) \
+                == [f"{i:09d}.txt" for i in range(10)]
+
+    def test_it_resumes_after_the_last_complete_shard(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # the run crashes in the middle of a shard
+            try:
+                with ShardWriter(directory, max_shard_size=5000) as writer:
+                    for i in range(7):
+                        writer.write(_record(i))
+                    raise KeyboardInterrupt()
+            except KeyboardInterrupt:
+                pass
+            completed = writer.next_sample_index
+            assert 0 < completed < 7
+            assert len(list(Path(directory).glob("*.tmp"))) == 0
+
+            # and it's resumed
+            with ShardWriter(directory, max_shard_size=5000) as writer:
+                assert writer.next_sample_index == completed
+                for i in range(completed, 10):
+                    writer.write(_record(i))
+
+            assert _read_keys(Path(directory)) \
+                == [f"{i:09d}.txt" for i in range(10)]
+
+    def test_it_refuses_to_resume_a_different_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with ShardWriter(directory, metadata={"seed": 1}) as writer:
+                writer.write(_record(0))
+
+            with self.assertRaises(Exception):
+                ShardWriter(directory, metadata={"seed": 2})
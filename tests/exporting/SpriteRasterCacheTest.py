@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from smashcima.exporting.image.ImageLayerBuilder import ImageLayerBuilder
+from smashcima.exporting.image.SpriteRasterCache import SpriteRasterCache
+from smashcima.geometry import Transform, Vector2
+
+
+class SpriteRasterCacheTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.bitmap = rng.integers(0, 256, size=(20, 30, 4), dtype=np.uint8)
+        self.rotation = Transform.rotateDegCC(15) \
+            .then(Transform.scale(1.3))
+
+    def render(self, cache: SpriteRasterCache, offsets) -> np.ndarray:
+        builder = ImageLayerBuilder(200, 100, dpi=300, raster_cache=cache)
+        for offset in offsets:
+            builder.add_bitmap(
+                self.bitmap,
+                self.rotation.then(Transform.translate(offset))
+            )
+        return builder.build_layer().bitmap
+
+    def test_whole_pixel_translations_reuse_the_raster(self):
+        # including sprites sticking out of the canvas
+        offsets = [Vector2(x, y) for x in [-5, 40, 90, 190] for y in [0, 50]]
+        cache = SpriteRasterCache()
+        cached = self.render(cache, offsets)
+        exact = self.render(SpriteRasterCache(max_bytes=0), offsets)
+
+        assert cache.misses == 1
+        assert cache.hits == len(offsets) - 1
+        assert np.array_equal(cached, exact)
+
+    def test_sub_pixel_translations_are_bucketed(self):
+        cache = SpriteRasterCache(phase_buckets=4)
+        self.render(cache, [
+            Vector2(10.01, 10), Vector2(20.24, 10), # bucket 0 and 1
+            Vector2(30.26, 10), Vector2(40.9, 10.9) # bucket 1 and 0
+        ])
+        assert cache.misses == 2
+
+    def test_least_recently_used_rasters_are_dropped(self):
+        bitmaps = [self.bitmap.copy() for _ in range(10)]
+        identity = Transform.identity()
+        raster_bytes = SpriteRasterCache().get(
+            bitmaps[0], identity
+        )[1].nbytes # type: ignore
+        raster_bytes += self.bitmap.nbytes # (the source is kept alive)
+
+        cache = SpriteRasterCache(max_bytes=raster_bytes * 8)
+        for bitmap in bitmaps:
+            cache.get(bitmap, identity)
+        assert cache.nbytes == raster_bytes * 8
+
+        cache.get(bitmaps[9], identity)
+        assert cache.hits == 1
+        cache.get(bitmaps[0], identity)
+        assert cache.misses == 11
+
+        # too large rasters are not cached
+        tiny = SpriteRasterCache(max_bytes=raster_bytes * 7)
+        assert tiny.get(bitmaps[0], identity) is None
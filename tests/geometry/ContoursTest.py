@@ -0,0 +1,51 @@
+import copyreg
+import unittest
+
+import numpy as np
+
+from smashcima.geometry import (Contours, Point, Polygon, Rectangle,
+                                Transform, Vector2)
+
+
+class ContoursTest(unittest.TestCase):
+    def test_it_is_built_from_cv2_contours(self):
+        cv_contours = [
+            np.array([[[0, 0]], [[4, 0]], [[4, 2]]], dtype=np.int32),
+            np.array([[[-1, 5]], [[3, 6]]], dtype=np.int32),
+        ]
+        contours = Contours.from_cv2_contours(cv_contours)
+
+        assert [len(p) for p in contours.polygons] == [3, 2]
+        assert contours.polygons[1].points == [Point(-1, 5), Point(3, 6)]
+        assert contours.bbox() == Rectangle(-1, 0, 5, 6)
+
+    def test_transform_is_applied_to_all_points(self):
+        contours = Contours([
+            Polygon.from_rectangle(Rectangle(0, 0, 2, 1)),
+            Polygon([Point(1, 1)])
+        ])
+        transform = Transform.translate(Vector2(10, 20)) \
+            .then(Transform.scale(2))
+        transformed = transform.apply_to(contours)
+
+        expected = [
+            [transform.apply_to(p) for p in polygon.points]
+            for polygon in contours.polygons
+        ]
+        assert [p.points for p in transformed.polygons] == expected
+        assert transformed.bbox() == Rectangle(20, 40, 4, 2)
+
+    def test_concatenation_keeps_polygons(self):
+        a = Contours([Polygon([Point(0, 0), Point(1, 1)])])
+        b = Contours([Polygon([Point(2, 2)]), Polygon([Point(3, 3)])])
+        joined = Contours.concatenate([a, b])
+        assert [p.points for p in joined.polygons] == \
+            [p.points for p in a.polygons + b.polygons]
+
+    def test_old_pickled_state_is_loaded(self):
+        # state of instances pickled before points were stored in arrays
+        polygon = copyreg.__newobj__(Polygon)
+        polygon.__setstate__({"points": [Point(1, 2), Point(3, 4)]})
+        contours = copyreg.__newobj__(Contours)
+        contours.__setstate__({"polygons": [polygon]})
+        assert contours.bbox() == Rectangle(1, 2, 2, 2)
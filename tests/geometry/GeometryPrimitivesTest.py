@@ -0,0 +1,51 @@
+import copyreg
+import pickle
+import unittest
+
+from smashcima.geometry import Point, Quad, Rectangle, Vector2
+
+
+class GeometryPrimitivesTest(unittest.TestCase):
+    def test_primitives_compare_by_value(self):
+        assert Vector2(1, 2) == Vector2(1.0, 2.0)
+        assert Vector2(1, 2) != Vector2(2, 1)
+        assert Point(1, 2) != Vector2(1, 2)
+
+        rectangle = Rectangle(1, 2, 3, 4)
+        assert rectangle == Rectangle(1, 2, 3, 4)
+        assert Quad.from_rectangle(rectangle) \
+            == Quad.from_rectangle(Rectangle(1, 2, 3, 4))
+
+    def test_primitives_are_immutable_and_hashed_by_value(self):
+        assert len({Point(1, 2), Point(1, 2), Point(2, 1)}) == 2
+        assert hash(Rectangle(1, 2, 3, 4)) == hash(Rectangle(1, 2, 3, 4))
+        assert {Quad.from_rectangle(Rectangle(1, 2, 3, 4)): 1} \
+            [Quad.from_rectangle(Rectangle(1, 2, 3, 4))] == 1
+
+        for instance, field in [
+            (Vector2(1, 2), "x"), (Point(1, 2), "y"),
+            (Rectangle(1, 2, 3, 4), "width"),
+            (Quad.from_rectangle(Rectangle(1, 2, 3, 4)), "a")
+        ]:
+            with self.assertRaises(AttributeError):
+                setattr(instance, field, 0)
+            with self.assertRaises(AttributeError):
+                delattr(instance, field)
+
+    def test_primitives_have_no_instance_dict(self):
+        for instance in [Vector2(1, 2), Point(1, 2), Rectangle(1, 2, 3, 4)]:
+            assert not hasattr(instance, "__dict__")
+
+    def test_primitives_survive_pickling(self):
+        quad = Quad.from_rectangle(Rectangle(1, 2, 3, 4))
+        assert pickle.loads(pickle.dumps(quad)) == quad
+
+    def test_old_pickled_state_is_loaded(self):
+        # state of instances pickled before slots were introduced
+        point = copyreg.__newobj__(Point)
+        point.__setstate__({"vector": Vector2(1, 2)})
+        assert point == Point(1, 2)
+
+        rectangle = copyreg.__newobj__(Rectangle)
+        rectangle.__setstate__({"x": 1, "y": 2, "width": 3, "height": 4})
+        assert rectangle == Rectangle(1, 2, 3, 4)
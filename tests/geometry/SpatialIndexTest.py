@@ -0,0 +1,34 @@
+import random
+import unittest
+
+from smashcima.geometry import Rectangle, SpatialIndex
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def test_it_finds_the_same_items_as_a_full_scan(self):
+        rng = random.Random(42)
+        bboxes = [
+            Rectangle(
+                rng.uniform(0, 200), rng.uniform(0, 300),
+                rng.uniform(0, 10), rng.uniform(0, 10)
+            )
+            for _ in range(500)
+        ]
+        bboxes.append(Rectangle(-1000, -1000, 5000, 5000)) # a large item
+        index = SpatialIndex(list(range(len(bboxes))), bboxes)
+
+        for _ in range(50):
+            window = Rectangle(
+                rng.uniform(-20, 200), rng.uniform(-20, 300),
+                rng.uniform(0, 80), rng.uniform(0, 80)
+            )
+            expected = [
+                i for i, b in enumerate(bboxes)
+                if b.left <= window.right and b.right >= window.left
+                and b.top <= window.bottom and b.bottom >= window.top
+            ]
+            assert index.query(window) == expected
+
+    def test_empty_index(self):
+        index = SpatialIndex([], [])
+        assert index.query(Rectangle(0, 0, 10, 10)) == []
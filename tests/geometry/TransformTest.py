@@ -0,0 +1,47 @@
+import copyreg
+import unittest
+
+import numpy as np
+
+from smashcima.geometry import Point, Transform, Vector2
+
+
+class TransformTest(unittest.TestCase):
+    def test_composition_matches_matrix_product(self):
+        a = Transform.rotateDegCC(30).then(Transform.scale(2))
+        b = Transform.translate(Vector2(3, -4))
+        assert np.allclose(
+            a.apply_to(b).matrix3,
+            a.matrix3 @ b.matrix3
+        )
+        assert np.isclose(a.determinant, np.linalg.det(a.matrix2))
+
+    def test_inverse_undoes_the_transform(self):
+        t = Transform.rotateDegCC(30) \
+            .then(Transform.translate(Vector2(3, -4))) \
+            .then(Transform.scale(2))
+        p = t.inverse().apply_to(t.apply_to(Point(5, 7)))
+        assert np.allclose([p.x, p.y], [5, 7])
+
+    def test_singular_transform_cannot_be_inverted(self):
+        with self.assertRaises(ValueError):
+            Transform.scale(0).inverse()
+        with self.assertRaises(ValueError):
+            Transform.from_values(1, 2, 2, 4, 5, 6).inverse()
+
+    def test_it_is_compatible_with_the_matrix_array(self):
+        matrix = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float64)
+        assert np.array_equal(Transform(matrix).matrix, matrix)
+
+        # state of instances pickled with the matrix array
+        t = copyreg.__newobj__(Transform)
+        t.__setstate__({"matrix": matrix})
+        assert t.apply_to(Vector2(1, 1)) == Vector2(6, 15)
+
+    def test_matrix_is_assigned_and_not_modified_in_place(self):
+        t = Transform.identity()
+        t.matrix = np.array([[1, 0, 5], [0, 1, 0]], dtype=np.float64)
+        assert t.apply_to(Point(0, 0)) == Point(5, 0)
+
+        with self.assertRaises(ValueError):
+            t.matrix[0, 2] += 5
@@ -0,0 +1,160 @@
+import asyncio
+import random
+import threading
+import time
+import unittest
+from typing import Optional
+
+import numpy as np
+
+from smashcima.orchestration.AsyncModelRunner import (AsyncModelRunner,
+                                                      RunnerOverloadedError)
+from smashcima.orchestration.Model import Model
+
+
+class _Scene:
+    def __init__(self, model: "_SlowModel"):
+        self.model = model
+
+    def render(self, page: str, seed: Optional[int] = None):
+        return (page, seed)
+
+
+class _SlowModel(Model[_Scene]):
+    """Model that needs no assets and takes a while to synthesize"""
+    def __call__(
+        self,
+        duration: float = 0.05,
+        seed: Optional[int] = None
+    ) -> _Scene:
+        return super().__call__(duration, seed=seed)
+
+    def call(self, duration: float) -> _Scene:
+        time.sleep(duration)
+        return _Scene(self)
+
+
+class _GlobalRandomModel(Model[list]):
+    """Model that draws from the global RNGs while other threads run"""
+    def call(self) -> list:
+        drawn = []
+        for _ in range(5):
+            drawn.append((np.random.random(), random.random()))
+            time.sleep(0.005)
+        return drawn
+
+
+class AsyncModelRunnerTest(unittest.TestCase):
+    def test_it_limits_concurrency(self):
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def _work(model: Model) -> None:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        async def _main():
+            runner = AsyncModelRunner(_SlowModel, concurrency=2)
+            await asyncio.gather(*[runner.run(_work) for _ in range(8)])
+            runner.close()
+
+        asyncio.run(_main())
+        assert max_running == 2
+
+    def test_it_rejects_requests_when_the_queue_is_full(self):
+        async def _main():
+            runner = AsyncModelRunner(_SlowModel, max_queued=1)
+            running = asyncio.ensure_future(runner.synthesize(0.1))
+            queued = asyncio.ensure_future(runner.synthesize(0.1))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(RunnerOverloadedError):
+                await runner.synthesize(0.1)
+            await asyncio.gather(running, queued)
+            runner.close()
+
+        asyncio.run(_main())
+
+    def test_scene_is_rendered_by_its_model(self):
+        async def _main():
+            runner = AsyncModelRunner(_SlowModel, concurrency=3)
+            scenes = await asyncio.gather(
+                *[runner.synthesize(0.01) for _ in range(6)]
+            )
+            for scene in scenes:
+                model = await runner.run(lambda m: m, scene=scene)
+                assert model is scene.model
+            runner.close()
+
+        asyncio.run(_main())
+
+    def test_cancelled_requests_release_their_model(self):
+        async def _main():
+            runner = AsyncModelRunner(_SlowModel)
+            running = asyncio.ensure_future(runner.synthesize(0.1))
+            queued = asyncio.ensure_future(runner.synthesize(0.1))
+            await asyncio.sleep(0.01)
+            running.cancel()
+            queued.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+            assert runner.queued_count == 0
+
+            # the model is released once the cancelled work finishes
+            scene = await asyncio.wait_for(runner.synthesize(0.01), 1.0)
+            assert isinstance(scene, _Scene)
+            assert runner.running_count == 0
+            runner.close()
+
+        asyncio.run(_main())
+
+    def test_concurrent_seeded_requests_are_reproducible(self):
+        expected = [_GlobalRandomModel()(seed=seed) for seed in [1, 2]]
+
+        async def _main():
+            runner = AsyncModelRunner(_GlobalRandomModel, concurrency=3)
+            results = await asyncio.gather(
+                runner.synthesize(seed=1),
+                runner.synthesize(seed=2),
+                runner.synthesize() # unseeded, runs concurrently
+            )
+            runner.close()
+            return results
+
+        results = asyncio.run(_main())
+        assert results[:2] == expected
+
+    def test_seeded_scenes_are_rendered_with_their_seed(self):
+        async def _main():
+            runner = AsyncModelRunner(_SlowModel, concurrency=2)
+            a, b, c = await asyncio.gather(
+                runner.synthesize(0.01, seed=1),
+                runner.synthesize(0.01, seed=1),
+                runner.synthesize(0.01)
+            )
+            rendered = [
+                await runner.render(scene, "page") # type: ignore
+                for scene in [a, b, c]
+            ]
+            runner.close()
+            return rendered
+
+        a, b, c = asyncio.run(_main())
+        assert a == b and a[1] is not None
+        assert c == ("page", None)
+
+    def test_configure_receives_the_synthesizing_model(self):
+        async def _main():
+            runner = AsyncModelRunner(_SlowModel, concurrency=2)
+            configured = []
+            scene = await runner.synthesize(0.01, configure=configured.append)
+            assert configured == [scene.model]
+            model = await runner.run(lambda m: m, scene=scene)
+            assert model is scene.model
+            runner.close()
+
+        asyncio.run(_main())
@@ -0,0 +1,155 @@
+import gc
+import pickle
+import random
+import unittest
+import weakref
+
+import numpy as np
+
+from smashcima.exporting.compositing.Compositor import Compositor
+from smashcima.exporting.compositing.CompositorCache import CompositorCache
+from smashcima.exporting.compositing.DefaultCompositor import \
+    DefaultCompositor
+from smashcima.exporting.image.ImageLayer import ImageLayer
+from smashcima.exporting.postprocessing.BaseHandwrittenPostprocessor import \
+    BaseHandwrittenPostprocessor
+from smashcima.geometry import Rectangle
+from smashcima.orchestration.BaseHandwrittenModel import BaseHandwrittenScene
+from smashcima.scene import AffineSpace, Page, Score, Sprite, ViewBox
+
+
+class CountingCompositor(Compositor):
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, view_box: ViewBox, dpi: float) -> ImageLayer:
+        self.runs += 1
+        return ImageLayer(
+            bitmap=np.zeros(shape=(10, 10, 4), dtype=np.uint8), # 400 B
+            dpi=dpi,
+            space=AffineSpace(),
+            regions=[]
+        )
+
+
+def build_scene(
+    compositor: Compositor,
+    cache: CompositorCache,
+    page_count: int = 2
+) -> BaseHandwrittenScene:
+    root = AffineSpace()
+    pages = []
+    for i in range(page_count):
+        space = AffineSpace(parent_space=root)
+        Sprite.rectangle(space, Rectangle(i * 10, 0, 10, 10))
+        pages.append(Page(
+            space=space,
+            view_box=ViewBox(root, Rectangle(i * 10, 0, 10, 10))
+        ))
+    return BaseHandwrittenScene(
+        root_space=root,
+        score=Score(parts=[]),
+        mpp_writer=1,
+        mzk_background_patch=None, # type: ignore
+        pages=pages,
+        compositor=compositor,
+        compositor_cache=cache
+    )
+
+
+class BaseHandwrittenSceneTest(unittest.TestCase):
+    def test_shared_cache_evicts_least_recently_used_pages(self):
+        compositor = CountingCompositor()
+        cache = CompositorCache(max_bytes=3 * 400)
+        a = build_scene(compositor, cache)
+        b = build_scene(compositor, cache)
+
+        a.compose_page(a.pages[0])
+        a.compose_page(a.pages[1])
+        b.compose_page(b.pages[0])
+        a.compose_page(a.pages[0]) # (now the most recently used)
+        assert compositor.runs == 3
+        assert cache.hits == 1
+
+        b.compose_page(b.pages[1]) # evicts the second page of a
+        assert len(cache) == 3 and cache.nbytes == 3 * 400
+        a.compose_page(a.pages[0])
+        assert compositor.runs == 4
+        a.compose_page(a.pages[1])
+        assert compositor.runs == 5
+
+    def test_pages_of_collected_scenes_leave_the_cache(self):
+        cache = CompositorCache()
+        a = build_scene(CountingCompositor(), cache)
+        b = build_scene(CountingCompositor(), cache)
+        for scene in [a, b]:
+            scene.compose_page(scene.pages[0])
+            scene.compose_page(scene.pages[1])
+        copy = pickle.loads(pickle.dumps(b))
+        copy.compositor_cache = cache
+        copy.compose_page(copy.pages[0])
+        assert len(cache) == 5
+
+        del a
+        gc.collect()
+        assert len(cache) == 3
+        del copy
+        gc.collect()
+        assert len(cache) == 2
+
+    def test_invalidation_and_copies_do_not_reuse_images(self):
+        compositor = CountingCompositor()
+        scene = build_scene(compositor, CompositorCache())
+        scene.compose_page(scene.pages[0])
+        scene.compose_page(scene.pages[1])
+
+        scene.invalidate_composed_pages(scene.pages[1])
+        scene.compose_page(scene.pages[0])
+        scene.compose_page(scene.pages[1])
+        assert compositor.runs == 3
+
+        copy = pickle.loads(pickle.dumps(scene))
+        copy.compositor_cache = scene.compositor_cache
+        copy.compose_page(copy.pages[0])
+        assert copy.compositor.runs == 4 # type: ignore
+
+    def test_dropped_bitmaps_are_released_and_the_image_kept(self):
+        compositor = CountingCompositor()
+        cache = CompositorCache()
+        scene = build_scene(compositor, cache)
+        scene.drop_sprite_bitmaps = True
+        sprite = Sprite.many_of_space(scene.pages[0].space)[0]
+        shape = sprite.bitmap.shape
+        bitmap = weakref.ref(sprite.bitmap)
+
+        layer = scene.compose_page(scene.pages[0])
+        gc.collect()
+        assert bitmap() is None
+        assert sprite.bitmap.shape == shape
+
+        # the image survives the cache, but the page cannot be recomposed
+        cache.clear()
+        scene.invalidate_composed_pages()
+        assert scene.compose_page(scene.pages[0]) is layer
+        assert compositor.runs == 1
+        scene.dpi = 150
+        with self.assertRaises(Exception):
+            scene.compose_page(scene.pages[0])
+
+    def test_seeded_render_does_not_depend_on_the_model_rng(self):
+        rng = random.Random(1)
+        postprocessor = BaseHandwrittenPostprocessor(rng)
+        for f in [
+            postprocessor.f_scribbles,
+            postprocessor.f_folding,
+            postprocessor.f_camera
+        ]:
+            f.force_dont = True # (final layer filters are slow)
+        scene = build_scene(
+            DefaultCompositor(postprocessor), CompositorCache()
+        )
+
+        a = scene.render(scene.pages[0], seed=5)
+        rng.seed(2) # e.g. another request used the model
+        b = scene.render(scene.pages[0], seed=5)
+        assert np.array_equal(a, b)
@@ -0,0 +1,172 @@
+import gc
+import multiprocessing
+import os
+import random
+import unittest
+from unittest import mock
+from typing import Optional, Tuple
+
+import numpy as np
+
+from smashcima.orchestration.BatchSynthesizer import BatchSynthesizer
+from smashcima.orchestration.Model import Model
+
+
+class _EchoModel(Model[Tuple[int, str]]):
+    """Model that needs no assets, it returns the input and the process ID"""
+    def __call__(
+        self,
+        file: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> Tuple[int, str]:
+        return super().__call__(file, seed=seed)
+
+    def call(self, file: str) -> Tuple[int, str]:
+        return (os.getpid(), str(file))
+
+
+class _RandomModel(Model[Tuple[float, float, float]]):
+    """Model that samples all three RNGs used during synthesis"""
+    def __call__(
+        self,
+        file: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> Tuple[float, float, float]:
+        return super().__call__(seed=seed)
+
+    def call(self) -> Tuple[float, float, float]:
+        return (
+            self.rng.random(),
+            float(np.random.rand()),
+            random.random()
+        )
+
+
+class _ConstructionPidModel(Model[int]):
+    """Model that returns the ID of the process that constructed it"""
+    def register_services(self):
+        super().register_services()
+        self.constructed_in = os.getpid()
+
+    def __call__(
+        self,
+        file: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> int:
+        return super().__call__(seed=seed)
+
+    def call(self) -> int:
+        return self.constructed_in
+
+
+def _take_file_name(model: Model, scene: Tuple[int, str]) -> str:
+    return scene[1]
+
+
+class BatchSynthesizerTest(unittest.TestCase):
+    def test_it_yields_results_in_input_order(self):
+        inputs = [f"file_{i}.musicxml" for i in range(20)]
+        with BatchSynthesizer(
+            _EchoModel, workers=2, process=_take_file_name, max_pending=3
+        ) as batch:
+            results = list(batch.run(inputs))
+
+        assert [i for i, _ in results] == list(range(20))
+        assert [r for _, r in results] == inputs
+
+    def test_it_yields_results_in_completion_order(self):
+        inputs = [f"file_{i}.musicxml" for i in range(20)]
+        with BatchSynthesizer(
+            _EchoModel, workers=2, process=_take_file_name, ordered=False
+        ) as batch:
+            results = list(batch.run(inputs))
+
+        assert sorted(i for i, _ in results) == list(range(20))
+        assert all(inputs[i] == r for i, r in results)
+
+    def test_it_runs_in_worker_processes(self):
+        with BatchSynthesizer(_EchoModel, workers=2) as batch:
+            results = list(batch.run(["a", "b", "c"]))
+
+        assert all(pid != os.getpid() for _, (pid, _) in results)
+
+    def test_it_can_run_in_the_calling_process(self):
+        with BatchSynthesizer(_EchoModel, workers=0) as batch:
+            results = list(batch.run(["a", "b"]))
+
+        assert results == [(0, (os.getpid(), "a")), (1, (os.getpid(), "b"))]
+
+    def test_seeded_samples_do_not_depend_on_the_worker(self):
+        inputs = ["a"] * 8
+        with BatchSynthesizer(_RandomModel, workers=0, seed=42) as batch:
+            serial = list(batch.run(inputs))
+        with BatchSynthesizer(
+            _RandomModel, workers=3, seed=42, ordered=False
+        ) as batch:
+            parallel = sorted(batch.run(inputs))
+
+        assert serial == parallel
+
+        # the three streams are independent and samples differ
+        assert len(set(serial[0][1])) == 3
+        assert len(set(r for _, r in serial)) == 8
+
+    def test_per_sample_seed_overrides_the_seed_in_kwargs(self):
+        inputs = [{"file": "a", "seed": 5}, {"file": "a"}]
+        with BatchSynthesizer(_RandomModel, workers=0) as batch:
+            unseeded = [r for _, r in batch.run(inputs)]
+        with BatchSynthesizer(_RandomModel, workers=0, seed=42) as batch:
+            seeded = [r for _, r in batch.run(inputs, first_index=7)]
+
+        assert unseeded[0] == _RandomModel()(seed=5)
+        assert seeded[0] == _RandomModel()(seed=batch.sample_seed(7))
+        assert seeded[0] != unseeded[0]
+
+    @unittest.skipUnless(
+        "fork" in multiprocessing.get_all_start_methods(),
+        "The fork start method is not available"
+    )
+    def test_warm_workers_inherit_the_model(self):
+        frozen = gc.get_freeze_count()
+        with BatchSynthesizer(
+            _ConstructionPidModel, workers=2, start_method="fork"
+        ) as batch:
+            warm = list(batch.run(["a", "b", "c"]))
+            assert gc.get_freeze_count() == frozen # (only in the workers)
+        with BatchSynthesizer(
+            _ConstructionPidModel, workers=2, start_method="fork",
+            warm_start=False
+        ) as batch:
+            cold = list(batch.run(["a", "b", "c"]))
+
+        assert all(pid == os.getpid() for _, pid in warm)
+        assert all(pid != os.getpid() for _, pid in cold)
+
+    def test_warm_start_does_not_change_the_start_method(self):
+        batch = BatchSynthesizer(_ConstructionPidModel, workers=2)
+        with mock.patch("multiprocessing.get_start_method") as get:
+            get.return_value = "spawn"
+            assert not batch._forks_warm_workers()
+            get.return_value = "fork"
+            assert batch._forks_warm_workers()
+
+        batch.start_method = "forkserver"
+        assert not batch._forks_warm_workers()
+
+    def test_warm_workers_do_not_share_random_state(self):
+        with BatchSynthesizer(
+            _RandomModel, workers=3, max_pending=3, ordered=False
+        ) as batch:
+            results = [r for _, r in batch.run(["a"] * 12)]
+
+        assert len(set(results)) == 12
+
+    def test_model_seed_makes_the_sample_reproducible(self):
+        model = _RandomModel()
+        a = model(seed=1234)
+        model() # advance the random state
+        b = model(seed=1234)
+        c = model(seed=1235)
+
+        assert a == b
+        assert a != c
@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from smashcima.__main__ import main
+from smashcima.exporting.image.ImageLayer import ImageLayer
+from smashcima.orchestration.generate_dataset import generate_dataset
+from smashcima.orchestration.Model import Model
+from smashcima.scene import AffineSpace
+
+
+class _FakeScene:
+    """Scene with random, but seeded, pages that are cheap to render"""
+    def __init__(self, colors: List[int]):
+        self.dpi = 300.0
+        self.pages = colors
+
+    def compose_page(self, page: int) -> ImageLayer:
+        return ImageLayer(
+            bitmap=np.full((20, 30, 4), page, dtype=np.uint8),
+            dpi=self.dpi,
+            space=AffineSpace(),
+            regions=[]
+        )
+
+
+class _FakeModel(Model[_FakeScene]):
+    """Model that needs no assets, it produces one or two pages"""
+    def __call__(
+        self,
+        file: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> _FakeScene:
+        return super().__call__(seed=seed)
+
+    def call(self) -> _FakeScene:
+        return _FakeScene([
+            self.rng.randint(0, 255)
+            for _ in range(self.rng.randint(1, 2))
+        ])
+
+
+def _read_records(directory: Path) -> Dict[str, bytes]:
+    records = {}
+    for shard in sorted(directory.glob("*.tar")):
+        with tarfile.open(shard) as tar:
+            for member in tar.getmembers():
+                records[member.name] = tar.extractfile(member).read()
+    return records
+
+
+class GenerateDatasetTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp.name)
+        self.corpus = self.directory / "corpus"
+        (self.corpus / "nested").mkdir(parents=True)
+        for name in ["a.musicxml", "nested/b.musicxml", "ignored.txt"]:
+            (self.corpus / name).write_text("")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def generate(self, output: str, samples: int = 10, **kwargs) -> List[int]:
+        kwargs.setdefault("workers", 2)
+        return list(generate_dataset(
+            corpus_directory=kwargs.pop("corpus", self.corpus),
+            output_directory=self.directory / output,
+            model_factory=_FakeModel,
+            samples=samples,
+            max_shard_size=10_000,
+            seed=kwargs.pop("seed", 7),
+            **kwargs
+        ))
+
+    def test_records_are_split_into_shards(self):
+        assert self.generate("out") == list(range(10))
+
+        assert len(list((self.directory / "out").glob("*.tar"))) > 1
+        records = _read_records(self.directory / "out")
+        annotation = json.loads(records["000000001_p00.json"])
+        assert annotation["sample"] == 1
+        assert annotation["source"] == "nested/b.musicxml"
+        assert annotation["width"] == 30 and annotation["height"] == 20
+
+    def test_output_does_not_depend_on_workers_and_mode(self):
+        self.generate("one", workers=1)
+        self.generate("three", workers=3)
+        self.generate("pipelined", workers=2, raster_workers=2)
+
+        expected = _read_records(self.directory / "one")
+        assert _read_records(self.directory / "three") == expected
+        assert _read_records(self.directory / "pipelined") == expected
+
+    def test_interrupted_run_is_resumed(self):
+        self.generate("full")
+
+        # the run crashes after a few samples
+        iterator = generate_dataset(
+            corpus_directory=self.corpus,
+            output_directory=self.directory / "resumed",
+            model_factory=_FakeModel,
+            samples=10,
+            workers=2,
+            max_shard_size=10_000,
+            seed=7
+        )
+        for index in iterator:
+            if index == 6:
+                break
+        iterator.close()
+
+        # and it is resumed with the corpus path spelled differently
+        written = self.generate(
+            "resumed",
+            corpus=self.corpus / "nested" / ".." / ".." / "corpus"
+        )
+        assert 0 < written[0] <= 6
+        assert _read_records(self.directory / "resumed") \
+            == _read_records(self.directory / "full")
+
+    def test_a_different_dataset_is_not_resumed(self):
+        self.generate("out", samples=4)
+        with self.assertRaises(Exception):
+            self.generate("out", samples=8, seed=8)
+
+    def test_command_line_interface(self):
+        with redirect_stderr(io.StringIO()): # (the progress bar)
+            main([
+                "generate", str(self.corpus), str(self.directory / "cli"),
+                "--model", f"{__name__}._FakeModel",
+                "--samples", "3", "--workers", "1", "--seed", "7"
+            ])
+        records = _read_records(self.directory / "cli")
+        assert "000000002_p00.png" in records
+        assert os.path.exists(self.directory / "cli" / "manifest.json")
@@ -0,0 +1,74 @@
+import os
+import random
+import unittest
+from typing import Optional, Tuple
+
+from smashcima.orchestration.Model import Model
+from smashcima.orchestration.PipelinedSynthesizer import PipelinedSynthesizer
+from smashcima.scene.AffineSpace import AffineSpace
+from smashcima.scene.Scene import Scene
+
+
+class _LabeledScene(Scene):
+    def __init__(self, label: str, value: float):
+        super().__init__(AffineSpace())
+        self.label = label
+        self.value = value
+        self.layout_pid = os.getpid()
+
+
+class _LabelModel(Model[_LabeledScene]):
+    """Model that needs no assets, it returns a scene with the input"""
+    def __call__(
+        self,
+        file: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> _LabeledScene:
+        return super().__call__(file, seed=seed)
+
+    def call(self, file: str) -> _LabeledScene:
+        return _LabeledScene(str(file), self.rng.random())
+
+
+def _raster(scene: _LabeledScene) -> Tuple[str, float, float, int, int]:
+    return (
+        scene.label, scene.value, random.random(),
+        scene.layout_pid, os.getpid()
+    )
+
+
+class PipelinedSynthesizerTest(unittest.TestCase):
+    def test_it_yields_results_in_input_order(self):
+        inputs = [f"file_{i}.musicxml" for i in range(20)]
+        with PipelinedSynthesizer(
+            _LabelModel, layout_workers=2, raster_workers=3, raster=_raster,
+            max_pending=4
+        ) as pipeline:
+            results = list(pipeline.run(inputs))
+
+        assert [i for i, _ in results] == list(range(20))
+        assert [r[0] for _, r in results] == inputs
+
+        # the stages run in different processes
+        layout_pids = set(r[3] for _, r in results)
+        raster_pids = set(r[4] for _, r in results)
+        assert os.getpid() not in layout_pids | raster_pids
+        assert len(layout_pids & raster_pids) == 0
+
+    def test_seeded_results_do_not_depend_on_pool_sizes(self):
+        inputs = ["a"] * 8
+        with PipelinedSynthesizer(
+            _LabelModel, layout_workers=1, raster_workers=1, raster=_raster,
+            seed=42
+        ) as pipeline:
+            serial = [r[:3] for _, r in pipeline.run(inputs)]
+        with PipelinedSynthesizer(
+            _LabelModel, layout_workers=2, raster_workers=3, raster=_raster,
+            seed=42, ordered=False
+        ) as pipeline:
+            parallel = sorted(
+                (i, r[:3]) for i, r in pipeline.run(inputs, first_index=0)
+            )
+
+        assert serial == [r for _, r in parallel]
+        assert len(set(serial)) == 8
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from smashcima.geometry import Point, Transform, Vector2
+from smashcima.scene.AffineSpace import AffineSpace
+
+
+class AffineSpaceTest(unittest.TestCase):
+    def test_transform_from_composes_the_chain(self):
+        root = AffineSpace()
+        page = AffineSpace(root, Transform.translate(Vector2(100, 0)))
+        staff = AffineSpace(page, Transform.scale(2))
+        glyph = AffineSpace(staff, Transform.rotateDegCC(30))
+
+        expected = glyph.transform.then(staff.transform)
+        assert np.allclose(page.transform_from(glyph).matrix, expected.matrix)
+        assert np.allclose(
+            root.transform_from(glyph).matrix,
+            expected.then(page.transform).matrix
+        )
+        with self.assertRaises(Exception):
+            glyph.transform_from(page)
+
+    def test_transform_from_ignores_spaces_above(self):
+        root = AffineSpace()
+        collapsed = AffineSpace(root, Transform.scale(0)) # non-invertible
+        staff = AffineSpace(collapsed, Transform.scale(2))
+        glyph = AffineSpace(staff, Transform.translate(Vector2(1, 2)))
+
+        assert staff.transform_from(glyph).apply_to(Point(0, 0)) \
+            == Point(1, 2)
+        assert root.transform_from(glyph).apply_to(Point(5, 5)) \
+            == Point(0, 0)
+
+        # the transform of the root itself is not included
+        root.transform = Transform.translate(Vector2(10, 10))
+        page = AffineSpace(root, Transform.translate(Vector2(1, 2)))
+        assert root.transform_from(page).apply_to(Point(0, 0)) \
+            == Point(1, 2)
+
+    def test_moving_a_space_moves_its_subtree(self):
+        root = AffineSpace()
+        page = AffineSpace(root)
+        glyph = AffineSpace(page, Transform.translate(Vector2(1, 2)))
+        assert root.transform_from(glyph).apply_to(Point(0, 0)) == Point(1, 2)
+
+        page.transform = Transform.translate(Vector2(10, 10))
+        assert root.transform_from(glyph).apply_to(Point(0, 0)) \
+            == Point(11, 12)
+
+        other_page = AffineSpace(root, Transform.translate(Vector2(50, 0)))
+        glyph.parent_space = other_page
+        assert root.transform_from(glyph).apply_to(Point(0, 0)) \
+            == Point(51, 2)
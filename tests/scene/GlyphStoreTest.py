@@ -0,0 +1,96 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from smashcima.exporting.compositing.DefaultCompositor import \
+    DefaultCompositor
+from smashcima.exporting.postprocessing.NullPostprocessor import \
+    NullPostprocessor
+from smashcima.geometry import Rectangle, Transform, Vector2
+from smashcima.scene.AffineSpace import AffineSpace
+from smashcima.scene.ComposedGlyph import ComposedGlyph
+from smashcima.scene.Glyph import Glyph
+from smashcima.scene.GlyphStore import GlyphStore
+from smashcima.scene.SmashcimaLabels import SmashcimaLabels
+from smashcima.scene.Sprite import Sprite
+from smashcima.scene.ViewBox import ViewBox
+
+
+def build_glyph(label: str, rectangle: Rectangle) -> Glyph:
+    space = AffineSpace()
+    sprite = Sprite.debug_box(space, rectangle)
+    return Glyph(
+        space=space,
+        region=Glyph.build_region_from_sprites_alpha_channel(
+            label, [sprite]
+        ),
+        sprites=[sprite]
+    )
+
+
+class GlyphStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.root = AffineSpace()
+        self.paper = Sprite.rectangle(
+            self.root, Rectangle(0, 0, 40, 30), fill_color=(200, 220, 240, 255)
+        )
+
+        self.staffline = build_glyph(
+            SmashcimaLabels.staffLine.value, Rectangle(-15, -0.5, 30, 1)
+        )
+        self.staffline.space.parent_space = self.root
+        self.staffline.space.transform = Transform.translate(Vector2(20, 10))
+
+        self.notehead = build_glyph("notehead", Rectangle(-2, -1.5, 4, 3))
+        self.stem = build_glyph("stem", Rectangle(-0.5, -8, 1, 8))
+        self.stem.space.transform = Transform.translate(Vector2(1.5, 0))
+        self.note = ComposedGlyph.build("note", [self.notehead, self.stem])
+        self.note.space.parent_space = self.root
+        self.note.space.transform = Transform.translate(Vector2(12, 20)) \
+            .then(Transform.rotateDegCC(10))
+
+        self.view_box = ViewBox(self.root, Rectangle(0, 0, 40, 30))
+
+    def test_views_reflect_the_scene(self):
+        store = GlyphStore.from_view_box(self.view_box)
+        glyphs = {g.label: g for g in store.glyphs}
+
+        assert store.glyph_count == 4
+        assert store.sprite_count == 4
+        assert glyphs["note"].parent is None
+        assert glyphs["stem"].parent.label == "note"
+        assert [g.label for g in glyphs["note"].sub_glyphs] \
+            == ["notehead", "stem"]
+        assert len(glyphs["note"].sprites) == 2
+        assert glyphs["stem"].sprites[0].bitmap is self.stem.sprites[0].bitmap
+
+        for glyph in [self.staffline, self.notehead, self.stem, self.note]:
+            view = glyphs[glyph.label]
+            expected = glyph.get_bbox_in_space(self.root)
+            actual = view.bbox()
+            assert np.allclose(
+                [actual.x, actual.y, actual.width, actual.height],
+                [expected.x, expected.y, expected.width, expected.height]
+            )
+            owner = view.region.glyph
+            if isinstance(glyph, ComposedGlyph):
+                assert owner is None
+            else:
+                assert owner.index == view.index
+
+    def test_compositing_matches_the_scene(self):
+        compositor = DefaultCompositor(NullPostprocessor())
+        store = pickle.loads(pickle.dumps(
+            GlyphStore.from_view_box(self.view_box)
+        ))
+
+        expected = compositor.extract_layers(self.view_box, dpi=150)
+        actual = compositor.extract_glyph_store_layers(store, dpi=150)
+
+        for name in ["paper", "stafflines", "ink"]:
+            assert np.array_equal(
+                expected[name].bitmap, actual[name].bitmap
+            ), name
+            assert [r.label for r in expected[name].regions] \
+                == [r.label for r in actual[name].regions], name
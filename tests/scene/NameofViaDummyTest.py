@@ -17,3 +17,15 @@ class NameofViaDummyTest(unittest.TestCase):
     def test_it_survives_non_string(self):
         assert nameof_via_dummy(Foo, lambda f: "nah") == "nah"
         assert nameof_via_dummy(Foo, lambda f: 42) == "42"
+
+    def test_it_accepts_a_string(self):
+        assert nameof_via_dummy(Foo, "bar") == "bar"
+
+    def test_probes_reading_variables_are_not_cached(self):
+        names = []
+        for field in ["a", "b"]:
+            names.append(nameof_via_dummy(Foo, lambda f: field))
+        assert names == ["a", "b"]
+
+        for _ in range(2):
+            assert nameof_via_dummy(Foo, lambda f: f.baz) == "baz"
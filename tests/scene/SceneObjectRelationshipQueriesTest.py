@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from dataclasses import dataclass
 from typing import List, Optional
@@ -40,6 +41,11 @@ class Word(SceneObject):
         return cls.many_of(letter, lambda w: w.letters)
 
 
+@dataclass
+class Sentence(Word):
+    pass
+
+
 class SceneObjectRelationshipQueriesTest(unittest.TestCase):
     def test_standalone_letter_has_no_word(self):
         letter = Letter("A")
@@ -122,3 +128,92 @@ class SceneObjectRelationshipQueriesTest(unittest.TestCase):
         # therefore we fail with an exception.
         with self.assertRaises(ValueError):
             Word.many_of(None, lambda w: w.letters)
+
+    def test_links_keep_insertion_order_across_types(self):
+        word = Word.build("AB")
+        sentence = Sentence("AB", letters=word.letters)
+        word_a = Word("A", letters=word.letters[0:1])
+        letter = word.letters[0]
+
+        assert Word.many_of_letter(letter) == [word, sentence, word_a]
+        assert Sentence.many_of_letter(letter) == [sentence]
+        assert [l.source for l in letter.inlinks] == [word, sentence, word_a]
+
+        # re-assigning the field removes the old links
+        sentence.letters = word.letters[1:2]
+        assert Word.many_of_letter(letter) == [word, word_a]
+        assert Sentence.many_of_letter(word.letters[1]) == [sentence]
+
+    def test_links_appended_after_a_query_keep_their_order(self):
+        letter = Letter("A")
+        first = Sentence("A", letters=[letter])
+        assert Word.many_of_letter(letter) == [first] # (builds the index)
+
+        words = [
+            Sentence("A", letters=[letter]) if i % 2 else
+            Word("A", letters=[letter])
+            for i in range(5)
+        ]
+        words[2].letters = []
+        expected = [first, *words[:2], *words[3:]]
+        assert Word.many_of_letter(letter) == expected
+        assert Sentence.many_of_letter(letter) == [first, words[1], words[3]]
+
+        assert letter.inlinks[0].source is first
+        assert letter.inlinks[-1].source is words[4]
+        assert [l.source for l in letter.inlinks][1:3] == words[:2]
+        with self.assertRaises(IndexError):
+            letter.inlinks[len(expected)]
+
+    def test_links_survive_pickling(self):
+        word = Word.build("ABC")
+        clone = pickle.loads(pickle.dumps(word))
+        letter = clone.letters[2]
+        assert Word.of_letter(letter) is clone
+        clone.letters = []
+        assert Word.of_letter_or_none(letter) is None
+        assert len(clone.outlinks) == 0
+
+    def test_in_place_list_modifications_update_links(self):
+        word = Word.build("AB")
+        c = Letter("C")
+        word.letters.append(c)
+        assert Word.of_letter(c) is word
+
+        a = word.letters.pop(0)
+        assert Word.of_letter_or_none(a) is None
+        word.letters[0] = a
+        assert Word.many_of_letter(a) == [word]
+
+        word.letters.remove(c)
+        assert Word.of_letter_or_none(c) is None
+        assert len(word.outlinks) == 1
+
+        # a replaced list no longer affects the links
+        old_letters = word.letters
+        word.letters = [c]
+        old_letters.append(Letter("D"))
+        assert [l.target for l in word.outlinks] == [c]
+
+    def test_in_place_modifications_after_pickling(self):
+        clone = pickle.loads(pickle.dumps(Word.build("ABC")))
+        b = clone.letters[1]
+        del clone.letters[1:]
+        assert Word.of_letter_or_none(b) is None
+        assert len(clone.outlinks) == 1
+
+    def test_list_replaced_by_an_object_no_longer_affects_links(self):
+        word = Word.build("AB")
+        old_letters = word.letters
+        c = Letter("C")
+        word.letters = c # type: ignore
+        old_letters.append(Letter("D"))
+        assert [l.target for l in word.outlinks] == [c]
+
+    def test_assigned_lists_are_copied(self):
+        letters: List[Letter] = []
+        word = Word(text="", letters=letters)
+        letters.append(Letter("A"))
+        assert word.letters is not letters
+        assert word.letters == []
+        assert len(word.outlinks) == 0
@@ -0,0 +1,96 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from smashcima.geometry import Transform, Vector2
+from smashcima.scene.AffineSpace import AffineSpace
+from smashcima.scene.Glyph import Glyph
+from smashcima.scene.Scene import Scene
+from smashcima.scene.scene_serialization import (dump_scene, dumps_scene,
+                                                 load_scene, loads_scene)
+from smashcima.scene.Sprite import Sprite
+
+
+def _build_scene() -> Scene:
+    root = AffineSpace()
+    glyphs = []
+    for i in range(3):
+        space = AffineSpace(
+            parent_space=root,
+            transform=Transform.translate(Vector2(i * 10, 0))
+        )
+        bitmap = np.zeros((40, 30, 4), dtype=np.uint8)
+        bitmap[:, :, 3] = 255 if i < 2 else 128 # first two are identical
+        sprite = Sprite(space, bitmap)
+        glyphs.append(Glyph(
+            space=space,
+            region=Glyph.build_region_from_sprites_alpha_channel(
+                label=f"glyph{i}",
+                sprites=[sprite]
+            ),
+            sprites=[sprite]
+        ))
+    scene = Scene(root)
+    scene.add_many(glyphs)
+    return scene
+
+
+def _graph_signature(scene: Scene):
+    objects = list(scene.objects.values())
+    indices = {id(obj): i for i, obj in enumerate(objects)}
+    return [
+        (
+            type(obj).__name__,
+            [(l.name, indices[id(l.target)]) for l in obj.outlinks],
+            [(l.name, indices[id(l.source)]) for l in obj.inlinks]
+        )
+        for obj in objects
+    ]
+
+
+class SceneSerializationTest(unittest.TestCase):
+    def test_it_preserves_objects_and_links(self):
+        scene = _build_scene()
+        loaded = loads_scene(dumps_scene(scene))
+
+        assert _graph_signature(loaded) == _graph_signature(scene)
+        assert all(id(obj) == key for key, obj in loaded.objects.items())
+
+        glyph = loaded.find(Glyph)[0]
+        assert Glyph.of_or_none(glyph.sprites[0], lambda g: g.sprites) \
+            is glyph
+        assert glyph.space.parent_space is loaded.root_space
+
+    def test_identical_bitmaps_are_stored_once(self):
+        scene = _build_scene()
+        data = dumps_scene(scene)
+
+        bitmaps = [g.sprites[0].bitmap for g in loads_scene(data).find(Glyph)]
+        assert len(data) < 3 * bitmaps[0].nbytes
+        assert bitmaps[0].ctypes.data == bitmaps[1].ctypes.data
+        assert bitmaps[0].ctypes.data != bitmaps[2].ctypes.data
+        start = np.frombuffer(data, dtype=np.uint8).ctypes.data
+        assert (bitmaps[0].ctypes.data - start) % 64 == 0
+
+    def test_it_memory_maps_the_file(self):
+        scene = _build_scene()
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "scene.smc"
+            dump_scene(scene, path)
+            loaded = load_scene(path)
+
+            original = sorted(g.label for g in scene.find(Glyph))
+            assert sorted(g.label for g in loaded.find(Glyph)) == original
+            for glyph in loaded.find(Glyph):
+                bitmap = glyph.sprites[0].bitmap
+                assert bitmap.shape == (40, 30, 4)
+                assert bitmap.flags.writeable
+
+            # copy-on-write, the file is not modified
+            loaded.find(Glyph)[0].sprites[0].bitmap[:] = 7
+            again = load_scene(path, memory_map=False)
+            assert all(
+                g.sprites[0].bitmap[0, 0, 0] == 0 for g in again.find(Glyph)
+            )
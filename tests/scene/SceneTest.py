@@ -0,0 +1,93 @@
+import pickle
+import unittest
+from dataclasses import dataclass
+from typing import Optional
+
+from smashcima.geometry import (Contours, Polygon, Rectangle, Transform,
+                                Vector2)
+from smashcima.scene.AffineSpace import AffineSpace
+from smashcima.scene.Glyph import Glyph
+from smashcima.scene.LabeledRegion import LabeledRegion
+from smashcima.scene.Scene import Scene
+from smashcima.scene.SceneObject import SceneObject
+
+
+@dataclass
+class Item(SceneObject):
+    previous: Optional["Item"] = None
+
+
+@dataclass
+class SpecialItem(Item):
+    pass
+
+
+class SceneTest(unittest.TestCase):
+    def test_find_keeps_the_order_of_addition(self):
+        scene = Scene(AffineSpace())
+        items = [Item(), SpecialItem(), Item(), SpecialItem()]
+        scene.add_many(items)
+
+        assert scene.find(Item) == items
+        assert scene.find(SpecialItem) == [items[1], items[3]]
+        assert scene.find(AffineSpace) == [scene.root_space]
+
+    def test_long_chains_do_not_hit_the_recursion_limit(self):
+        item = Item()
+        for _ in range(10_000):
+            item = Item(previous=item)
+
+        scene = Scene(AffineSpace())
+        scene.add(item)
+        assert len(scene.find(Item)) == 10_001
+
+    def test_closure_adds_newly_linked_objects(self):
+        first = Item()
+        scene = Scene(AffineSpace())
+        scene.add(first)
+
+        second = Item(previous=first)
+        third = Item(previous=second)
+        assert not scene.has(third)
+        scene.add_closure()
+        assert scene.find(Item) == [first, second, third]
+
+    def test_pickled_scene_tracks_its_objects(self):
+        scene = Scene(AffineSpace())
+        scene.add(Item(previous=SpecialItem()))
+
+        loaded = pickle.loads(pickle.dumps(scene))
+        assert all(loaded.has(obj) for obj in loaded.find(Item))
+        assert len(loaded.find(SpecialItem)) == 1
+
+    def test_regions_and_glyphs_are_queried_by_window(self):
+        scene = Scene(AffineSpace())
+        page = AffineSpace(
+            scene.root_space, Transform.translate(Vector2(0, 100))
+        )
+        glyphs = []
+        for i in range(10):
+            space = AffineSpace(page, Transform.translate(Vector2(i * 10, 0)))
+            glyphs.append(Glyph(
+                space=space,
+                region=LabeledRegion(
+                    space=space,
+                    contours=Contours([
+                        Polygon.from_rectangle(Rectangle(0, 0, 5, 5))
+                    ]),
+                    label="odd" if i % 2 else "even"
+                ),
+                sprites=[]
+            ))
+        scene.add_many(glyphs)
+
+        window = Rectangle(12, 0, 20, 5)
+        assert scene.glyphs_in(window, space=page) == glyphs[1:4]
+        assert scene.regions_in(window, labels=["odd"], space=page) \
+            == [glyphs[1].region, glyphs[3].region]
+        assert scene.glyphs_in(window) == [] # root space is shifted
+
+        # moving the glyph updates the index
+        glyphs[9].space.transform = Transform.translate(Vector2(15, 0))
+        assert scene.glyphs_in(window, space=page) \
+            == [glyphs[1], glyphs[2], glyphs[3], glyphs[9]]